@@ -1,15 +1,36 @@
+import click
 from flask import Flask
-from flask_migrate import Migrate
-from flasgger import Swagger
 from flask_cors import CORS
 from .config import Config, DevelopmentConfig, TestingConfig, ProductionConfig
 from .models import db
-from .auth import auth
+from .auth import auth, init_auth
 from .routes import api
-from .admin import init_admin
+from .seats import seats_cli
+from .cache import init_cache
+from .waitlist import init_waitlist, waitlist_cli
+from .pool import init_pool, prepare_pool
+from .replicas import init_replicas
+from .search import search_cli
+from .ratelimit import init_ratelimit
+from .idempotency import idempotency_cli
+from .swagger import SWAGGER_PREFIXES, init_swagger
+from .lazy import mount_lazily
 
+ADMIN_PREFIXES = ('/admin',)
 
-def create_app(config_name=None):
+
+def init_admin(app):
+    # flask_admin и WTForms импортируются только когда админка нужна
+    from .admin import init_admin
+    return init_admin(app)
+
+
+def init_migrate(app):
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+
+def create_app(config_name=None, overrides=None):
     app = Flask(__name__, instance_relative_config=False)
     if config_name == 'testing':
         app.config.from_object(TestingConfig)
@@ -19,39 +40,41 @@ def create_app(config_name=None):
         app.config.from_object(ProductionConfig)
     else:
         app.config.from_object(Config)
+    if overrides:
+        app.config.update(overrides)
 
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+    init_pool(app)
     db.init_app(app)
-    Migrate(app, db)
-
-    swagger_config = {
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": 'apispec',
-                "route": '/apispec.json',
-                "rule_filter": lambda rule: True,
-                "model_filter": lambda tag: True,
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/swagger/",
-        # Опционально: кнопки Submit должны быть видны всегда
-        "swagger_ui_config": {
-            "supportedSubmitMethods": ["get", "post", "put", "delete", "patch"]
-        }
-    }
-
-    Swagger(
-        app,
-        config=swagger_config,
-        template_file='docs/swagger.yml'
-    )
+    prepare_pool(app)
+    init_replicas(app)
+    # Alembic нужен только командам flask db; gunicorn его не загружает
+    if not app.config['LAZY_EXTENSIONS'] or click.get_current_context(silent=True):
+        init_migrate(app)
+    init_auth(app)
+    init_cache(app)
+    init_waitlist(app)
+    init_ratelimit(app)
 
     app.register_blueprint(api)
-    if not app.config.get('TESTING'):
-        init_admin(app)
+    app.cli.add_command(seats_cli)
+    app.cli.add_command(waitlist_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(idempotency_cli)
+
+    extras, prefixes = [], ()
+    if app.config['SWAGGER_ENABLED']:
+        extras.append(init_swagger)
+        prefixes += SWAGGER_PREFIXES
+    if app.config['ADMIN_ENABLED']:
+        extras.append(init_admin)
+        prefixes += ADMIN_PREFIXES
+    if app.config['LAZY_EXTENSIONS']:
+        if extras:
+            mount_lazily(app, prefixes, extras)
+    else:
+        for setup in extras:
+            setup(app)
 
     return app
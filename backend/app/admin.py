@@ -1,13 +1,55 @@
+import time
+
+from flask import current_app
 from flask_admin import Admin, AdminIndexView, expose
 from flask_admin.contrib.sqla import ModelView
-from flask_admin.form import BaseForm
-from wtforms.ext.sqlalchemy.fields import QuerySelectField
 from wtforms.validators import DataRequired
-from wtforms import StringField, IntegerField
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import configure_mappers
 from .models import db, Teacher, Course, Student, Request
 from .auth import auth
+from .seats import is_course_full_error
+from .cache import read_versions
 import sqlalchemy.exc
 
+# Число строк для пагинации списков. Точный COUNT(*) по большой таблице
+# на каждый показ страницы дорог, поэтому без фильтров и поиска:
+# на PostgreSQL — оценка планировщика (pg_class.reltuples), если таблица
+# больше ADMIN_EXACT_COUNT_LIMIT; иначе — точный COUNT, закэшированный
+# до изменения таблицы или на ADMIN_COUNT_CACHE_TTL секунд.
+
+def estimated_count(table):
+    if db.engine.dialect.name == 'postgresql':
+        estimate = db.session.scalar(
+            text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)'),
+            {'t': table.name}
+        )
+        if estimate and estimate >= current_app.config['ADMIN_EXACT_COUNT_LIMIT']:
+            return estimate
+
+    version = read_versions([table.name]).get(table.name)
+    counts = current_app.extensions.setdefault('admin_counts', {})
+    cached = counts.get(table.name)
+    if cached and cached[0] == version and cached[1] > time.monotonic():
+        return cached[2]
+    count = db.session.scalar(select(func.count()).select_from(table))
+    counts[table.name] = (version, time.monotonic() + current_app.config['ADMIN_COUNT_CACHE_TTL'], count)
+    return count
+
+
+class EstimatedCountQuery:
+    # Подменяет запрос числа строк в ModelView.get_list. Фильтры и поиск
+    # flask-admin вызывают filter/join — дальше работает обычный точный запрос.
+    def __init__(self, query, table):
+        self._query = query
+        self._table = table
+
+    def scalar(self):
+        return estimated_count(self._table)
+
+    def __getattr__(self, name):
+        return getattr(self._query, name)
+
 class SecureAdminIndexView(AdminIndexView):
     @expose('/')
     def index(self):
@@ -20,6 +62,9 @@ class SecureAdminIndexView(AdminIndexView):
         return auth.auth_error_callback(401)
 
 class AdminModelView(ModelView):
+    def get_count_query(self):
+        return EstimatedCountQuery(super().get_count_query(), self.model.__table__)
+
     def is_accessible(self):
         return auth.username() == 'admin'
     def inaccessible_callback(self, name, **kwargs):
@@ -33,20 +78,21 @@ class TeacherAdmin(AdminModelView):
         'department'
     ]   
 
-def get_teachers():
-    return Teacher.query.all()
-
-class CourseForm(BaseForm):
-    title = StringField('Title')
-    teacher = QuerySelectField(
-        query_factory=get_teachers,
-        validators=[DataRequired()]
-    )
-    student_limit = IntegerField('Student Limit')
-
 class CourseAdmin(AdminModelView):
-    form = CourseForm
     form_columns = ['title', 'teacher', 'student_limit']
+    # связи «N → 1» из column_list flask-admin подгружает тем же запросом
+    # (joinedload, column_auto_select_related)
+    column_list = ['title', 'teacher', 'student_limit', 'approved_count']
+    # выбор преподавателя поиском через AJAX вместо загрузки всех в форму
+    form_ajax_refs = {
+        'teacher': {
+            'fields': ('full_name', 'department'),
+            'page_size': 10
+        }
+    }
+    form_args = {
+        'teacher': {'validators': [DataRequired()]}
+    }
     
 class StudentAdmin(AdminModelView):
     form_columns = ['full_name', 'email']
@@ -58,6 +104,7 @@ class StudentAdmin(AdminModelView):
         return form_class
     
 class RequestAdmin(AdminModelView):
+    column_list = ['id', 'student', 'course', 'status', 'created_at']
     form_ajax_refs = {
         'student': {
             'fields': ('full_name', 'email'),
@@ -70,7 +117,7 @@ class RequestAdmin(AdminModelView):
     }
 
     def handle_exception(self, exc):
-        if isinstance(exc, sqlalchemy.exc.IntegrityError):
+        if isinstance(exc, sqlalchemy.exc.IntegrityError) or is_course_full_error(exc):
             from flask import flash
             flash('Ошибка: превышен лимит студентов курса', 'error')
             return True
@@ -80,20 +127,23 @@ class RequestAdmin(AdminModelView):
         try:
             super().on_model_change(form, model, is_created)
         except sqlalchemy.exc.IntegrityError as e:
-            if 'course student limit exceeded' in str(e).lower():
+            if is_course_full_error(e):
                 from flask import flash
                 flash('Нельзя утвердить заявку: курс заполнен', 'error')
                 raise
 
-admin = Admin(
-    name='Exam Admin',
-    template_mode='bootstrap3',
-    index_view=SecureAdminIndexView()
-)
-
 def init_admin(app):
+    # backref-связи (Course.teacher, Request.course) появляются только
+    # после настройки мапперов, а они нужны form_ajax_refs
+    configure_mappers()
+    admin = Admin(
+        name='Exam Admin',
+        template_mode='bootstrap3',
+        index_view=SecureAdminIndexView()
+    )
     admin.init_app(app)
     admin.add_view(TeacherAdmin(Teacher, db.session))
     admin.add_view(CourseAdmin(Course, db.session))
     admin.add_view(StudentAdmin(Student, db.session))
     admin.add_view(RequestAdmin(Request, db.session))
+    return admin
@@ -0,0 +1,203 @@
+import asyncio
+import io
+from urllib.parse import unquote
+
+from flask import abort, current_app, jsonify, request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+
+from . import create_app
+from .auth import auth
+from .filters import filter_requests, filter_students, filter_teachers
+from .pagination import keyset_page, keyset_query, wants_stream
+from .pool import _is_memory_sqlite
+from .serializers import (
+    teacher_serializer, course_serializer, student_serializer, request_serializer
+)
+
+# Асинхронный режим только для чтения: ASGI-приложение (asgi.py, uvicorn)
+# обслуживает GET-списки и карточки blueprint api через асинхронный драйвер
+# и AsyncSession. Маршрутизация, авторизация, фильтры, ключи пагинации и
+# JSON — те же функции Flask-приложения в его контексте запроса, поэтому
+# ответы совпадают с синхронными; только сам запрос к БД ждёт без
+# блокировки процесса. Запись и остальные маршруты — синхронные воркеры.
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+# endpoint -> (сериализатор, запрос, поля сортировки); как в routes.py
+LIST_VIEWS = {
+    'api.get_teachers': (teacher_serializer, lambda: filter_teachers(teacher_serializer.select()), ('id',)),
+    'api.get_courses': (course_serializer, lambda: course_serializer.select(), ('id',)),
+    'api.get_students': (student_serializer, lambda: filter_students(student_serializer.select()),
+                         ('id', 'created_at')),
+    'api.get_requests': (request_serializer, lambda: filter_requests(request_serializer.select()),
+                         ('id', 'created_at')),
+}
+DETAIL_VIEWS = {
+    'api.get_teacher': teacher_serializer,
+    'api.get_course': course_serializer,
+    'api.get_student': student_serializer,
+    'api.get_request': request_serializer,
+}
+
+_login_required = auth.login_required(role=['user', 'admin'])(lambda: None)
+
+
+def async_url(uri):
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver for {backend!r}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def async_engine_options(config, url):
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=config['ASYNC_DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+    timeout_ms = config['DB_STATEMENT_TIMEOUT_MS']
+    if timeout_ms and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(timeout_ms)}}
+    return options
+
+
+def _environ(scope):
+    # WSGI-окружение для контекста запроса Flask; тело GET не читается
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': unquote(scope['path']),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+class ReadOnlyAPI:
+    def __init__(self, flask_app, engine):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        with self.flask_app.request_context(_environ(scope)):
+            resp, chunks = await self._dispatch()
+            headers = [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                       for k, v in resp.headers.items()]
+            await send({'type': 'http.response.start', 'status': resp.status_code,
+                        'headers': headers})
+            if chunks is not None and scope['method'] != 'HEAD':
+                async for chunk in chunks:
+                    await send({'type': 'http.response.body', 'body': chunk.encode(),
+                                'more_body': True})
+                await send({'type': 'http.response.body', 'body': b''})
+            else:
+                body = b'' if scope['method'] == 'HEAD' else resp.get_data()
+                await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _dispatch(self):
+        app = self.flask_app
+        chunks = None
+        try:
+            if request.routing_exception is not None:
+                raise request.routing_exception
+            if request.endpoint not in LIST_VIEWS and request.endpoint not in DETAIL_VIEWS:
+                abort(404)
+            rv = app.preprocess_request()
+            if rv is None:
+                # проверка пароля (scrypt) при промахе кэша — в пуле потоков,
+                # чтобы не блокировать цикл событий; контекст запроса
+                # переносится вместе с contextvars
+                rv = await asyncio.to_thread(_login_required)
+            if rv is None:
+                if request.endpoint in LIST_VIEWS:
+                    rv, chunks = await self._list(*LIST_VIEWS[request.endpoint])
+                else:
+                    rv = await self._detail(DETAIL_VIEWS[request.endpoint], **request.view_args)
+        except HTTPException as exc:
+            rv = app.handle_user_exception(exc)
+        return app.process_response(app.make_response(rv)), chunks
+
+    async def _list(self, serializer, build, sort_fields):
+        stmt, limit, key = keyset_query(serializer, build(), sort_fields)
+        if wants_stream():
+            resp = current_app.response_class(mimetype='application/json')
+            return resp, self._stream(stmt, serializer)
+        async with self.session() as session:
+            result = await session.execute(stmt)
+        return keyset_page(serializer, result, limit, key), None
+
+    async def _stream(self, stmt, serializer):
+        # Как stream_json_array: серверный курсор, пачки по API_STREAM_CHUNK_SIZE
+        chunk_size = current_app.config['API_STREAM_CHUNK_SIZE']
+        dumps = current_app.json.dumps
+        yield '['
+        first = True
+        async with self.session() as session:
+            result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+            async for partition in result.partitions():
+                chunk = ','.join(dumps(item) for item in serializer.rows(partition))
+                yield chunk if first else ',' + chunk
+                first = False
+        yield ']'
+
+    async def _detail(self, serializer, id):
+        async with self.session() as session:
+            row = (await session.execute(
+                serializer.select().where(serializer.table.c.id == id)
+            )).first()
+        if row is None:
+            abort(404)
+        return jsonify(serializer.one(row))
+
+
+def create_asgi_app(config_name=None, overrides=None):
+    # Swagger, админка и Alembic процессу чтения не нужны
+    config = {'SWAGGER_ENABLED': False, 'ADMIN_ENABLED': False, 'LAZY_EXTENSIONS': True}
+    config.update(overrides or {})
+    flask_app = create_app(config_name, config)
+    cfg = flask_app.config
+    # Реплика, если есть: этот режим только читает
+    uri = (cfg['ASYNC_DATABASE_URL']
+           or next(iter(cfg['SQLALCHEMY_REPLICA_URIS']), None)
+           or cfg['SQLALCHEMY_DATABASE_URI'])
+    url = async_url(uri)
+    engine = create_async_engine(url, **async_engine_options(cfg, url))
+    return ReadOnlyAPI(flask_app, engine)
@@ -1,28 +1,151 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from flask_httpauth import HTTPBasicAuth
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask import current_app
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from .instrumentation import timed_phase
 
 auth = HTTPBasicAuth()
 
-# Хранилище пользователей и ролей
+# Хранилище пользователей и ролей.
+# Хэши посчитаны заранее: generate_password_hash при импорте тратил CPU
+# на каждом старте воркера.
 users = {
-    'admin': generate_password_hash('Sirius2025'),
-    'user': generate_password_hash('userpass')
+    'admin': 'scrypt:32768:8:1$ogi2xvgmGQkdEWd6$e8e7fd8130cce3a84c1cac556f406cc37139a5657b448dada51a07af5bf96939a8f802f7ea7aa4e9101d987e8874f0954cf2e7e1e237a97d22874b1e67a76ec5',
+    'user': 'scrypt:32768:8:1$IlEFHhBYQU2uaQAO$8495f0a5c9b6f9be45a76bdab1294070725e94e3d687365e9e5edae5bf4b487fbd1341d18590578db69fe5a0471e447de8d8dfd083b551e63f4c8ec69a547157'
 }
 roles = {
     'admin': 'admin',
     'user': 'user'
 }
 
+
+class CredentialCache:
+    # Кэш успешных проверок пароля: ограниченный LRU с TTL.
+    # Ключ — HMAC(username, password) на случайном ключе процесса,
+    # сами пароли в памяти не хранятся.
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, username, password):
+        msg = f'{username}\0{password}'.encode()
+        return hmac.new(self._key, msg, hashlib.sha256).digest()
+
+    def get(self, username, password, stored_hash):
+        key = self._digest(username, password)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            cached_user, cached_hash, expires = entry
+            # смена пароля меняет хэш — запись сразу становится недействительной
+            if cached_hash != stored_hash or expires < time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return cached_user == username
+
+    def put(self, username, password, stored_hash):
+        key = self._digest(username, password)
+        with self._lock:
+            self._entries[key] = (username, stored_hash, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username=None):
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+                return
+            for key in [k for k, v in self._entries.items() if v[0] == username]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+credential_cache = CredentialCache()
+
+
+def init_auth(app):
+    credential_cache.maxsize = app.config['AUTH_CACHE_SIZE']
+    credential_cache.ttl = app.config['AUTH_CACHE_TTL']
+
+
+def set_password(username, password):
+    users[username] = generate_password_hash(password)
+    credential_cache.invalidate(username)
+
+
+def _password_fingerprint(username):
+    # Токен привязан к текущему хэшу пароля: смена пароля отзывает токены
+    return hashlib.sha256(users[username].encode()).hexdigest()[:16]
+
+
+def _token_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='api-auth-token')
+
+
+def issue_token(username):
+    return _token_serializer().dumps({'u': username, 'p': _password_fingerprint(username)})
+
+
+def verify_token(token):
+    try:
+        data = _token_serializer().loads(
+            token, max_age=current_app.config['AUTH_TOKEN_TTL']
+        )
+    except BadSignature:
+        return None
+    username = data.get('u') if isinstance(data, dict) else None
+    if username in users and hmac.compare_digest(
+        str(data.get('p')), _password_fingerprint(username)
+    ):
+        return username
+
+
+def _bearer_token():
+    header = request.authorization
+    if header is not None and header.type == 'bearer':
+        return header.token
+
+
 @auth.verify_password
+@timed_phase('auth')
 def verify(username, password):
     # В режиме тестирования (TestingConfig.TESTING = True)
     # любой запрос проходит как от 'admin'
     if current_app and current_app.config.get('TESTING'):
         return 'admin'
 
-    # Обычная проверка имени и пароля
-    if username in users and check_password_hash(users.get(username), password):
+    # Authorization: Bearer <token> — дешёвая проверка HMAC вместо хэша пароля.
+    # Проверяем до Basic: HTTPBasicAuth пытается разобрать и такой заголовок.
+    token = _bearer_token()
+    if token:
+        return verify_token(token)
+    if not username:
+        return None
+
+    # Обычная проверка имени и пароля, повторные — из кэша
+    stored_hash = users.get(username)
+    if stored_hash is None:
+        return None
+    if credential_cache.get(username, password, stored_hash):
+        return username
+    if check_password_hash(stored_hash, password):
+        credential_cache.put(username, password, stored_hash)
         return username
 
 @auth.get_user_roles
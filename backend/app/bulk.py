@@ -0,0 +1,144 @@
+from flask import abort, current_app
+from sqlalchemy import delete, func, select, update
+
+from .models import db, Teacher, Course, Student, Request
+from .seats import app_maintains_counter, release_seats, reserve_seats
+
+# Удаление набором: один DELETE на таблицу, дочерние строки удаляет
+# ON DELETE CASCADE в БД. Каждая функция возвращает число удалённых
+# строк по таблицам (каскадные считаются до удаления) и курсы, где
+# освободились места.
+
+
+def ids_arg(data):
+    ids = data.get('ids')
+    if (not isinstance(ids, list) or not ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+        abort(400)
+    if len(ids) > current_app.config['API_BULK_MAX_ITEMS']:
+        abort(413)
+    return ids
+
+
+def _count(model, *criteria):
+    return db.session.scalar(select(func.count()).select_from(model).where(*criteria))
+
+
+def _delete(model, *criteria):
+    return db.session.execute(
+        delete(model).where(*criteria).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def delete_teachers(ids):
+    course_ids = select(Course.id).where(Course.teacher_id.in_(ids))
+    counts = {
+        'request': _count(Request, Request.course_id.in_(course_ids)),
+        'course': _count(Course, Course.teacher_id.in_(ids)),
+    }
+    counts['teacher'] = _delete(Teacher, Teacher.id.in_(ids))
+    return counts, []
+
+
+def delete_courses(ids):
+    counts = {'request': _count(Request, Request.course_id.in_(ids))}
+    counts['course'] = _delete(Course, Course.id.in_(ids))
+    return counts, []
+
+
+def delete_students(ids):
+    criteria = (Request.student_id.in_(ids),)
+    freed = release_seats(db.session.connection(), *criteria)
+    counts = {'request': _count(Request, *criteria)}
+    counts['student'] = _delete(Student, Student.id.in_(ids))
+    return counts, freed
+
+
+def delete_requests(*criteria):
+    freed = release_seats(db.session.connection(), *criteria)
+    return {'request': _delete(Request, *criteria)}, freed
+
+
+REQUEST_STATUSES = ('pending', 'approved', 'rejected')
+
+
+def transition_requests(status, *criteria, ids=None):
+    # Перевод заявок в статус status одним UPDATE. Вместимость проверяется
+    # один раз на курс под блокировкой строки course; при нехватке мест
+    # одобряются заявки в порядке очереди, остальные получают 'full'.
+    # При переводе в pending заявка студента, у которого pending-заявка уже
+    # есть (или появляется раньше в этой же пачке), получает
+    # 'pending_conflict'. Отбор больше API_BULK_MAX_ITEMS заявок — 413:
+    # продолжения нет, большие отборы делятся фильтрами или списками ids.
+    # Возвращает (исходы по id, курсы, где освободились места).
+    if ids is not None:
+        criteria = (Request.id.in_(ids), *criteria)
+    limit = current_app.config['API_BULK_MAX_ITEMS']
+    matched = select(Request.course_id).where(*criteria)
+    # курсы блокируются в порядке id, чтобы параллельные переводы не
+    # взаимоблокировались
+    courses = {
+        c.id: c for c in db.session.execute(
+            select(Course.id, Course.student_limit, Course.approved_count)
+            .where(Course.id.in_(matched))
+            .order_by(Course.id)
+            .with_for_update()
+        )
+    }
+    rows = db.session.execute(
+        select(Request.id, Request.course_id, Request.student_id, Request.status)
+        .where(*criteria)
+        .order_by(Request.course_id, Request.created_at, Request.id)
+        .limit(limit + 1)
+        .with_for_update()
+    ).all()
+    if len(rows) > limit:
+        abort(413)
+
+    outcomes = {i: 'not_found' for i in ids or ()}
+    changed = []
+    free = {course_id: c.student_limit - c.approved_count for course_id, c in courses.items()}
+    # студенты с pending-заявкой: уникальный индекс uq_student_pending_request
+    pending = set()
+    if status == 'pending':
+        pending = set(db.session.scalars(
+            select(Request.student_id).where(
+                Request.student_id.in_({r.student_id for r in rows}),
+                Request.status == 'pending'
+            )
+        ))
+    for r in rows:
+        if r.status == status:
+            outcomes[r.id] = 'unchanged'
+        elif status == 'approved' and free[r.course_id] <= 0:
+            outcomes[r.id] = 'full'
+        elif status == 'pending' and r.student_id in pending:
+            outcomes[r.id] = 'pending_conflict'
+        else:
+            if status == 'approved':
+                free[r.course_id] -= 1
+            elif status == 'pending':
+                pending.add(r.student_id)
+            outcomes[r.id] = 'applied'
+            changed.append(r)
+    if not changed:
+        return outcomes, []
+
+    changed_ids = [r.id for r in changed]
+    freed = []
+    if status != 'approved':
+        freed = release_seats(db.session.connection(), Request.id.in_(changed_ids))
+    db.session.execute(
+        update(Request)
+        .where(Request.id.in_(changed_ids))
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    # на PostgreSQL счётчик ведёт триггер, иначе — одна прибавка на курс
+    if status == 'approved' and app_maintains_counter():
+        approved = {}
+        for r in changed:
+            approved[r.course_id] = approved.get(r.course_id, 0) + 1
+        for course_id, n in sorted(approved.items()):
+            reserve_seats(db.session.connection(), course_id, n)
+    return outcomes, freed
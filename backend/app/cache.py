@@ -0,0 +1,206 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, has_app_context, make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from .models import db, TableVersion
+from .pagination import wants_stream
+
+# Версии таблиц и кэш сериализованных ответов GET-эндпоинтов.
+# Версии хранятся в таблице table_version и растут в той же транзакции,
+# что меняет строки таблицы, поэтому они общие для всех воркеров и
+# машин и меняются только вместе с данными. ETag и ключ кэша строятся
+# из версий: 304 и попадание в кэш стоят одного чтения table_version
+# по первичному ключу вместо запроса за данными.
+#
+# Кэш тел ответов живёт в памяти процесса; запись старше
+# RESPONSE_CACHE_TTL секунд отбрасывается (0 — без срока). На ETag срок
+# не влияет.
+
+TRACKED_TABLES = ('teacher', 'course', 'student', 'request')
+# Таблицы, строки которых БД удаляет каскадом (ON DELETE CASCADE)
+CASCADES = {
+    'teacher': ('course', 'request'),
+    'course': ('request',),
+    'student': ('request',),
+}
+
+
+class ResponseCache:
+    def __init__(self, maxsize=512, ttl=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key_for(self, tables):
+        versions = read_versions(tables)
+        return (
+            request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            tuple(sorted(request.args.items(multi=True))),
+            tuple(versions.get(name, 0) for name in tables),
+        )
+
+    def etag_for(self, key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'versions': read_versions(TRACKED_TABLES),
+        }
+
+
+def read_versions(tables):
+    return dict(db.session.execute(
+        select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+    ).all())
+
+
+@event.listens_for(TableVersion.__table__, 'after_create')
+def _seed_versions(target, connection, **kw):
+    connection.execute(target.insert(), [{'name': name, 'version': 0} for name in TRACKED_TABLES])
+
+
+def init_cache(app):
+    app.extensions['response_cache'] = ResponseCache(
+        maxsize=app.config['RESPONSE_CACHE_SIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL'],
+    )
+
+
+def get_cache():
+    if has_app_context():
+        return current_app.extensions.get('response_cache')
+
+
+# Какие таблицы меняются, копим в session.info и поднимаем их версии
+# перед коммитом, в той же транзакции: версия и данные видны другим
+# воркерам одновременно.
+
+def _pending(session):
+    return session.info.setdefault('changed_tables', set())
+
+
+def mark_changed(session, *tables):
+    _pending(session).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    changed = _pending(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table in TRACKED_TABLES:
+            changed.add(table)
+    for obj in session.deleted:
+        changed.update(CASCADES.get(getattr(obj, '__tablename__', None), ()))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_tables(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        name = getattr(table, 'name', None)
+        if name in TRACKED_TABLES:
+            mark_changed(orm_execute_state.session, name)
+        if orm_execute_state.is_delete:
+            mark_changed(orm_execute_state.session, *CASCADES.get(name, ()))
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_versions(session):
+    # before_commit срабатывает и для SAVEPOINT; версии поднимает только
+    # внешняя транзакция
+    if session.in_nested_transaction():
+        return
+    # изменения, которые ещё не сброшены, попадут в changed_tables при flush
+    session.flush()
+    changed = session.info.pop('changed_tables', None)
+    if changed:
+        # строки блокируются в одном порядке, чтобы записи не взаимоблокировались
+        session.execute(
+            update(TableVersion)
+            .where(TableVersion.name.in_(sorted(changed)))
+            .values(version=TableVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_changes(session, previous_transaction):
+    session.info.pop('changed_tables', None)
+
+
+# Заголовки, которые нужно сохранить вместе с телом ответа
+CACHED_HEADERS = ('Content-Type', 'X-Next-Cursor', 'Link')
+
+
+def cached_response(*tables):
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None or wants_stream():
+                return f(*args, **kwargs)
+
+            key = cache.key_for(tables)
+            etag = cache.etag_for(key)
+            if request.if_none_match.contains(etag):
+                cache.not_modified += 1
+                resp = current_app.response_class(status=304)
+                resp.set_etag(etag)
+                return resp
+
+            entry = cache.get(key)
+            if entry is not None:
+                body, headers = entry
+                resp = current_app.response_class(body, headers=headers)
+            else:
+                resp = make_response(f(*args, **kwargs))
+                if resp.status_code != 200 or resp.is_streamed:
+                    return resp
+                headers = [(h, resp.headers[h]) for h in CACHED_HEADERS if h in resp.headers]
+                cache.put(key, (resp.get_data(), headers))
+            resp.set_etag(etag)
+            resp.headers['Cache-Control'] = 'private, no-cache'
+            return resp
+        return wrapper
+    return decorator
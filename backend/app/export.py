@@ -0,0 +1,65 @@
+import csv
+import io
+import zlib
+
+from flask import Response, abort, current_app, request, stream_with_context
+
+from .models import db
+
+# Потоковая выгрузка: строки читаются серверным курсором пачками по
+# API_STREAM_CHUNK_SIZE и сразу уходят клиенту, при Accept-Encoding: gzip —
+# сжатыми на лету. В памяти одновременно держится только одна пачка.
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _csv_chunks(serializer, partitions):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(serializer.fields)
+    for partition in partitions:
+        for item in serializer.rows(partition):
+            writer.writerow(item.values())
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def _ndjson_chunks(serializer, partitions):
+    dumps = current_app.json.dumps
+    for partition in partitions:
+        yield ''.join(dumps(item) + '\n' for item in serializer.rows(partition))
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(stmt, serializer, filename):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+    chunk_size = current_app.config['API_STREAM_CHUNK_SIZE']
+    gzipped = request.accept_encodings['gzip'] > 0
+
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+        writer = _csv_chunks if fmt == 'csv' else _ndjson_chunks
+        chunks = (c for c in writer(serializer, result.partitions()) if c)
+        yield from _gzip(chunks) if gzipped else (c.encode() for c in chunks)
+
+    resp = Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[fmt])
+    resp.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    resp.headers['Vary'] = 'Accept-Encoding'
+    if gzipped:
+        resp.headers['Content-Encoding'] = 'gzip'
+    return resp
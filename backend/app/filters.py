@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from flask import abort, request
+
+from .models import Teacher, Student, Request
+
+# Фильтры списков из параметров запроса. Применяются к select() из
+# serializers.py и к выгрузкам, чтобы условия везде совпадали.
+
+
+def _int_arg(name):
+    if name not in request.args:
+        return None
+    value = request.args.get(name, type=int)
+    if value is None:
+        abort(400)
+    return value
+
+
+def _datetime_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+
+def _multi_arg(name, split=True):
+    # status=pending&status=approved или status=pending,approved
+    if not split:
+        return [v for v in request.args.getlist(name) if v]
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return values
+
+
+def _created_range(stmt, column):
+    created_after = _datetime_arg('created_after')
+    if created_after is not None:
+        stmt = stmt.where(column >= created_after)
+    created_before = _datetime_arg('created_before')
+    if created_before is not None:
+        stmt = stmt.where(column < created_before)
+    return stmt
+
+
+def filter_requests(stmt):
+    for name, column in (('course_id', Request.course_id), ('student_id', Request.student_id)):
+        value = _int_arg(name)
+        if value is not None:
+            stmt = stmt.where(column == value)
+    statuses = _multi_arg('status')
+    if statuses:
+        stmt = stmt.where(Request.status.in_(statuses))
+    return _created_range(stmt, Request.created_at)
+
+
+def filter_students(stmt):
+    prefix = request.args.get('email_prefix')
+    if prefix:
+        # LIKE 'prefix%' с экранированием % и _; на PostgreSQL идёт по
+        # индексу ix_student_email_pattern (text_pattern_ops) при любой
+        # collation базы
+        stmt = stmt.where(Student.email.startswith(prefix, autoescape=True))
+    return _created_range(stmt, Student.created_at)
+
+
+def filter_teachers(stmt):
+    for name in ('department', 'specialty'):
+        values = _multi_arg(name, split=False)
+        if values:
+            stmt = stmt.where(getattr(Teacher, name).in_(values))
+    return stmt
@@ -0,0 +1,140 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+import click
+from flask import current_app, jsonify, make_response, request
+from flask.cli import AppGroup
+from sqlalchemy import delete, exc, insert, select, update
+
+from .auth import auth
+from .models import db, IdempotencyKey
+
+# Заголовок Idempotency-Key для POST/PATCH: первый успешный ответ
+# сохраняется в таблице idempotency_key и отдаётся повторам без выполнения
+# обработчика. Ошибки — возвращённые и брошенные через abort() — ключ
+# освобождают: обработчик ничего не записал, повтор выполнится заново.
+# Строку с ключом вставляет первый запрос до выполнения обработчика,
+# поэтому одновременные повторы (в том числе из других воркеров) не
+# выполняют его второй раз, а ждут сохранённый ответ.
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 200
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.get_data()):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _claim(key, fingerprint):
+    # Возвращает None, если ключ занят этим запросом, иначе — чужую запись
+    config = current_app.config
+    now = datetime.utcnow()
+    expired = IdempotencyKey.created_at < now - timedelta(seconds=config['IDEMPOTENCY_TTL'])
+    # Запись без ответа старше IDEMPOTENCY_LOCK_SECONDS — воркер упал
+    # посреди обработки; ключ можно занять заново
+    abandoned = db.and_(
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.created_at < now - timedelta(seconds=config['IDEMPOTENCY_LOCK_SECONDS']),
+    )
+    db.session.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.key == key, db.or_(expired, abandoned)
+    ))
+    try:
+        db.session.execute(insert(IdempotencyKey).values(
+            key=key, fingerprint=fingerprint, created_at=now
+        ))
+        db.session.commit()
+        return None
+    except exc.IntegrityError:
+        db.session.rollback()
+    return db.session.execute(
+        select(IdempotencyKey.fingerprint, IdempotencyKey.status_code,
+               IdempotencyKey.body, IdempotencyKey.content_type)
+        .where(IdempotencyKey.key == key)
+    ).first()
+
+
+def _release(key):
+    db.session.rollback()
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+    db.session.commit()
+
+
+def _store(key, resp):
+    db.session.execute(update(IdempotencyKey).where(IdempotencyKey.key == key).values(
+        status_code=resp.status_code,
+        body=resp.get_data(as_text=True),
+        content_type=resp.content_type,
+    ))
+    db.session.commit()
+
+
+def _replay(record):
+    resp = make_response(record.body, record.status_code)
+    resp.content_type = record.content_type
+    resp.headers['Idempotent-Replayed'] = 'true'
+    return resp
+
+
+def idempotent(f):
+    # Ставится под @auth.login_required: ключи разных пользователей не пересекаются
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return f(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters'}), 400
+        key = f'{auth.current_user()}:{key}'
+        fingerprint = _fingerprint()
+
+        deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_SECONDS']
+        while True:
+            record = _claim(key, fingerprint)
+            if record is None:
+                break
+            if record.fingerprint != fingerprint:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was used with a different request'}), 422
+            if record.status_code is not None:
+                return _replay(record)
+            if time.monotonic() >= deadline:
+                resp = jsonify({'error': 'A request with this Idempotency-Key is in progress'})
+                resp.status_code = 409
+                resp.headers['Retry-After'] = '1'
+                return resp
+            time.sleep(current_app.config['IDEMPOTENCY_POLL_INTERVAL'])
+
+        try:
+            resp = make_response(f(*args, **kwargs))
+        except Exception:
+            _release(key)
+            raise
+        if resp.status_code >= 400:
+            _release(key)
+        else:
+            _store(key, resp)
+        return resp
+    return wrapper
+
+
+def purge_expired():
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+    deleted = db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+idempotency_cli = AppGroup('idempotency', help='Ключи идемпотентности.')
+
+
+@idempotency_cli.command('purge')
+def purge_command():
+    click.echo(f'Deleted {purge_expired()} expired key(s)')
@@ -0,0 +1,320 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import abort, current_app, jsonify, request
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from .bulk import REQUEST_STATUSES
+from .cache import mark_changed
+from .models import db, Teacher, Course, Student, Request
+from .seats import CourseFullError, app_maintains_counter, is_course_full_error, reserve_seats
+
+# Массовый импорт: JSON-массив, NDJSON или CSV в теле запроса либо файлом
+# (multipart, поле file). Строки проверяются пачками по IMPORT_BATCH_SIZE
+# запросами набором и вставляются одной командой на пачку: COPY на
+# PostgreSQL, executemany на остальных СУБД. Ошибочная строка не
+# прерывает импорт; каждая пачка — отдельная транзакция.
+
+REQUIRED = object()
+
+UPLOAD_TYPES = {
+    '.json': 'application/json',
+    '.ndjson': 'application/x-ndjson',
+    '.jsonl': 'application/x-ndjson',
+    '.csv': 'text/csv',
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _parse_json_lines(text):
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            rows.append(RowError('Invalid JSON'))
+    return rows
+
+
+def read_rows():
+    upload = request.files.get('file')
+    if upload is not None:
+        mimetype = upload.mimetype
+        if mimetype not in UPLOAD_TYPES.values():
+            ext = '.' + upload.filename.rsplit('.', 1)[-1].lower() if '.' in upload.filename else ''
+            mimetype = UPLOAD_TYPES.get(ext)
+        raw = upload.read()
+    else:
+        mimetype, raw = request.mimetype, request.get_data()
+    try:
+        text = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        abort(400)
+
+    if mimetype == 'application/json':
+        try:
+            rows = json.loads(text)
+        except ValueError:
+            abort(400)
+        if not isinstance(rows, list):
+            abort(400)
+    elif mimetype == 'application/x-ndjson':
+        rows = _parse_json_lines(text)
+    elif mimetype == 'text/csv':
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        abort(415)
+    if not rows:
+        abort(400)
+    if len(rows) > current_app.config['API_IMPORT_MAX_ROWS']:
+        abort(413)
+    return rows
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, str)):
+        return int(value)
+    raise ValueError
+
+
+def _copy_value(value):
+    # текстовый формат COPY: \N — NULL, спецсимволы экранируются
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _copy_rows(table, rows):
+    # id берутся из последовательности заранее: COPY не возвращает их,
+    # а ответ должен сопоставить id строкам входа
+    conn = db.session.connection()
+    ids = sorted(conn.execute(
+        select(func.nextval(func.pg_get_serial_sequence(table.name, 'id')))
+        .select_from(func.generate_series(1, len(rows)))
+    ).scalars())
+    columns = ['id', *rows[0]]
+    buf = io.StringIO()
+    for id, row in zip(ids, rows):
+        buf.write('\t'.join(_copy_value(v) for v in (id, *row.values())) + '\n')
+    buf.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY {table.name} ({", ".join(columns)}) FROM STDIN', buf)
+    finally:
+        cursor.close()
+    return ids
+
+
+class Importer:
+    # Декларативное описание импортируемых полей: имя -> (тип, значение
+    # по умолчанию или REQUIRED). Все строки пачки получают одинаковый
+    # набор столбцов, чтобы вставка шла одной командой.
+    model = None
+    fields = {}
+    conflict_error = 'Row conflicts with existing data'
+
+    def __init__(self):
+        self.table = self.model.__table__
+
+    def parse(self, row):
+        if isinstance(row, RowError):
+            raise row
+        if not isinstance(row, dict):
+            raise RowError('Row must be an object')
+        values = {}
+        for name, (kind, default) in self.fields.items():
+            value = row.get(name)
+            if value is None or value == '':
+                if default is REQUIRED:
+                    raise RowError(f'{name} is required')
+                values[name] = default
+                continue
+            if kind is int:
+                try:
+                    value = _to_int(value)
+                except ValueError:
+                    raise RowError(f'{name} must be an integer')
+            elif not isinstance(value, str):
+                raise RowError(f'{name} must be a string')
+            values[name] = value
+        if 'created_at' in self.table.c:
+            values['created_at'] = datetime.utcnow()
+        return values
+
+    def check(self, batch):
+        # Проверки набором для пачки [(номер строки, значения)]:
+        # возвращает {номер строки: ошибка}
+        return {}
+
+    def insert(self, rows):
+        if db.session.connection().dialect.name == 'postgresql':
+            ids = _copy_rows(self.table, rows)
+        else:
+            ids = db.session.scalars(
+                insert(self.model).returning(self.model.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+        self.after_insert(rows)
+        return ids
+
+    def after_insert(self, rows):
+        pass
+
+
+class StudentImporter(Importer):
+    model = Student
+    fields = {'full_name': (str, REQUIRED), 'email': (str, REQUIRED)}
+    conflict_error = 'Email already exists'
+
+    def check(self, batch):
+        emails = {values['email'] for _, values in batch}
+        taken = set(db.session.scalars(select(Student.email).where(Student.email.in_(emails))))
+        errors = {}
+        for i, values in batch:
+            if values['email'] in taken:
+                errors[i] = self.conflict_error
+            taken.add(values['email'])
+        return errors
+
+
+class CourseImporter(Importer):
+    model = Course
+    fields = {'title': (str, REQUIRED), 'teacher_id': (int, REQUIRED),
+              'student_limit': (int, REQUIRED)}
+    conflict_error = 'Teacher not found'
+
+    def check(self, batch):
+        teacher_ids = {values['teacher_id'] for _, values in batch}
+        found = set(db.session.scalars(select(Teacher.id).where(Teacher.id.in_(teacher_ids))))
+        return {i: self.conflict_error for i, values in batch
+                if values['teacher_id'] not in found}
+
+
+class RequestImporter(Importer):
+    model = Request
+    fields = {'student_id': (int, REQUIRED), 'course_id': (int, REQUIRED),
+              'description': (str, None), 'status': (str, 'pending')}
+    conflict_error = 'Student already has a pending request'
+
+    def check(self, batch):
+        student_ids = {values['student_id'] for _, values in batch}
+        course_ids = {values['course_id'] for _, values in batch}
+        students = set(db.session.scalars(select(Student.id).where(Student.id.in_(student_ids))))
+        pending = set(db.session.scalars(
+            select(Request.student_id)
+            .where(Request.student_id.in_(student_ids), Request.status == 'pending')
+        ))
+        # строки курсов блокируются до коммита пачки, как в bulk-transition
+        free = {
+            c.id: c.student_limit - c.approved_count for c in db.session.execute(
+                select(Course.id, Course.student_limit, Course.approved_count)
+                .where(Course.id.in_(course_ids))
+                .order_by(Course.id)
+                .with_for_update()
+            )
+        }
+        errors = {}
+        for i, values in batch:
+            status, student_id, course_id = values['status'], values['student_id'], values['course_id']
+            if status not in REQUEST_STATUSES:
+                errors[i] = f'status must be one of: {", ".join(REQUEST_STATUSES)}'
+            elif student_id not in students:
+                errors[i] = 'Student not found'
+            elif course_id not in free:
+                errors[i] = 'Course not found'
+            elif status == 'pending' and student_id in pending:
+                errors[i] = self.conflict_error
+            elif status == 'approved' and free[course_id] <= 0:
+                errors[i] = 'Course is full'
+            elif status == 'pending':
+                pending.add(student_id)
+            elif status == 'approved':
+                free[course_id] -= 1
+        return errors
+
+    def after_insert(self, rows):
+        # вставка набором минует события ORM из seats.py
+        if not app_maintains_counter():
+            return
+        approved = {}
+        for values in rows:
+            if values['status'] == 'approved':
+                approved[values['course_id']] = approved.get(values['course_id'], 0) + 1
+        for course_id, n in sorted(approved.items()):
+            reserve_seats(db.session.connection(), course_id, n)
+
+
+def _is_row_conflict(exc):
+    # Нарушение ограничения или лимита курса относится к строкам; таймаут,
+    # обрыв соединения и прочие ошибки БД — нет, они поднимаются дальше
+    return isinstance(exc, IntegrityError) or is_course_full_error(exc)
+
+
+def _insert_batch(importer, batch, errors):
+    try:
+        with db.session.begin_nested():
+            return importer.insert([values for _, values in batch])
+    except (DBAPIError, CourseFullError) as exc:
+        if not _is_row_conflict(exc):
+            raise
+    # Пачка столкнулась с параллельной записью: вставляем по одной
+    # строке, чтобы отнести ошибку к конкретным строкам
+    ids = []
+    for i, values in batch:
+        try:
+            with db.session.begin_nested():
+                ids.extend(importer.insert([values]))
+        except (DBAPIError, CourseFullError) as exc:
+            if not _is_row_conflict(exc):
+                raise
+            errors[i] = 'Course is full' if is_course_full_error(exc) else importer.conflict_error
+            ids.append(None)
+    return ids
+
+
+def import_rows(importer, rows):
+    # Возвращает id в порядке входа (None для ошибочных строк) и ошибки по строкам
+    ids = [None] * len(rows)
+    errors = {}
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    for start in range(0, len(rows), batch_size):
+        batch = []
+        for i, row in enumerate(rows[start:start + batch_size], start):
+            try:
+                batch.append((i, importer.parse(row)))
+            except RowError as exc:
+                errors[i] = str(exc)
+        if batch:
+            errors.update(importer.check(batch))
+            batch = [(i, values) for i, values in batch if i not in errors]
+        if batch:
+            for (i, _), id in zip(batch, _insert_batch(importer, batch, errors)):
+                ids[i] = id
+            mark_changed(db.session, importer.table.name)
+        db.session.commit()
+    return ids, errors
+
+
+def import_response(importer):
+    ids, errors = import_rows(importer, read_rows())
+    body = {
+        'ids': ids,
+        'created': sum(id is not None for id in ids),
+        'errors': [{'row': i, 'error': errors[i]} for i in sorted(errors)],
+    }
+    return jsonify(body), 200 if errors else 201
@@ -0,0 +1,131 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Метрики запроса к API: число SQL-запросов, время в БД, авторизации и
+# сериализации. Уходят в заголовок Server-Timing и в строку лога
+# app.instrumentation; повторяющиеся запросы (N+1) и медленные запросы
+# логируются с уровнем WARNING.
+
+logger = logging.getLogger('app.instrumentation')
+
+
+class RequestStats:
+    __slots__ = ('started', 'queries', 'db_time', 'phases', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+        self.statements = Counter()
+
+    def add_phase(self, name, elapsed):
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+
+def current_stats():
+    if has_request_context():
+        return g.get('request_stats')
+
+
+@contextmanager
+def timed(phase):
+    stats = current_stats()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_phase(phase, time.perf_counter() - started)
+
+
+def timed_phase(phase):
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with timed(phase):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    starts = conn.info.get('query_started')
+    if stats is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats.queries += 1
+    stats.db_time += elapsed
+    stats.statements[statement] += 1
+    slow_ms = current_app.config['SLOW_QUERY_MS']
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        logger.warning('slow query %.1f ms on %s %s: %s', elapsed * 1000,
+                       request.method, request.path, _short(statement))
+
+
+def _short(statement, limit=300):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def _begin():
+    if current_app.config['INSTRUMENTATION_ENABLED']:
+        g.request_stats = RequestStats()
+
+
+def _finish(response):
+    stats = g.pop('request_stats', None)
+    if stats is None:
+        return response
+    total = time.perf_counter() - stats.started
+
+    timings = [
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+    ]
+    timings += [f'{name};dur={elapsed * 1000:.1f}' for name, elapsed in stats.phases.items()]
+    response.headers['Server-Timing'] = ', '.join(timings)
+
+    # Одинаковый текст запроса много раз за вызов — признак N+1
+    threshold = current_app.config['N_PLUS_ONE_THRESHOLD']
+    repeated = {s: n for s, n in stats.statements.items() if n >= threshold}
+    for statement, n in repeated.items():
+        logger.warning('possible N+1 on %s %s: %d x %s', request.method, request.path,
+                       n, _short(statement))
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(stats.db_time * 1000, 2),
+            'queries': stats.queries,
+            **{f'{name}_ms': round(elapsed * 1000, 2) for name, elapsed in stats.phases.items()},
+            'n_plus_one': len(repeated),
+        }))
+    return response
+
+
+def instrument_blueprint(bp):
+    bp.before_request(_begin)
+    bp.after_request(_finish)
@@ -0,0 +1,62 @@
+import threading
+
+from flask import Flask
+
+from .models import db
+
+# Отложенное подключение Swagger и Flask-Admin. Запросы к их префиксам
+# уходят во вспомогательное Flask-приложение, которое собирается при
+# первом обращении, — воркер не тратит на это время при старте.
+
+
+class LazyMount:
+    def __init__(self, wsgi_app, prefixes, factory):
+        self.wsgi_app = wsgi_app
+        self.prefixes = tuple(prefixes)
+        self.factory = factory
+        self._app = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._app is not None
+
+    def _get_app(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self.factory()
+        return self._app
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(self.prefixes):
+            return self._get_app()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def make_extras_app(parent, setups):
+    sub = Flask(parent.import_name)
+    sub.config.update(parent.config)
+    db.init_app(sub)
+    # Тот же движок и пул, что у основного приложения, вместо второго пула:
+    # db.engines — словарь движков текущего приложения; движок, созданный
+    # init_app, ещё не подключался и заменяется движками родителя
+    with parent.app_context():
+        engines = dict(db.engines)
+    with sub.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+        db.engines.update(engines)
+    # Общий кэш ответов: правки через админку сбрасывают кэш API
+    for name in ('response_cache', 'waitlist_worker'):
+        if name in parent.extensions:
+            sub.extensions[name] = parent.extensions[name]
+    for setup in setups:
+        setup(sub)
+    return sub
+
+
+def mount_lazily(app, prefixes, setups):
+    mount = LazyMount(app.wsgi_app, prefixes, lambda: make_extras_app(app, setups))
+    app.wsgi_app = mount
+    return mount
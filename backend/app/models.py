@@ -1,7 +1,21 @@
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
-db = SQLAlchemy()
+from .replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite по умолчанию не проверяет внешние ключи и не выполняет
+    # ON DELETE CASCADE, на которые опираются удаления
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
 
 class Teacher(db.Model):
     __tablename__ = 'teacher'
@@ -11,11 +25,13 @@ class Teacher(db.Model):
     specialty     = db.Column(db.String(255), nullable=False)
     department    = db.Column(db.String(255), nullable=False)
 
-    # связь «1 → N» на Course
+    # связь «1 → N» на Course; дочерние строки удаляет ON DELETE CASCADE
+    # в БД, без загрузки в сессию
     courses = db.relationship(
         'Course',
         backref='teacher',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         lazy=True
     )
 
@@ -26,12 +42,22 @@ class Course(db.Model):
     __tablename__ = 'course'
     id            = db.Column(db.Integer, primary_key=True)
     title         = db.Column(db.String(255), nullable=False)
-    teacher_id    = db.Column(db.Integer, db.ForeignKey('teacher.id'), nullable=False)
+    teacher_id    = db.Column(
+        db.Integer, db.ForeignKey('teacher.id', ondelete='CASCADE'), nullable=False, index=True
+    )
     student_limit = db.Column(db.Integer, nullable=False)
+    # число подтверждённых заявок; поддерживается триггером БД или app/seats.py
+    approved_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        server_default='0'
+    )
     requests = db.relationship(
         'Request',
         backref='course',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         lazy=True
     )
 
@@ -40,6 +66,14 @@ class Course(db.Model):
 
 class Student(db.Model):
     __tablename__ = 'student'
+    __table_args__ = (
+        db.Index('ix_student_created_at', 'created_at', 'id'),
+        # фильтр email_prefix (LIKE 'prefix%') при не-C collation
+        db.Index(
+            'ix_student_email_pattern', 'email',
+            postgresql_ops={'email': 'text_pattern_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
     id         = db.Column(db.Integer, primary_key=True)
     full_name  = db.Column(db.String(255), nullable=False)
     email      = db.Column(db.String(255), nullable=False, unique=True)
@@ -50,23 +84,68 @@ class Student(db.Model):
 
 class Request(db.Model):
     __tablename__ = 'request'
+    # Индексы под горячие фильтры routes.py; те же — в db/init.sql и миграции
+    __table_args__ = (
+        db.Index('ix_request_course_status_created', 'course_id', 'status', 'created_at'),
+        db.Index('ix_request_student_status', 'student_id', 'status'),
+        db.Index('ix_request_created_at', 'created_at', 'id'),
+        db.Index(
+            'ix_request_course_approved',
+            'course_id',
+            postgresql_where=db.text("status = 'approved'"),
+            sqlite_where=db.text("status = 'approved'")
+        ),
+        db.Index(
+            'uq_student_pending_request',
+            'student_id',
+            unique=True,
+            postgresql_where=db.text("status = 'pending'"),
+            sqlite_where=db.text("status = 'pending'")
+        ),
+    )
     id          = db.Column(db.Integer, primary_key=True)
-    course_id   = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
-    student_id  = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    # active_history: счётчику мест нужно старое значение при изменении
+    course_id   = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), nullable=False),
+        active_history=True
+    )
+    student_id  = db.Column(db.Integer, db.ForeignKey('student.id', ondelete='CASCADE'), nullable=False)
     description = db.Column(db.Text)
-    status      = db.Column(
-        db.String(50),
-        default='pending',
-        nullable=False,
-        server_default='pending'
+    status      = db.column_property(
+        db.Column(
+            db.String(50),
+            default='pending',
+            nullable=False,
+            server_default='pending'
+        ),
+        active_history=True
     )
     created_at  = db.Column(db.DateTime, default=datetime.utcnow)
 
     student = db.relationship(
         'Student',
-        backref=db.backref('requests', cascade='all, delete-orphan', lazy=True),
+        backref=db.backref('requests', cascade='all, delete-orphan',
+                           passive_deletes=True, lazy=True),
         lazy=True
     )
 
     def __str__(self):
-        return self.id
\ No newline at end of file
+        return self.id
+
+class TableVersion(db.Model):
+    # Версия таблицы для ETag и кэша ответов; растёт в транзакции записи
+    __tablename__ = 'table_version'
+    name    = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_key'
+    # ключ клиента с префиксом пользователя: '<user>:<Idempotency-Key>'
+    key          = db.Column(db.String(255), primary_key=True)
+    # sha256 метода, пути и тела: повтор с другим телом — ошибка клиента
+    fingerprint  = db.Column(db.String(64), nullable=False)
+    # NULL — первый запрос ещё выполняется
+    status_code  = db.Column(db.Integer)
+    body         = db.Column(db.Text)
+    content_type = db.Column(db.String(255))
+    created_at   = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
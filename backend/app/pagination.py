@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import Response, abort, current_app, jsonify, request, stream_with_context
+from sqlalchemy import DateTime, tuple_
+
+from .models import db
+
+
+# Курсор — непрозрачный токен с ключом последней отданной строки
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        abort(400)
+    if not isinstance(values, list) or not values:
+        abort(400)
+    return values
+
+
+def page_limit():
+    limit = request.args.get('limit', type=int)
+    if 'limit' in request.args and limit is None:
+        abort(400)
+    if limit is None:
+        return None
+    if limit < 1:
+        abort(400)
+    return min(limit, current_app.config['API_MAX_PAGE_SIZE'])
+
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def next_link(cursor):
+    args = [(k, v) for k, v in request.args.items(multi=True) if k != 'after']
+    args.append(('after', cursor))
+    return f'{request.base_url}?{urlencode(args)}'
+
+
+def stream_json_array(stmt, serializer):
+    # Серверный курсор: строки приходят пачками по API_STREAM_CHUNK_SIZE
+    chunk_size = current_app.config['API_STREAM_CHUNK_SIZE']
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '['
+        first = True
+        result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            chunk = ','.join(dumps(item) for item in serializer.rows(partition))
+            yield chunk if first else ',' + chunk
+            first = False
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def sort_spec(serializer, sort_fields, default_sort='id'):
+    # sort=created_at или sort=-created_at; допускаются только индексированные поля
+    sort = request.args.get('sort', default_sort)
+    descending = sort.startswith('-')
+    field = sort.lstrip('-')
+    if field not in sort_fields:
+        abort(400)
+    return serializer.table.c[field], descending
+
+
+def _cursor_value(column, value):
+    if isinstance(column.type, DateTime) and value is not None:
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            abort(400)
+    return value
+
+
+def keyset_query(serializer, stmt=None, sort_fields=('id',), default_sort='id'):
+    # Keyset-пагинация: limit/after, курсор следующей страницы в заголовках.
+    # При сортировке не по id ключ — пара (поле, id).
+    # Возвращает запрос с порядком, условием курсора и LIMIT, размер
+    # страницы и столбцы ключа; выполняет его вызывающий (синхронно или
+    # через асинхронную сессию app/asgi.py).
+    id_col = serializer.table.c.id
+    sort_col, descending = sort_spec(serializer, sort_fields, default_sort)
+    if stmt is None:
+        stmt = serializer.select()
+
+    key = [id_col] if sort_col is id_col else [sort_col, id_col]
+    stmt = stmt.order_by(*(c.desc() if descending else c for c in key))
+
+    after = request.args.get('after')
+    if after:
+        values = decode_cursor(after)
+        if len(values) != len(key) or not isinstance(values[-1], int):
+            abort(400)
+        values = [_cursor_value(c, v) for c, v in zip(key, values)]
+        bound = tuple_(*key) if len(key) > 1 else key[0]
+        value = tuple_(*values) if len(key) > 1 else values[0]
+        stmt = stmt.where(bound < value if descending else bound > value)
+
+    limit = page_limit()
+    if limit is not None:
+        # лишняя строка показывает, есть ли следующая страница
+        stmt = stmt.limit(limit if wants_stream() else limit + 1)
+    return stmt, limit, key
+
+
+def keyset_page(serializer, rows, limit, key):
+    if limit is None:
+        return jsonify(serializer.rows(rows))
+
+    items = serializer.rows(rows)
+    resp = jsonify(items[:limit])
+    if len(items) > limit:
+        last = items[limit - 1]
+        cursor = encode_cursor([last[c.name] for c in key])
+        resp.headers['X-Next-Cursor'] = cursor
+        resp.headers['Link'] = f'<{next_link(cursor)}>; rel="next"'
+    return resp
+
+
+def keyset_response(serializer, stmt=None, sort_fields=('id',), default_sort='id'):
+    stmt, limit, key = keyset_query(serializer, stmt, sort_fields, default_sort)
+    if wants_stream():
+        return stream_json_array(stmt, serializer)
+    return keyset_page(serializer, db.session.execute(stmt), limit, key)
@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# Пул соединений: параметры движка из конфигурации (DB_POOL_*) и метрики
+# выдачи соединений. Время ожидания соединения и таймауты пула видны в
+# /api/metrics/pool раньше, чем превращаются в задержку ответов.
+
+logger = logging.getLogger('app.pool')
+
+
+class PoolStats:
+    def __init__(self, slow_ms=100):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_checked_out = 0
+
+    def record(self, elapsed, checked_out):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if elapsed * 1000 >= self.slow_ms:
+                self.slow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'slow_checkouts': self.slow_checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3)
+                if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'peak_checked_out': self.peak_checked_out,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool, который замеряет время выдачи соединения
+    # (ожидание свободного соединения, pre-ping и подключение)
+    def __init__(self, *args, stats=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats or PoolStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            logger.warning('connection pool exhausted: %s', self.status())
+            raise
+        self.stats.record(time.perf_counter() - started, self.checkedout())
+        return conn
+
+    def recreate(self):
+        # engine.dispose() пересоздаёт пул — накопленные метрики сохраняем
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config, uri=None):
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    # SQLite в памяти работает на одном StaticPool — размеры пула к нему неприменимы
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+    timeout_ms = config['DB_STATEMENT_TIMEOUT_MS']
+    if timeout_ms and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+    return options
+
+
+def init_pool(app):
+    # Явно заданный SQLALCHEMY_ENGINE_OPTIONS имеет приоритет
+    options = engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def prepare_pool(app):
+    # Вызывается после db.init_app, когда движок уже создан
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        pool = db.engine.pool
+        if isinstance(pool, TimedQueuePool):
+            pool.stats.slow_ms = app.config['DB_POOL_SLOW_CHECKOUT_MS']
+        if app.config['DB_POOL_WARMUP']:
+            warm_pool(db.engine, app.config['DB_POOL_WARMUP'])
+
+
+def warm_pool(engine, count):
+    # Открыть count соединений при старте воркера, чтобы первые запросы
+    # не платили за подключение
+    conns = []
+    try:
+        for _ in range(count):
+            conns.append(engine.connect())
+    except exc.DBAPIError:
+        logger.warning('pool warm-up stopped after %d connection(s)', len(conns),
+                       exc_info=True)
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
+def pool_metrics(engine):
+    pool = engine.pool
+    data = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        data.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            utilization=round(pool.checkedout() / capacity, 3) if capacity else None,
+        )
+    if isinstance(pool, TimedQueuePool):
+        data.update(pool.stats.snapshot())
+    return data
@@ -0,0 +1,227 @@
+import itertools
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+from .auth import auth, roles
+
+# Ограничение записи: token bucket на пользователя (из auth.current_user())
+# с лимитами по маршруту и роли, и общий предел одновременных
+# обработчиков записи. Отказ — 429 с Retry-After до обращения к БД.
+# Корзины и занятые слоты записи хранятся в подключаемом хранилище: в памяти
+# процесса (предел — на один воркер) или в файле SQLite, общем для воркеров
+# gunicorn на одной машине (предел — на все воркеры сразу).
+
+_PERIODS = {'s': 1, 'second': 1, 'm': 60, 'minute': 60, 'h': 3600, 'hour': 3600}
+
+
+def parse_rate(spec):
+    # '10/second', '300/minute', '5/s' -> (ёмкость, токенов в секунду)
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\w+)\s*', spec)
+    if not match or match.group(2) not in _PERIODS:
+        raise ValueError(f'Invalid rate limit: {spec!r}')
+    count = int(match.group(1))
+    return count, count / _PERIODS[match.group(2)]
+
+
+def _refill(tokens, updated, now, capacity, rate, cost):
+    # Возвращает (новое число токенов, сколько ждать до cost токенов)
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class MemoryStorage:
+    def __init__(self):
+        self._buckets = {}
+        self._slots = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, wait = _refill(tokens, updated, now, capacity, rate, cost)
+            self._buckets[key] = (tokens, now)
+        return wait
+
+    def acquire(self, limit, lease):
+        # Слот записи или None, если заняты все limit; lease не нужен —
+        # слоты умирают вместе с процессом
+        with self._lock:
+            if len(self._slots) >= limit:
+                return None
+            slot = next(self._ids)
+            self._slots.add(slot)
+        return slot
+
+    def release(self, slot):
+        with self._lock:
+            self._slots.discard(slot)
+
+
+class SQLiteStorage:
+    # Корзины и слоты записи в файле SQLite; BEGIN IMMEDIATE сериализует
+    # изменения между процессами. Время — time.time(), общее для всех
+    # воркеров. Слот, не освобождённый за lease секунд (воркер убит),
+    # считается свободным. Соединение открывается при первом обращении в
+    # каждом потоке и процессе: хранилище создаётся до fork воркеров
+    # (gunicorn --preload), а соединение sqlite3 через fork не переносится.
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        pid, conn = getattr(self._local, 'conn', (None, None))
+        if pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_bucket '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS write_slot '
+                         '(slot TEXT PRIMARY KEY, acquired REAL NOT NULL)')
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    def _transaction(self, work):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def take(self, key, capacity, rate, cost=1):
+        def work(conn):
+            # время — после BEGIN IMMEDIATE, без ожидания блокировки
+            now = time.time()
+            row = conn.execute('SELECT tokens, updated FROM rate_bucket WHERE key = ?',
+                               (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, wait = _refill(tokens, updated, now, capacity, rate, cost)
+            conn.execute('INSERT OR REPLACE INTO rate_bucket (key, tokens, updated) '
+                         'VALUES (?, ?, ?)', (key, tokens, now))
+            return wait
+        return self._transaction(work)
+
+    def acquire(self, limit, lease):
+        def work(conn):
+            now = time.time()
+            conn.execute('DELETE FROM write_slot WHERE acquired < ?', (now - lease,))
+            (busy,) = conn.execute('SELECT count(*) FROM write_slot').fetchone()
+            if busy >= limit:
+                return None
+            slot = uuid.uuid4().hex
+            conn.execute('INSERT INTO write_slot (slot, acquired) VALUES (?, ?)', (slot, now))
+            return slot
+        return self._transaction(work)
+
+    def release(self, slot):
+        self._connect().execute('DELETE FROM write_slot WHERE slot = ?', (slot,))
+
+
+def storage_from_url(url):
+    # 'memory' или 'sqlite:////path/to/ratelimit.db'
+    if url == 'memory':
+        return MemoryStorage()
+    if url.startswith('sqlite:///'):
+        path = url[len('sqlite:///'):]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteStorage(path)
+    raise ValueError(f'Unknown rate limit storage: {url!r}')
+
+
+class RateLimiter:
+    def __init__(self, storage, limits, max_writes=0, write_lease=60):
+        self.storage = storage
+        # {endpoint или 'default': {роль: (ёмкость, скорость)}}
+        self.limits = {
+            endpoint: {role: parse_rate(spec) for role, spec in by_role.items()}
+            for endpoint, by_role in limits.items()
+        }
+        self.max_writes = max_writes
+        self.write_lease = write_lease
+        self.rejected = 0
+
+    def limit_for(self, endpoint, role):
+        if role in self.limits.get(endpoint, {}):
+            return endpoint, self.limits[endpoint][role]
+        if role in self.limits.get('default', {}):
+            return 'default', self.limits['default'][role]
+        return None, None
+
+    def check(self, user, endpoint):
+        # Секунды до следующей попытки или 0
+        role = roles.get(user, 'user')
+        scope, limit = self.limit_for(endpoint, role)
+        if limit is None:
+            return 0
+        capacity, rate = limit
+        return self.storage.take(f'{user}:{scope}', capacity, rate)
+
+    def acquire_write(self):
+        # Слот записи, True без предела или None, если все слоты заняты
+        if not self.max_writes:
+            return True
+        return self.storage.acquire(self.max_writes, self.write_lease)
+
+    def release_write(self, slot):
+        if self.max_writes:
+            self.storage.release(slot)
+
+
+def init_ratelimit(app):
+    if not app.config['RATELIMIT_ENABLED']:
+        app.extensions['ratelimit'] = None
+        return
+    storage = app.config['RATELIMIT_STORAGE']
+    if isinstance(storage, str):
+        storage = storage_from_url(storage)
+    app.extensions['ratelimit'] = RateLimiter(
+        storage, app.config['RATE_LIMITS'], app.config['WRITE_CONCURRENCY_LIMIT'],
+        app.config['WRITE_SLOT_LEASE']
+    )
+
+
+def _too_many(retry_after):
+    resp = jsonify({'error': 'Too many requests'})
+    resp.status_code = 429
+    resp.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return resp
+
+
+def throttled(f):
+    # Ставится под @auth.login_required: пользователь уже известен,
+    # к БД ещё не обращались
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        limiter = current_app.extensions.get('ratelimit')
+        if limiter is None:
+            return f(*args, **kwargs)
+        # сначала слот: отказ по слоту не должен списывать токен из корзины
+        slot = limiter.acquire_write()
+        if slot is None:
+            limiter.rejected += 1
+            return _too_many(current_app.config['WRITE_RETRY_AFTER'])
+        wait = limiter.check(auth.current_user(), request.endpoint)
+        if wait:
+            limiter.release_write(slot)
+            limiter.rejected += 1
+            return _too_many(wait)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            limiter.release_write(slot)
+    return wrapper
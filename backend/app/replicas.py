@@ -0,0 +1,139 @@
+import itertools
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.sql import Select
+
+from .pool import engine_options
+
+# Чтение с реплик: SELECT из GET-обработчиков api уходят на реплику
+# (по кругу, одна реплика на весь запрос), всё остальное — на основную БД.
+# Реплику выбирают, только взяв с неё соединение из пула: если подключиться
+# не удалось, она выводится из ротации на REPLICA_RETRY_SECONDS (после чего
+# проверяется SELECT 1), а запрос в том же обработчике идёт на следующую
+# реплику или на основную БД. Удачное подключение засчитывается на
+# REPLICA_CHECK_SECONDS: в это время реплику берут без проверки, а обрыв
+# на настоящем запросе выводит её из ротации через handle_error.
+
+logger = logging.getLogger('app.replicas')
+
+
+class ReplicaSet:
+    def __init__(self, engines, retry_seconds=30, check_seconds=5):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self.check_seconds = check_seconds
+        self._counter = itertools.count()
+        self._down = {}
+        # engine -> до какого момента реплика считается проверенной
+        self._checked = {}
+        self._lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._on_error)
+
+    def pick(self):
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._counter) % len(self.engines)]
+            if self._available(engine) and self._connects(engine):
+                return engine
+
+    def _available(self, engine):
+        with self._lock:
+            retry_at = self._down.get(engine)
+        if retry_at is None:
+            return True
+        if time.monotonic() < retry_at:
+            return False
+        return self.check(engine)
+
+    def _connects(self, engine):
+        with self._lock:
+            if time.monotonic() < self._checked.get(engine, 0):
+                return True
+        # Соединение сразу возвращается в пул, и сессия получит его же
+        try:
+            engine.connect().close()
+        except exc.DBAPIError:
+            self.mark_down(engine)
+            return False
+        self._mark_checked(engine)
+        return True
+
+    def _mark_checked(self, engine):
+        with self._lock:
+            self._checked[engine] = time.monotonic() + self.check_seconds
+
+    def check(self, engine):
+        try:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except exc.DBAPIError:
+            self.mark_down(engine)
+            return False
+        self._mark_checked(engine)
+        with self._lock:
+            if self._down.pop(engine, None) is not None:
+                logger.info('replica %s is back', engine.url.render_as_string())
+        return True
+
+    def mark_down(self, engine):
+        now = time.monotonic()
+        with self._lock:
+            was_up = self._down.get(engine, 0) <= now
+            self._down[engine] = now + self.retry_seconds
+            self._checked.pop(engine, None)
+        if was_up:
+            logger.warning('replica %s is down for %ss', engine.url.render_as_string(),
+                           self.retry_seconds)
+
+    def _on_error(self, ctx):
+        # Нет соединения или оно оборвалось — реплику выводим из ротации
+        if ctx.is_disconnect or ctx.connection is None:
+            self.mark_down(ctx.engine)
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            down = dict(self._down)
+        return [{'url': e.url.render_as_string(), 'healthy': down.get(e, 0) <= now}
+                for e in self.engines]
+
+
+def init_replicas(app):
+    uris = app.config['SQLALCHEMY_REPLICA_URIS']
+    app.extensions['replicas'] = ReplicaSet(
+        [create_engine(uri, **engine_options(app.config, uri)) for uri in uris],
+        retry_seconds=app.config['REPLICA_RETRY_SECONDS'],
+        check_seconds=app.config['REPLICA_CHECK_SECONDS'],
+    ) if uris else None
+
+
+def _replica_engine():
+    if 'db_replica' not in g:
+        replicas = current_app.extensions.get('replicas')
+        g.db_replica = replicas.pick() if replicas else None
+    return g.db_replica
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and isinstance(clause, Select)
+                and clause._for_update_arg is None
+                and has_request_context() and g.get('db_read_only')):
+            engine = _replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _mark_read_only():
+    g.db_read_only = request.method in ('GET', 'HEAD')
+    g.pop('db_replica', None)
+
+
+def route_reads(bp):
+    bp.before_request(_mark_read_only)
@@ -1,41 +1,134 @@
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, request, jsonify, abort, current_app
+from sqlalchemy.exc import IntegrityError
 from .models import db, Teacher, Course, Student, Request
-from .auth import auth
+from .auth import auth, issue_token
+from .pagination import keyset_response
+from .filters import filter_requests, filter_students, filter_teachers
+from .serializers import (
+    teacher_serializer, course_serializer, student_serializer, request_serializer,
+    course_stats_serializer, enrollment_serializer,
+    student_overview_serializer, teacher_overview_serializer
+)
+from .seats import is_course_full_error
+from .cache import cached_response, get_cache
+from .waitlist import pending_in_course, queue_position, seat_freed
+from .instrumentation import instrument_blueprint
+from .pool import pool_metrics
+from .replicas import route_reads
+from .export import export_response
+from .search import search_response
+from .ratelimit import throttled
+from .idempotency import idempotent
+from .imports import CourseImporter, RequestImporter, StudentImporter, import_response
+from .bulk import (
+    ids_arg, delete_teachers, delete_courses, delete_students, delete_requests,
+    transition_requests, REQUEST_STATUSES
+)
 
 api = Blueprint('api', __name__, url_prefix='/api')
+instrument_blueprint(api)
+route_reads(api)
 
 def abort_if_not_found(item):
     if not item:
         abort(404)
 
+def commit_seat_change():
+    # Проигравший гонку за последнее место получает 409, а не 500
+    try:
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        if is_course_full_error(exc):
+            return jsonify({'error': 'Course is full'}), 409
+        raise
+
+def bulk_delete_response(result):
+    counts, freed = result
+    db.session.commit()
+    for course_id in freed:
+        seat_freed(course_id)
+    return jsonify({'deleted': counts})
+
+def delete_one(delete, id, table):
+    counts, freed = delete([id])
+    if not counts[table]:
+        abort(404)
+    db.session.commit()
+    for course_id in freed:
+        seat_freed(course_id)
+    return jsonify({'result': True})
+
+# AUTH
+
+@api.route('/auth/token', methods=['POST'])
+@auth.login_required
+def create_token():
+    user = auth.current_user()
+    return jsonify({
+        'token': issue_token(user),
+        'token_type': 'Bearer',
+        'expires_in': current_app.config['AUTH_TOKEN_TTL']
+    })
+
+# METRICS
+
+@api.route('/metrics/cache', methods=['GET'])
+@auth.login_required(role='admin')
+def cache_metrics():
+    return jsonify(get_cache().stats())
+
+@api.route('/metrics/pool', methods=['GET'])
+@auth.login_required(role='admin')
+def pool_metrics_view():
+    data = pool_metrics(db.engine)
+    replicas = current_app.extensions.get('replicas')
+    if replicas:
+        data['replicas'] = [dict(r, **pool_metrics(e))
+                            for r, e in zip(replicas.status(), replicas.engines)]
+    return jsonify(data)
+
+# EXPORT
+
+@api.route('/export/requests', methods=['GET'])
+@auth.login_required(role='admin')
+def export_requests():
+    # Заявки со студентом, курсом и преподавателем; фильтры — как у GET /requests
+    stmt = filter_requests(enrollment_serializer.select())
+    return export_response(stmt.order_by(Request.id), enrollment_serializer, 'requests')
+
+# SEARCH
+
+@api.route('/search', methods=['GET'])
+@auth.login_required(role=['user','admin'])
+@cached_response('student', 'teacher', 'course')
+def search():
+    return search_response()
+
 # TEACHERS CRUD
 
 @api.route('/teachers', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('teacher')
 def get_teachers():
-    all_ = Teacher.query.all()
-    return jsonify([{
-        'id': t.id,
-        'full_name': t.full_name,
-        'experience': t.experience,
-        'specialty':  t.specialty,
-        'department': t.department
-    } for t in all_])
+    stmt = filter_teachers(teacher_serializer.select())
+    return keyset_response(teacher_serializer, stmt)
 
 @api.route('/teachers/<int:id>', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('teacher')
 def get_teacher(id):
-    t = Teacher.query.get(id); abort_if_not_found(t)
-    return jsonify({
-        'id': t.id,
-        'full_name': t.full_name,
-        'experience': t.experience,
-        'specialty':  t.specialty,
-        'department': t.department
-    })
+    return jsonify(teacher_serializer.get_or_404(id))
+
+@api.route('/teachers/<int:id>/overview', methods=['GET'])
+@auth.login_required(role=['user','admin'])
+@cached_response('teacher', 'course', 'request')
+def get_teacher_overview(id):
+    return jsonify(teacher_overview_serializer.get_or_404(id))
 
 @api.route('/teachers', methods=['POST'])
 @auth.login_required(role='admin')
+@throttled
 def create_teacher():
     data = request.get_json() or {}
     for f in ('full_name','experience','specialty','department'):
@@ -46,6 +139,7 @@ def create_teacher():
 
 @api.route('/teachers/<int:id>', methods=['PUT','PATCH'])
 @auth.login_required(role='admin')
+@throttled
 def update_teacher(id):
     t = Teacher.query.get(id); abort_if_not_found(t)
     data = request.get_json() or {}
@@ -56,90 +150,124 @@ def update_teacher(id):
 
 @api.route('/teachers/<int:id>', methods=['DELETE'])
 @auth.login_required(role='admin')
+@throttled
 def delete_teacher(id):
-    t = Teacher.query.get(id); abort_if_not_found(t)
-    db.session.delete(t); db.session.commit()
-    return jsonify({'result': True})
+    return delete_one(delete_teachers, id, 'teacher')
+
+@api.route('/teachers/bulk-delete', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def bulk_delete_teachers():
+    return bulk_delete_response(delete_teachers(ids_arg(request.get_json() or {})))
 
 
 # COURSES CRUD
 
 @api.route('/courses', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('course')
 def get_courses():
-    all_ = Course.query.all()
-    return jsonify([{
-        'id': c.id,
-        'title': c.title,
-        'teacher_id': c.teacher_id,
-        'student_limit': c.student_limit
-    } for c in all_])
+    return keyset_response(course_serializer)
+
+@api.route('/courses/stats', methods=['GET'])
+@auth.login_required(role=['user','admin'])
+@cached_response('course', 'request', 'teacher')
+def get_course_stats():
+    stmt = course_stats_serializer.select()
+    teacher_id = request.args.get('teacher_id', type=int)
+    if teacher_id is not None:
+        stmt = stmt.where(Course.teacher_id == teacher_id)
+    department = request.args.get('department')
+    if department:
+        stmt = stmt.where(Course.teacher_id.in_(
+            db.select(Teacher.id).where(Teacher.department == department)
+        ))
+    return keyset_response(course_stats_serializer, stmt)
 
 @api.route('/courses/<int:id>', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('course')
 def get_course(id):
-    c = Course.query.get(id); abort_if_not_found(c)
-    return jsonify({
-        'id': c.id,
-        'title': c.title,
-        'teacher_id': c.teacher_id,
-        'student_limit': c.student_limit
-    })
+    return jsonify(course_serializer.get_or_404(id))
+
+@api.route('/courses/<int:id>/waitlist', methods=['GET'])
+@auth.login_required(role=['user','admin'])
+@cached_response('request')
+def get_course_waitlist(id):
+    # Очередь pending-заявок курса в порядке подачи
+    stmt = request_serializer.select().where(pending_in_course(id))
+    return keyset_response(request_serializer, stmt,
+                           sort_fields=('created_at',), default_sort='created_at')
 
 @api.route('/courses', methods=['POST'])
 @auth.login_required(role='admin')
+@throttled
 def create_course():
     data = request.get_json() or {}
     for f in ('title','teacher_id','student_limit'):
         if f not in data: abort(400)
-    c = Course(**{k: data[k] for k in data})
+    # approved_count задаётся только счётчиком, не клиентом
+    c = Course(**{k: data[k] for k in ('title','teacher_id','student_limit')})
     db.session.add(c); db.session.commit()
     return jsonify({'id': c.id}), 201
 
 @api.route('/courses/<int:id>', methods=['PUT','PATCH'])
 @auth.login_required(role='admin')
+@throttled
 def update_course(id):
     c = Course.query.get(id); abort_if_not_found(c)
     data = request.get_json() or {}
+    old_limit = c.student_limit
     for f in ('title','teacher_id','student_limit'):
         if f in data: setattr(c, f, data[f])
     db.session.commit()
+    if c.student_limit > old_limit:
+        seat_freed(c.id)
     return jsonify({'id': c.id})
 
 @api.route('/courses/<int:id>', methods=['DELETE'])
 @auth.login_required(role='admin')
+@throttled
 def delete_course(id):
-    c = Course.query.get(id); abort_if_not_found(c)
-    db.session.delete(c); db.session.commit()
-    return jsonify({'result': True})
+    return delete_one(delete_courses, id, 'course')
+
+@api.route('/courses/bulk', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def import_courses():
+    return import_response(CourseImporter())
+
+@api.route('/courses/bulk-delete', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def bulk_delete_courses():
+    return bulk_delete_response(delete_courses(ids_arg(request.get_json() or {})))
 
 
 # STUDENTS CRUD
 
 @api.route('/students', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('student')
 def get_students():
-    all_ = Student.query.all()
-    return jsonify([{
-        'id': s.id,
-        'full_name': s.full_name,
-        'email': s.email,
-        'created_at': s.created_at.isoformat()
-    } for s in all_])
+    stmt = filter_students(student_serializer.select())
+    return keyset_response(student_serializer, stmt, sort_fields=('id', 'created_at'))
 
 @api.route('/students/<int:id>', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('student')
 def get_student(id):
-    s = Student.query.get(id); abort_if_not_found(s)
-    return jsonify({
-        'id': s.id,
-        'full_name': s.full_name,
-        'email': s.email,
-        'created_at': s.created_at.isoformat()
-    })
+    return jsonify(student_serializer.get_or_404(id))
+
+@api.route('/students/<int:id>/overview', methods=['GET'])
+@auth.login_required(role=['user','admin'])
+@cached_response('student', 'request', 'course', 'teacher')
+def get_student_overview(id):
+    return jsonify(student_overview_serializer.get_or_404(id))
 
 @api.route('/students', methods=['POST'])
 @auth.login_required(role='admin')
+@throttled
 def create_student():
     data = request.get_json() or {}
     for f in ('full_name','email'):
@@ -150,6 +278,7 @@ def create_student():
 
 @api.route('/students/<int:id>', methods=['PUT','PATCH'])
 @auth.login_required(role='admin')
+@throttled
 def update_student(id):
     s = Student.query.get(id); abort_if_not_found(s)
     data = request.get_json() or {}
@@ -160,42 +289,59 @@ def update_student(id):
 
 @api.route('/students/<int:id>', methods=['DELETE'])
 @auth.login_required(role='admin')
+@throttled
 def delete_student(id):
-    s = Student.query.get(id); abort_if_not_found(s)
-    db.session.delete(s); db.session.commit()
-    return jsonify({'result': True})
+    return delete_one(delete_students, id, 'student')
+
+@api.route('/students/bulk', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def import_students():
+    return import_response(StudentImporter())
+
+@api.route('/students/bulk-delete', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def bulk_delete_students():
+    return bulk_delete_response(delete_students(ids_arg(request.get_json() or {})))
 
 
 # REQUESTS CRUD
 
 @api.route('/requests', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('request')
 def get_requests():
-    all_ = Request.query.all()
-    return jsonify([{
-        'id': r.id,
-        'student_id': r.student_id,
-        'course_id':  r.course_id,
-        'description': r.description,
-        'status': r.status,
-        'created_at': r.created_at.isoformat()
-    } for r in all_])
+    stmt = filter_requests(request_serializer.select())
+    return keyset_response(request_serializer, stmt, sort_fields=('id', 'created_at'))
 
 @api.route('/requests/<int:id>', methods=['GET'])
 @auth.login_required(role=['user','admin'])
+@cached_response('request')
 def get_request(id):
+    return jsonify(request_serializer.get_or_404(id))
+
+@api.route('/requests/<int:id>/position', methods=['GET'])
+@auth.login_required(role=['user','admin'])
+@cached_response('request', 'course')
+def get_request_position(id):
     r = Request.query.get(id); abort_if_not_found(r)
+    if r.status != 'pending':
+        return jsonify({'error': 'Request is not in the waitlist'}), 409
+    course = db.session.get(Course, r.course_id)
+    position = queue_position(r)
     return jsonify({
         'id': r.id,
-        'student_id': r.student_id,
-        'course_id':  r.course_id,
-        'description': r.description,
-        'status': r.status,
-        'created_at': r.created_at.isoformat()
+        'course_id': r.course_id,
+        'position': position,
+        'ahead': position - 1,
+        'free_seats': max(course.student_limit - course.approved_count, 0)
     })
 
 @api.route('/requests', methods=['POST'])
 @auth.login_required(role='admin')
+@throttled
+@idempotent
 def create_request():
     data = request.get_json() or {}
     for f in ('student_id', 'course_id'):
@@ -204,13 +350,8 @@ def create_request():
     course = Course.query.get(data['course_id'])
     abort_if_not_found(course)
 
-    # Считаем ТОЛЬКО подтверждённые заявки
-    existing_count = Request.query.filter_by(
-        course_id=course.id,
-        status='approved'
-    ).count()
-    
-    if existing_count >= course.student_limit:
+    # Счётчик подтверждённых заявок хранится в course.approved_count
+    if course.approved_count >= course.student_limit:
         return jsonify({'error': 'Course is full'}), 400
 
     # Проверяем существующую pending заявку
@@ -227,11 +368,15 @@ def create_request():
         status=data.get('status', 'pending')
     )
     db.session.add(r)
-    db.session.commit()
+    conflict = commit_seat_change()
+    if conflict:
+        return conflict
     return jsonify({'id': r.id}), 201
 
 @api.route('/requests/<int:id>', methods=['PUT','PATCH'])
 @auth.login_required(role='admin')
+@throttled
+@idempotent
 def update_request(id):
     r = Request.query.get(id)
     abort_if_not_found(r)
@@ -246,11 +391,9 @@ def update_request(id):
         if not new_course:
             abort(404)
         
-        approved_count = Request.query.filter(
-            Request.course_id == new_course_id,
-            Request.status == 'approved',
-            Request.id != r.id
-        ).count()
+        approved_count = new_course.approved_count
+        if r.status == 'approved' and r.course_id == new_course.id:
+            approved_count -= 1
 
         if new_status == 'approved':
             approved_count += 1
@@ -258,6 +401,12 @@ def update_request(id):
         if approved_count > new_course.student_limit:
             return jsonify({'error': 'Course is full'}), 400
 
+    # Место освобождается, если одобренная заявка перестала быть
+    # одобренной или ушла на другой курс
+    freed_course_id = None
+    if r.status == 'approved' and (new_status != 'approved' or new_course_id != r.course_id):
+        freed_course_id = r.course_id
+
     # Apply changes
     if 'status' in data:
         r.status = data['status']
@@ -265,13 +414,83 @@ def update_request(id):
         r.course_id = data['course_id']
     if 'description' in data:
         r.description = data['description']
-    
-    db.session.commit()
+
+    conflict = commit_seat_change()
+    if conflict:
+        return conflict
+    if freed_course_id is not None:
+        # разжалованная в pending заявка не занимает своё же место снова
+        seat_freed(freed_course_id, exclude=[r.id] if r.status == 'pending' else ())
     return jsonify({'id': r.id})
 
 @api.route('/requests/<int:id>', methods=['DELETE'])
 @auth.login_required(role='admin')
+@throttled
 def delete_request(id):
     r = Request.query.get(id); abort_if_not_found(r)
+    freed_course_id = r.course_id if r.status == 'approved' else None
     db.session.delete(r); db.session.commit()
+    if freed_course_id is not None:
+        seat_freed(freed_course_id)
     return jsonify({'result': True})
+
+@api.route('/requests/bulk', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def import_requests():
+    return import_response(RequestImporter())
+
+@api.route('/requests/bulk-delete', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def bulk_delete_requests():
+    # Отбор — те же параметры, что у GET /requests, и/или ids в теле
+    criteria = []
+    data = request.get_json(silent=True) or {}
+    if 'ids' in data:
+        criteria.append(Request.id.in_(ids_arg(data)))
+    where = filter_requests(db.select(Request.id)).whereclause
+    if where is not None:
+        criteria.append(where)
+    if not criteria:
+        return jsonify({'error': 'Specify ids or filters'}), 400
+    return bulk_delete_response(delete_requests(*criteria))
+
+@api.route('/requests/bulk-transition', methods=['POST'])
+@auth.login_required(role='admin')
+@throttled
+def bulk_transition_requests():
+    # Отбор — как у bulk-delete; status в теле — целевой статус
+    data = request.get_json(silent=True) or {}
+    status = data.get('status')
+    if status not in REQUEST_STATUSES:
+        return jsonify({'error': f'status must be one of: {", ".join(REQUEST_STATUSES)}'}), 400
+    ids = ids_arg(data) if 'ids' in data else None
+    where = filter_requests(db.select(Request.id)).whereclause
+    if ids is None and where is None:
+        return jsonify({'error': 'Specify ids or filters'}), 400
+    criteria = () if where is None else (where,)
+
+    try:
+        outcomes, freed = transition_requests(status, *criteria, ids=ids)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        if is_course_full_error(exc):
+            return jsonify({'error': 'Course is full'}), 409
+        # pending-заявку студенту добавили параллельно, после проверки
+        if isinstance(exc, IntegrityError):
+            return jsonify({'error': 'Student already has a pending request'}), 409
+        raise
+    demoted = [id for id, outcome in outcomes.items()
+               if outcome == 'applied'] if status == 'pending' else ()
+    for course_id in freed:
+        seat_freed(course_id, exclude=demoted)
+
+    counts = {}
+    for outcome in outcomes.values():
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return jsonify({
+        'results': [{'id': id, 'outcome': outcomes[id]} for id in sorted(outcomes)],
+        'counts': counts
+    })
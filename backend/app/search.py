@@ -0,0 +1,191 @@
+import click
+from flask import abort, current_app, jsonify, request
+from flask.cli import AppGroup
+from sqlalchemy import DDL, column, event, func, literal, literal_column, select, table, union_all
+
+from .models import db, Teacher, Course, Student
+from .pagination import decode_cursor, encode_cursor, next_link, page_limit
+
+# Поиск по студентам, преподавателям и курсам.
+# PostgreSQL: GIN-индексы pg_trgm по текстовым столбцам, ILIKE '%слово%'
+# идёт по индексу, ранжирование — word_similarity.
+# SQLite: таблица FTS5 search_index с триграммным токенизатором, которую
+# заполняют триггеры. rowid = id * 3 + код типа, поэтому триггеры
+# обновляют и удаляют строку индекса по rowid, без просмотра таблицы.
+# На обоих бэкендах запрос делится на слова одинаково, и каждое слово
+# обязательно: строка подходит, если все слова есть в каком-либо столбце.
+
+SEARCH_TYPES = ('student', 'teacher', 'course')
+
+# тип -> (модель, столбец-заголовок, столбцы-описание)
+SEARCH_SOURCES = {
+    'student': (Student, 'full_name', ('email',)),
+    'teacher': (Teacher, 'full_name', ('specialty', 'department')),
+    'course': (Course, 'title', ()),
+}
+
+
+def _sqlite_detail(kind, row):
+    _, _, detail = SEARCH_SOURCES[kind]
+    if not detail:
+        return 'NULL'
+    return " || ', ' || ".join(f'{row}.{name}' for name in detail)
+
+
+def sqlite_search_ddl():
+    statements = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+        "USING fts5(label, detail, tokenize='trigram')"
+    ]
+    for code, kind in enumerate(SEARCH_TYPES):
+        model, label, detail = SEARCH_SOURCES[kind]
+        name = model.__tablename__
+        values = f"new.id * 3 + {code}, new.{label}, {_sqlite_detail(kind, 'new')}"
+        # UPDATE OF: счётчик course.approved_count меняется часто, индекс — нет
+        indexed = ', '.join((label, *detail))
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {name}_search_ai AFTER INSERT ON {name} BEGIN "
+            f"INSERT INTO search_index (rowid, label, detail) VALUES ({values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_search_au AFTER UPDATE OF {indexed} ON {name} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.id * 3 + {code}; "
+            f"INSERT INTO search_index (rowid, label, detail) VALUES ({values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_search_ad AFTER DELETE ON {name} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.id * 3 + {code}; END",
+        ]
+    return statements
+
+
+def postgresql_search_ddl():
+    statements = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+    for model, label, detail in SEARCH_SOURCES.values():
+        name = model.__tablename__
+        for col in (label, *detail):
+            statements.append(
+                f'CREATE INDEX IF NOT EXISTS ix_{name}_{col}_trgm '
+                f'ON {name} USING gin ({col} gin_trgm_ops)'
+            )
+    return statements
+
+
+# Индекс создаётся вместе со схемой (db.create_all); для существующей
+# БД — миграция или flask search rebuild
+for _statement in sqlite_search_ddl():
+    event.listen(db.metadata, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in postgresql_search_ddl():
+    event.listen(db.metadata, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+event.listen(db.metadata, 'before_drop',
+             DDL('DROP TABLE IF EXISTS search_index').execute_if(dialect='sqlite'))
+
+
+def rebuild_search_index():
+    if db.engine.dialect.name != 'sqlite':
+        return 0
+    for statement in sqlite_search_ddl():
+        db.session.execute(db.text(statement))
+    db.session.execute(db.text('DELETE FROM search_index'))
+    total = 0
+    for code, kind in enumerate(SEARCH_TYPES):
+        model, label, _ = SEARCH_SOURCES[kind]
+        name = model.__tablename__
+        total += db.session.execute(db.text(
+            f'INSERT INTO search_index (rowid, label, detail) '
+            f"SELECT id * 3 + {code}, {label}, {_sqlite_detail(kind, name)} FROM {name}"
+        )).rowcount
+    db.session.commit()
+    return total
+
+
+search_index = table('search_index', column('rowid'), column('label'), column('detail'))
+
+
+def _sqlite_search(terms, kinds):
+    # Каждое слово — отдельная фраза в кавычках: совпадение подстрок,
+    # все слова обязательны
+    match = ' '.join('"' + t.replace('"', '""') + '"' for t in terms)
+    rank = func.bm25(literal_column('search_index'), 2.0, 1.0)
+    stmt = (
+        select(search_index.c.rowid, search_index.c.label, search_index.c.detail,
+               (-rank).label('score'))
+        .where(literal_column('search_index').op('MATCH')(match))
+        .order_by(rank, search_index.c.rowid)
+    )
+    if len(kinds) < len(SEARCH_TYPES):
+        stmt = stmt.where((search_index.c.rowid % 3).in_([SEARCH_TYPES.index(k) for k in kinds]))
+
+    def to_item(row):
+        kind = SEARCH_TYPES[row.rowid % 3]
+        return kind, row.rowid // 3, row.label, row.detail, row.score
+    return stmt, to_item
+
+
+def _like_pattern(term):
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _postgresql_search(terms, kinds):
+    q = ' '.join(terms)
+    patterns = [_like_pattern(t) for t in terms]
+    parts = []
+    for kind in kinds:
+        model, label, detail = SEARCH_SOURCES[kind]
+        cols = [getattr(model, name) for name in (label, *detail)]
+        detail_expr = (func.concat_ws(', ', *cols[1:]) if detail else literal(None))
+        score = (func.greatest(*(func.word_similarity(q, c) for c in cols))
+                 if len(cols) > 1 else func.word_similarity(q, cols[0]))
+        parts.append(
+            select(literal(kind).label('type'), model.id.label('id'),
+                   cols[0].label('label'), detail_expr.label('detail'), score.label('score'))
+            .where(*(db.or_(*(c.ilike(pattern, escape='\\') for c in cols))
+                     for pattern in patterns))
+        )
+    union = union_all(*parts).subquery()
+    stmt = select(union).order_by(union.c.score.desc(), union.c.type, union.c.id)
+    return stmt, lambda row: (row.type, row.id, row.label, row.detail, row.score)
+
+
+def search_response():
+    q = request.args.get('q', '').strip()
+    min_length = current_app.config['SEARCH_MIN_LENGTH']
+    # триграммный поиск не находит подстрок короче трёх символов
+    terms = [t for t in q.split() if len(t) >= min_length]
+    if not terms:
+        return jsonify({'error': f'Query must contain a word of at least {min_length} characters'}), 400
+
+    kind = request.args.get('type')
+    if kind and kind not in SEARCH_TYPES:
+        abort(400)
+    kinds = (kind,) if kind else SEARCH_TYPES
+
+    if db.engine.dialect.name == 'postgresql':
+        stmt, to_item = _postgresql_search(terms, kinds)
+    else:
+        stmt, to_item = _sqlite_search(terms, kinds)
+
+    limit = page_limit() or current_app.config['SEARCH_PAGE_SIZE']
+    offset = 0
+    after = request.args.get('after')
+    if after:
+        offset = decode_cursor(after)[0]
+        if not isinstance(offset, int) or offset < 0:
+            abort(400)
+
+    rows = db.session.execute(stmt.limit(limit + 1).offset(offset)).all()
+    items = []
+    for row in rows[:limit]:
+        kind, id, label, detail, score = to_item(row)
+        items.append({'type': kind, 'id': id, 'label': label, 'detail': detail,
+                      'score': round(float(score), 4)})
+    resp = jsonify(items)
+    if len(rows) > limit:
+        cursor = encode_cursor([offset + limit])
+        resp.headers['X-Next-Cursor'] = cursor
+        resp.headers['Link'] = f'<{next_link(cursor)}>; rel="next"'
+    return resp
+
+
+search_cli = AppGroup('search', help='Поисковый индекс.')
+
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    click.echo(f'Indexed {rebuild_search_index()} row(s)')
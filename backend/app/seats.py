@@ -0,0 +1,181 @@
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import event, func, inspect, select, text, update
+from sqlalchemy.exc import DBAPIError
+
+from .models import db, Course, Request, Student
+
+# Счётчик course.approved_count.
+# На PostgreSQL его ведёт триггер из db/init.sql или миграций, если он
+# есть в базе, иначе и на остальных СУБД — обработчики событий ORM ниже.
+
+course_table = Course.__table__
+
+COURSE_FULL_MESSAGE = 'course student limit exceeded'
+
+
+class CourseFullError(Exception):
+    def __init__(self, course_id):
+        super().__init__(f'Course student limit exceeded (course {course_id})')
+        self.course_id = course_id
+
+
+def is_course_full_error(exc):
+    # CourseFullError из обработчиков ниже или RAISE EXCEPTION из триггера
+    if isinstance(exc, CourseFullError):
+        return True
+    return isinstance(exc, DBAPIError) and COURSE_FULL_MESSAGE in str(exc.orig).lower()
+
+
+def has_count_trigger():
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    with db.engine.connect() as conn:
+        return conn.scalar(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_trigger "
+            "WHERE tgname = 'trigger_maintain_approved_count' AND NOT tgisinternal)"
+        ))
+
+
+def app_maintains_counter():
+    if not has_app_context():
+        return False
+    trigger = current_app.config.get('APPROVED_COUNT_TRIGGER')
+    if trigger is None:
+        # один запрос к каталогу на процесс
+        trigger = current_app.extensions.get('approved_count_trigger')
+        if trigger is None:
+            trigger = current_app.extensions['approved_count_trigger'] = has_count_trigger()
+    return not trigger
+
+
+def _bump(connection, course_id, delta):
+    connection.execute(
+        update(course_table)
+        .where(course_table.c.id == course_id)
+        .values(approved_count=course_table.c.approved_count + delta)
+    )
+
+
+def reserve_seats(connection, course_id, n=1):
+    # Атомарное занятие места: условный UPDATE вместо check-then-insert.
+    # Строка course блокируется до конца транзакции, конкурирующие
+    # подтверждения на этот курс выстраиваются в очередь.
+    result = connection.execute(
+        update(course_table)
+        .where(
+            course_table.c.id == course_id,
+            course_table.c.approved_count + n <= course_table.c.student_limit
+        )
+        .values(approved_count=course_table.c.approved_count + n)
+    )
+    if result.rowcount == 0:
+        raise CourseFullError(course_id)
+
+
+def _old_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attr)
+
+
+@event.listens_for(Request, 'after_insert')
+def _request_inserted(mapper, connection, target):
+    if app_maintains_counter() and target.status == 'approved':
+        reserve_seats(connection, target.course_id)
+
+
+@event.listens_for(Request, 'after_update')
+def _request_updated(mapper, connection, target):
+    if not app_maintains_counter():
+        return
+    state = inspect(target)
+    old_status = _old_value(state, 'status')
+    old_course_id = _old_value(state, 'course_id')
+    moved = old_course_id != target.course_id
+    if old_status == 'approved' and (target.status != 'approved' or moved):
+        _bump(connection, old_course_id, -1)
+    if target.status == 'approved' and (old_status != 'approved' or moved):
+        reserve_seats(connection, target.course_id)
+
+
+@event.listens_for(Request, 'after_delete')
+def _request_deleted(mapper, connection, target):
+    state = inspect(target)
+    if app_maintains_counter() and _old_value(state, 'status') == 'approved':
+        _bump(connection, _old_value(state, 'course_id'), -1)
+
+
+def release_seats(connection, *criteria):
+    # Перед удалением заявок набором (или каскадом из student): уменьшить
+    # счётчики на число удаляемых одобренных заявок по курсам.
+    # Возвращает курсы, где освободились места.
+    rows = connection.execute(
+        select(Request.course_id, func.count())
+        .where(Request.status == 'approved', *criteria)
+        .group_by(Request.course_id)
+    ).all()
+    if app_maintains_counter():
+        for course_id, n in rows:
+            _bump(connection, course_id, -n)
+    return [course_id for course_id, _ in rows]
+
+
+@event.listens_for(Student, 'before_delete')
+def _student_deleted(mapper, connection, target):
+    # Заявки студента удалит ON DELETE CASCADE, минуя события Request
+    if app_maintains_counter():
+        release_seats(connection, Request.student_id == target.id)
+
+
+def recount_approved(course_ids=None):
+    # Пересчёт счётчиков из таблицы request одним UPDATE
+    actual = (
+        select(func.count(Request.id))
+        .where(Request.course_id == course_table.c.id, Request.status == 'approved')
+        .scalar_subquery()
+    )
+    stmt = update(course_table).values(approved_count=actual)
+    if course_ids is not None:
+        stmt = stmt.where(course_table.c.id.in_(course_ids))
+    return db.session.execute(stmt).rowcount
+
+
+def find_counter_drift():
+    actual = (
+        select(Request.course_id, func.count().label('n'))
+        .where(Request.status == 'approved')
+        .group_by(Request.course_id)
+        .subquery()
+    )
+    expected = func.coalesce(actual.c.n, 0)
+    rows = db.session.execute(
+        select(course_table.c.id, course_table.c.approved_count, expected)
+        .outerjoin(actual, actual.c.course_id == course_table.c.id)
+        .where(course_table.c.approved_count != expected)
+        .order_by(course_table.c.id)
+    )
+    return [tuple(row) for row in rows]
+
+
+seats_cli = AppGroup('seats', help='Обслуживание счётчиков занятых мест.')
+
+
+@seats_cli.command('verify')
+def verify_command():
+    drift = find_counter_drift()
+    for course_id, stored, actual in drift:
+        click.echo(f'course {course_id}: approved_count={stored}, actual={actual}')
+    if drift:
+        raise SystemExit(1)
+    click.echo('OK')
+
+
+@seats_cli.command('recount')
+@click.option('--course-id', 'course_ids', type=int, multiple=True)
+def recount_command(course_ids):
+    updated = recount_approved(list(course_ids) or None)
+    db.session.commit()
+    click.echo(f'Recounted {updated} course(s)')
@@ -0,0 +1,229 @@
+from flask import abort
+from sqlalchemy import case, func, select
+
+from .models import db, Teacher, Course, Student, Request
+from .instrumentation import timed_phase
+
+
+class Serializer:
+    # Декларативное описание выдаваемых полей модели.
+    # select() выбирает только эти столбцы через Core, rows() превращает
+    # кортежи результата в словари без создания ORM-объектов.
+    model = None
+    fields = ()
+    datetime_fields = ()
+
+    def __init__(self):
+        self.table = self.model.__table__
+        self._datetime_idx = [self.fields.index(name) for name in self.datetime_fields]
+
+    def select(self):
+        return select(*(self.table.c[name] for name in self.fields))
+
+    @timed_phase('serialize')
+    def rows(self, rows):
+        fields = self.fields
+        dt_idx = self._datetime_idx
+        if not dt_idx:
+            return [dict(zip(fields, row)) for row in rows]
+        out = []
+        for row in rows:
+            row = list(row)
+            for i in dt_idx:
+                value = row[i]
+                row[i] = value.isoformat() if value is not None else None
+            out.append(dict(zip(fields, row)))
+        return out
+
+    def one(self, row):
+        return self.rows([row])[0]
+
+    def get_or_404(self, id):
+        row = db.session.execute(self.select().where(self.table.c.id == id)).first()
+        if row is None:
+            abort(404)
+        return self.one(row)
+
+
+class TeacherSerializer(Serializer):
+    model = Teacher
+    fields = ('id', 'full_name', 'experience', 'specialty', 'department')
+
+
+class CourseSerializer(Serializer):
+    model = Course
+    fields = ('id', 'title', 'teacher_id', 'student_limit')
+
+
+class StudentSerializer(Serializer):
+    model = Student
+    fields = ('id', 'full_name', 'email', 'created_at')
+    datetime_fields = ('created_at',)
+
+
+class RequestSerializer(Serializer):
+    model = Request
+    fields = ('id', 'student_id', 'course_id', 'description', 'status', 'created_at')
+    datetime_fields = ('created_at',)
+
+
+class CourseStatsSerializer(Serializer):
+    # Заполненность курсов одним агрегирующим запросом course LEFT JOIN request
+    model = Course
+    fields = ('id', 'title', 'teacher_id', 'student_limit',
+              'approved', 'pending', 'rejected', 'free_seats')
+
+    def select(self):
+        course = self.table
+        req = Request.__table__
+
+        def count_status(status):
+            return func.count(case((req.c.status == status, 1)))
+
+        approved = count_status('approved')
+        return (
+            select(
+                course.c.id, course.c.title, course.c.teacher_id, course.c.student_limit,
+                approved.label('approved'), count_status('pending').label('pending'),
+                count_status('rejected').label('rejected'),
+                (course.c.student_limit - approved).label('free_seats'),
+            )
+            .select_from(course.outerjoin(req, req.c.course_id == course.c.id))
+            .group_by(course.c.id)
+        )
+
+
+class EnrollmentSerializer(Serializer):
+    # Заявка вместе с именем студента и курсом — одной выборкой с JOIN
+    model = Request
+    fields = ('id', 'status', 'created_at', 'description',
+              'student_id', 'student_name', 'student_email',
+              'course_id', 'course_title', 'teacher_id', 'teacher_name')
+    datetime_fields = ('created_at',)
+
+    def select(self):
+        req = self.table
+        student = Student.__table__
+        course = Course.__table__
+        teacher = Teacher.__table__
+        return (
+            select(
+                req.c.id, req.c.status, req.c.created_at, req.c.description,
+                student.c.id, student.c.full_name, student.c.email,
+                course.c.id, course.c.title, teacher.c.id, teacher.c.full_name,
+            )
+            .select_from(
+                req.join(student, student.c.id == req.c.student_id)
+                .join(course, course.c.id == req.c.course_id)
+                .join(teacher, teacher.c.id == course.c.teacher_id)
+            )
+        )
+
+
+class StudentOverviewSerializer(Serializer):
+    # Студент с заявками, курсами и преподавателями — одним запросом
+    # student LEFT JOIN request JOIN course JOIN teacher; число запросов
+    # не зависит от числа заявок
+    model = Student
+    fields = ('id', 'full_name', 'email', 'created_at',
+              'request_id', 'status', 'request_created_at', 'description',
+              'course_id', 'course_title', 'student_limit', 'approved_count',
+              'teacher_id', 'teacher_name')
+    datetime_fields = ('created_at', 'request_created_at')
+
+    def select(self):
+        student = self.table
+        req = Request.__table__
+        course = Course.__table__
+        teacher = Teacher.__table__
+        enrolled = (
+            req.join(course, course.c.id == req.c.course_id)
+            .join(teacher, teacher.c.id == course.c.teacher_id)
+        )
+        return (
+            select(
+                student.c.id, student.c.full_name, student.c.email, student.c.created_at,
+                req.c.id, req.c.status, req.c.created_at, req.c.description,
+                course.c.id, course.c.title, course.c.student_limit, course.c.approved_count,
+                teacher.c.id, teacher.c.full_name,
+            )
+            .select_from(student.outerjoin(enrolled, req.c.student_id == student.c.id))
+            .order_by(req.c.created_at, req.c.id)
+        )
+
+    def get_or_404(self, id):
+        rows = self.rows(db.session.execute(self.select().where(self.table.c.id == id)))
+        if not rows:
+            abort(404)
+        first = rows[0]
+        return {
+            'id': first['id'],
+            'full_name': first['full_name'],
+            'email': first['email'],
+            'created_at': first['created_at'],
+            'requests': [{
+                'id': r['request_id'],
+                'status': r['status'],
+                'created_at': r['request_created_at'],
+                'description': r['description'],
+                'course': {
+                    'id': r['course_id'],
+                    'title': r['course_title'],
+                    'student_limit': r['student_limit'],
+                    'approved_count': r['approved_count'],
+                    'teacher': {'id': r['teacher_id'], 'full_name': r['teacher_name']},
+                },
+            } for r in rows if r['request_id'] is not None],
+        }
+
+
+class TeacherOverviewSerializer(Serializer):
+    # Преподаватель с курсами и их заполненностью — одним запросом
+    # teacher LEFT JOIN (заполненность курсов, как в /courses/stats).
+    # Фильтр по преподавателю стоит внутри подзапроса: GROUP BY считает
+    # только его курсы по ix_course_teacher_id, а не все курсы базы
+    model = Teacher
+    fields = ('id', 'full_name', 'experience', 'specialty', 'department',
+              'course_id', 'title', 'student_limit', 'approved', 'pending', 'rejected',
+              'free_seats')
+
+    def select(self, id):
+        teacher = self.table
+        stats = (
+            CourseStatsSerializer().select()
+            .where(Course.__table__.c.teacher_id == id)
+            .subquery()
+        )
+        return (
+            select(
+                teacher.c.id, teacher.c.full_name, teacher.c.experience,
+                teacher.c.specialty, teacher.c.department,
+                stats.c.id, stats.c.title, stats.c.student_limit, stats.c.approved,
+                stats.c.pending, stats.c.rejected, stats.c.free_seats,
+            )
+            .select_from(teacher.outerjoin(stats, stats.c.teacher_id == teacher.c.id))
+            .where(teacher.c.id == id)
+            .order_by(stats.c.id)
+        )
+
+    def get_or_404(self, id):
+        rows = self.rows(db.session.execute(self.select(id)))
+        if not rows:
+            abort(404)
+        teacher = {name: rows[0][name] for name in self.fields[:5]}
+        course_fields = self.fields[5:]
+        teacher['courses'] = [
+            {('id' if name == 'course_id' else name): r[name] for name in course_fields}
+            for r in rows if r['course_id'] is not None
+        ]
+        return teacher
+
+
+teacher_serializer = TeacherSerializer()
+course_serializer = CourseSerializer()
+student_serializer = StudentSerializer()
+request_serializer = RequestSerializer()
+course_stats_serializer = CourseStatsSerializer()
+enrollment_serializer = EnrollmentSerializer()
+student_overview_serializer = StudentOverviewSerializer()
+teacher_overview_serializer = TeacherOverviewSerializer()
@@ -0,0 +1,47 @@
+import copy
+import os
+from functools import lru_cache
+
+SPEC_FILE = os.path.join(os.path.dirname(__file__), 'docs', 'swagger.yml')
+
+swagger_config = {
+    "headers": [],
+    "specs": [
+        {
+            "endpoint": 'apispec',
+            "route": '/apispec.json',
+            "rule_filter": lambda rule: True,
+            "model_filter": lambda tag: True,
+        }
+    ],
+    "static_url_path": "/flasgger_static",
+    "swagger_ui": True,
+    "specs_route": "/swagger/",
+    # Опционально: кнопки Submit должны быть видны всегда
+    "swagger_ui_config": {
+        "supportedSubmitMethods": ["get", "post", "put", "delete", "patch"]
+    }
+}
+
+# Префиксы URL, которые обслуживает flasgger
+SWAGGER_PREFIXES = ('/apispec.json', '/swagger', '/flasgger_static')
+
+
+@lru_cache(maxsize=None)
+def _load_spec(path, mtime):
+    import yaml
+
+    with open(path, encoding='utf-8') as f:
+        return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+
+def load_api_spec(path=SPEC_FILE):
+    # YAML разбирается один раз на процесс (и заново только при изменении файла)
+    return _load_spec(path, os.path.getmtime(path))
+
+
+def init_swagger(app):
+    from flasgger import Swagger
+
+    # flasgger дописывает пути в шаблон, поэтому отдаём копию
+    Swagger(app, config=swagger_config, template=copy.deepcopy(load_api_spec()))
@@ -0,0 +1,168 @@
+import logging
+import threading
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import func, select, tuple_, update
+
+from .models import db, Course, Request
+from .seats import CourseFullError, app_maintains_counter, reserve_seats
+
+# Лист ожидания: pending-заявки курса в порядке (created_at, id).
+# Когда место освобождается, фоновый поток переводит первые заявки
+# очереди в approved пачками по WAITLIST_BATCH_SIZE, каждая пачка —
+# отдельная транзакция. Обработчик, освободивший место, только ставит
+# курс в очередь и не ждёт продвижения. Заявки, которые сами только что
+# вернулись из approved в pending, в это продвижение не попадают — иначе
+# освобождённое ими место тут же досталось бы им же.
+
+logger = logging.getLogger('app.waitlist')
+
+queue_order = (Request.created_at, Request.id)
+
+
+def pending_in_course(course_id):
+    return (Request.course_id == course_id) & (Request.status == 'pending')
+
+
+def queue_position(r):
+    # Число заявок впереди — диапазон по индексу
+    # ix_request_course_status_created (course_id, status, created_at).
+    # Это O(log n) на поиск начала диапазона плюс O(k) по k записям впереди,
+    # а не чистый O(log n): B-дерево не хранит ранги. Хранимую позицию
+    # пришлось бы переписывать у всей очереди при каждом продвижении или
+    # отмене, поэтому платим чтением, а не записью.
+    ahead = db.session.scalar(
+        select(func.count())
+        .select_from(Request)
+        .where(
+            pending_in_course(r.course_id),
+            tuple_(*queue_order) < tuple_(r.created_at, r.id)
+        )
+    )
+    return ahead + 1
+
+
+def promote_batch(course_id, batch_size, exclude=()):
+    course = db.session.execute(
+        select(Course.student_limit, Course.approved_count)
+        .where(Course.id == course_id)
+        .with_for_update()
+    ).first()
+    if course is None:
+        return 0
+    free = min(batch_size, course.student_limit - course.approved_count)
+    if free <= 0:
+        return 0
+
+    stmt = select(Request.id).where(pending_in_course(course_id))
+    if exclude:
+        stmt = stmt.where(Request.id.notin_(exclude))
+    ids = db.session.scalars(
+        stmt.order_by(*queue_order).limit(free).with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0
+
+    # status='pending' в условии: заявку могли отклонить параллельно
+    promoted = db.session.execute(
+        update(Request)
+        .where(Request.id.in_(ids), Request.status == 'pending')
+        .values(status='approved')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    # на PostgreSQL счётчик ведёт триггер, иначе — одной условной прибавкой
+    if promoted and app_maintains_counter():
+        reserve_seats(db.session.connection(), course_id, promoted)
+    db.session.commit()
+    return promoted
+
+
+def promote_waitlist(course_id, batch_size=None, max_batches=100, exclude=()):
+    batch_size = batch_size or current_app.config['WAITLIST_BATCH_SIZE']
+    total = 0
+    for _ in range(max_batches):
+        try:
+            promoted = promote_batch(course_id, batch_size, exclude)
+        except CourseFullError:
+            # место заняли вручную между чтением и записью — пересчитываем
+            db.session.rollback()
+            continue
+        except Exception:
+            db.session.rollback()
+            raise
+        if not promoted:
+            break
+        total += promoted
+    if total:
+        logger.info('course %s: promoted %d request(s) from waitlist', course_id, total)
+    return total
+
+
+class PromotionWorker:
+    def __init__(self, app):
+        self.app = app
+        # course_id -> id заявок, исключённых из продвижения
+        self._courses = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread = None
+
+    def notify(self, course_id, exclude=()):
+        with self._cond:
+            self._courses.setdefault(course_id, set()).update(exclude)
+            # поток запускается при первом событии — уже после fork воркера gunicorn
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='waitlist-promoter', daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def drain(self, timeout=5):
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._courses and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._courses)
+                course_id, exclude = self._courses.popitem()
+                self._busy = True
+            try:
+                with self.app.app_context():
+                    promote_waitlist(course_id, exclude=exclude)
+            except Exception:
+                logger.exception('waitlist promotion failed for course %s', course_id)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+def init_waitlist(app):
+    app.extensions['waitlist_worker'] = PromotionWorker(app)
+
+
+def seat_freed(course_id, exclude=()):
+    if not has_app_context() or not current_app.config['WAITLIST_AUTO_PROMOTE']:
+        return
+    if current_app.config['WAITLIST_SYNC']:
+        promote_waitlist(course_id, exclude=exclude)
+    else:
+        current_app.extensions['waitlist_worker'].notify(course_id, exclude)
+
+
+waitlist_cli = AppGroup('waitlist', help='Лист ожидания курсов.')
+
+
+@waitlist_cli.command('promote')
+@click.option('--course-id', 'course_ids', type=int, multiple=True)
+def promote_command(course_ids):
+    if not course_ids:
+        course_ids = db.session.scalars(
+            select(Course.id).where(Course.approved_count < Course.student_limit)
+        ).all()
+    total = sum(promote_waitlist(course_id) for course_id in course_ids)
+    click.echo(f'Promoted {total} request(s)')
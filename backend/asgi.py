@@ -0,0 +1,5 @@
+from app.asgi import create_asgi_app
+
+# Только GET-чтение api (см. app/asgi.py):
+#   uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 4
+app = create_asgi_app()
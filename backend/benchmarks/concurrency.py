@@ -0,0 +1,221 @@
+"""Потолок параллельности GET-чтения: синхронные воркеры gunicorn против asgi.py.
+
+    python -m benchmarks.concurrency --database-url sqlite:///bench.db --workers 4
+    python -m benchmarks.concurrency ... --levels 50,200,800 --duration 10 --output conc.json
+
+Оба сервера запускаются на локальной БД с одинаковым числом процессов.
+На каждом уровне N клиентов-опросчиков держат по keep-alive соединению
+и повторяют GET в течение --duration секунд. Потолок — наибольший
+уровень, на котором доля ошибок не выше --max-error-rate, а p99 не
+выше --max-p99-ms.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from app.models import Student, Request
+from benchmarks.run import ADMIN_AUTH, make_app, percentile, sample_ids
+from benchmarks.startup import BACKEND_DIR
+
+# Запросы опросчиков; {student} и {request} — случайные существующие id
+PATHS = [
+    '/api/requests?limit=20',
+    '/api/students?limit=20&sort=-created_at',
+    '/api/courses?limit=20',
+    '/api/students/{student}',
+    '/api/requests/{request}',
+]
+
+SERVERS = {
+    'sync': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'wsgi:app',
+        '-b', f'127.0.0.1:{port}', '-w', str(workers),
+    ],
+    'async': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'asgi:app',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+        '--log-level', 'warning',
+    ],
+}
+
+
+def start_server(kind, port, workers, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url, LAZY_EXTENSIONS='1',
+               RESPONSE_CACHE_SIZE='0', INSTRUMENTATION_ENABLED='0')
+    proc = subprocess.Popen(SERVERS[kind](port, workers), cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'{kind} server exited: {proc.stderr.read().decode()[-2000:]}')
+        try:
+            req = urllib.request.Request(f'http://127.0.0.1:{port}/api/courses?limit=1',
+                                         headers={'Authorization': ADMIN_AUTH})
+            urllib.request.urlopen(req, timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f'{kind} server did not start on port {port}')
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def _poller(host, port, paths, stop_at, timeout, latencies, errors, rng):
+    reader = writer = None
+    while time.monotonic() < stop_at:
+        path = rng.choice(paths)
+        request = (f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+                   f'Authorization: {ADMIN_AUTH}\r\n\r\n').encode()
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), timeout)
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            errors.append('connection')
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            errors.append(status)
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(url, paths, concurrency, duration, timeout, seed):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _poller(parts.hostname, parts.port, paths, stop_at, timeout, latencies, errors,
+                random.Random(seed + i))
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    total = len(latencies) + errors.count('connection')
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'error_rate': round(len(errors) / total, 4) if total else 1.0,
+    }
+
+
+def ceiling(levels, max_error_rate, max_p99_ms):
+    passed = [r['concurrency'] for r in levels
+              if r['error_rate'] <= max_error_rate and r['p99_ms'] <= max_p99_ms]
+    return max(passed, default=0)
+
+
+def expand_paths(database_url, n=200, seed=42):
+    rng = random.Random(seed)
+    app = make_app(database_url)
+    with app.app_context():
+        ids = {'student': sample_ids(Student, n, rng), 'request': sample_ids(Request, n, rng)}
+    return [p.format(student=rng.choice(ids['student']), request=rng.choice(ids['request']))
+            for p in PATHS for _ in range(n // len(PATHS))]
+
+
+def run(database_url, levels, workers=4, duration=10.0, timeout=10.0,
+        max_error_rate=0.01, max_p99_ms=1000.0, kinds=('sync', 'async'), base_port=5100):
+    paths = expand_paths(database_url)
+    result = {'meta': {'workers': workers, 'duration_s': duration, 'paths': PATHS,
+                       'max_error_rate': max_error_rate, 'max_p99_ms': max_p99_ms},
+              'servers': {}}
+    for i, kind in enumerate(kinds):
+        port = base_port + i
+        proc = start_server(kind, port, workers, database_url)
+        try:
+            rows = [asyncio.run(run_level(f'http://127.0.0.1:{port}', paths, n,
+                                          duration, timeout, seed=n))
+                    for n in levels]
+        finally:
+            stop_server(proc)
+        result['servers'][kind] = {
+            'levels': rows,
+            'ceiling': ceiling(rows, max_error_rate, max_p99_ms),
+        }
+    return result
+
+
+def print_report(result):
+    for kind, data in result['servers'].items():
+        print(f"{kind}: ceiling {data['ceiling']} concurrent clients")
+        print(f"  {'clients':>8} {'rps':>9} {'p50':>9} {'p99':>9} {'errors':>7}")
+        for r in data['levels']:
+            print(f"  {r['concurrency']:8d} {r['throughput_rps']:9.1f} {r['p50_ms']:9.2f} "
+                  f"{r['p99_ms']:9.2f} {r['error_rate']:7.2%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:///bench.db'))
+    parser.add_argument('--levels', default='10,50,200,500',
+                        help='числа одновременных клиентов через запятую')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--timeout', type=float, default=10.0, help='таймаут запроса, с')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--max-p99-ms', type=float, default=1000.0)
+    parser.add_argument('--server', action='append', choices=sorted(SERVERS),
+                        help='мерить только этот сервер, можно несколько')
+    parser.add_argument('--output', help='сохранить результат в JSON')
+    args = parser.parse_args(argv)
+
+    result = run(args.database_url, [int(n) for n in args.levels.split(',')],
+                 workers=args.workers, duration=args.duration, timeout=args.timeout,
+                 max_error_rate=args.max_error_rate, max_p99_ms=args.max_p99_ms,
+                 kinds=tuple(args.server or ('sync', 'async')))
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
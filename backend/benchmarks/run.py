@@ -0,0 +1,214 @@
+"""Замер GET-эндпоинтов /api через тестовый клиент Flask.
+
+    python -m benchmarks.run --database-url sqlite:///bench.db --output new.json
+    python -m benchmarks.run ... --compare old.json --threshold 0.15
+
+Для каждого маршрута: пропускная способность, p50/p95/p99 и число
+SQL-запросов на вызов. С --compare сравнивает с прошлым прогоном и
+завершается с кодом 1 при регрессии.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func, select
+
+from app import create_app
+from app.models import db, Teacher, Course, Student, Request
+
+TABLES = {'teachers': Teacher, 'courses': Course, 'students': Student, 'requests': Request}
+# Маршруты, которые не имеет смысла мерить
+SKIP_ENDPOINTS = {'api.cache_metrics', 'api.pool_metrics_view'}
+# Дополнительные параметры запроса для отдельных маршрутов
+ROUTE_PARAMS = {'/api/search': {'q': 'student12'}}
+ADMIN_AUTH = 'Basic ' + base64.b64encode(b'admin:Sirius2025').decode()
+
+
+def make_app(database_url, **overrides):
+    config = {'SQLALCHEMY_DATABASE_URI': database_url}
+    config.update(overrides)
+    return create_app(overrides=config)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def get_routes(app, only=None):
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if not rule.endpoint.startswith('api.') or 'GET' not in rule.methods:
+            continue
+        if rule.endpoint in SKIP_ENDPOINTS:
+            continue
+        if only and not any(pattern in rule.rule for pattern in only):
+            continue
+        routes.append(rule)
+    return sorted(routes, key=lambda r: r.rule)
+
+
+def sample_ids(model, n, rng):
+    ids = db.session.scalars(select(model.id).order_by(func.random()).limit(n)).all()
+    return ids or [rng.randint(1, 1000)]
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def bench_route(client, rule, ids, iterations, warmup, page_size, rng):
+    params = dict(ROUTE_PARAMS.get(rule.rule, {}))
+    if 'id' not in rule.arguments:
+        params.setdefault('limit', page_size)
+
+    def url():
+        path = rule.rule.replace('<int:id>', str(rng.choice(ids))) if ids else rule.rule
+        return client.get(path, query_string=params, headers={'Authorization': ADMIN_AUTH})
+
+    for _ in range(warmup):
+        url()
+
+    latencies = []
+    statuses = {}
+    with StatementCounter(db.engine) as counter:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            resp = url()
+            resp.get_data()
+            latencies.append((time.perf_counter() - t0) * 1000)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        total = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'throughput_rps': round(iterations / total, 2),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'statements_per_call': round(counter.count / iterations, 2),
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def run(app, iterations=50, warmup=5, page_size=100, only=None, seed=42, use_cache=False):
+    rng = random.Random(seed)
+    if not use_cache:
+        # иначе повторные GET меряют только кэш ответов
+        app.extensions['response_cache'] = None
+    results = {}
+    with app.app_context():
+        client = app.test_client()
+        for rule in get_routes(app, only):
+            ids = None
+            if 'id' in rule.arguments:
+                model = TABLES.get(rule.rule.split('/')[2])
+                ids = sample_ids(model, 200, rng) if model else None
+            results[rule.rule] = bench_route(
+                client, rule, ids, iterations, warmup, page_size, rng
+            )
+        counts = {name: db.session.scalar(select(func.count()).select_from(model))
+                  for name, model in TABLES.items()}
+        meta = run_meta(counts, iterations, page_size)
+    return {'meta': meta, 'routes': results}
+
+
+def run_meta(counts, iterations, page_size):
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ''
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_rev': rev,
+        'python': platform.python_version(),
+        'database': db.engine.dialect.name,
+        'rows': counts,
+        'iterations': iterations,
+        'page_size': page_size,
+    }
+
+
+def compare(old, new, threshold=0.15, min_delta_ms=1.0):
+    # Регрессия: p95 вырос больше чем на threshold (и на min_delta_ms)
+    # или выросло число SQL-запросов на вызов
+    regressions = []
+    for route, cur in new['routes'].items():
+        base = old['routes'].get(route)
+        if base is None:
+            continue
+        delta = cur['p95_ms'] - base['p95_ms']
+        if base['p95_ms'] and delta / base['p95_ms'] > threshold and delta > min_delta_ms:
+            regressions.append((route, 'p95_ms', base['p95_ms'], cur['p95_ms']))
+        if cur['statements_per_call'] > base['statements_per_call']:
+            regressions.append((route, 'statements_per_call',
+                                base['statements_per_call'], cur['statements_per_call']))
+    return regressions
+
+
+def print_report(result):
+    print(f"{'route':40} {'rps':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>5}")
+    for route, r in result['routes'].items():
+        print(f"{route:40} {r['throughput_rps']:9.1f} {r['p50_ms']:8.2f} "
+              f"{r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {r['statements_per_call']:5.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'sqlite:///bench.db'))
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--route', action='append', help='подстрока маршрута, можно несколько')
+    parser.add_argument('--with-cache', action='store_true', help='не отключать кэш ответов')
+    parser.add_argument('--output', help='сохранить результат в JSON')
+    parser.add_argument('--compare', help='JSON прошлого прогона')
+    parser.add_argument('--threshold', type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database_url)
+    result = run(app, iterations=args.iterations, warmup=args.warmup,
+                 page_size=args.page_size, only=args.route, use_cache=args.with_cache)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        regressions = compare(old, result, args.threshold)
+        for route, metric, before, after in regressions:
+            print(f'REGRESSION {route} {metric}: {before} -> {after}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Время старта воркера: импорт пакета app и create_app().
+
+    python -m benchmarks.startup --max-import-ms 800 --max-create-ms 150
+    LAZY_EXTENSIONS=1 python -m benchmarks.startup --output startup.json
+
+Каждый замер — в отдельном процессе, чтобы модули не были уже
+импортированы. Дополнительно суммирует вывод python -X importtime.
+При превышении бюджета завершается с кодом 1.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app(overrides={'SQLALCHEMY_DATABASE_URI': sys.argv[1]})
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000,
+                  'modules': len(sys.modules)}))
+'''
+
+
+def _python(args, env=None):
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def measure_once(database_url, env=None):
+    return json.loads(_python(['-c', PROBE, database_url], env).stdout)
+
+
+def importtime_total(module='app', env=None):
+    # Сумма cumulative по модулям верхнего уровня, микросекунды -> мс;
+    # slowest — самые тяжёлые прямые импорты
+    stderr = _python(['-X', 'importtime', '-c', f'import {module}'], env).stderr
+    total = 0
+    direct = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            total += int(cumulative)
+        elif depth == 1:
+            direct.append((int(cumulative), name.strip()))
+    direct.sort(reverse=True)
+    return total / 1000, [(name, us / 1000) for us, name in direct[:10]]
+
+
+def run(runs=5, database_url='sqlite://', env=None):
+    samples = [measure_once(database_url, env) for _ in range(runs)]
+    importtime_ms, slowest = importtime_total(env=env)
+    return {
+        'runs': runs,
+        'import_ms': round(statistics.median(s['import_ms'] for s in samples), 1),
+        'create_app_ms': round(statistics.median(s['create_app_ms'] for s in samples), 1),
+        'modules': samples[-1]['modules'],
+        'importtime_ms': round(importtime_ms, 1),
+        'slowest_imports': [[name, round(ms, 1)] for name, ms in slowest],
+    }
+
+
+def check_budget(result, max_import_ms=None, max_create_ms=None):
+    failures = []
+    if max_import_ms is not None and result['importtime_ms'] > max_import_ms:
+        failures.append(('importtime_ms', result['importtime_ms'], max_import_ms))
+    if max_create_ms is not None and result['create_app_ms'] > max_create_ms:
+        failures.append(('create_app_ms', result['create_app_ms'], max_create_ms))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database-url', default='sqlite://')
+    parser.add_argument('--max-import-ms', type=float)
+    parser.add_argument('--max-create-ms', type=float)
+    parser.add_argument('--output', help='сохранить результат в JSON')
+    args = parser.parse_args(argv)
+
+    result = run(args.runs, args.database_url)
+    print(f"import app:     {result['import_ms']:8.1f} ms (importtime {result['importtime_ms']:.1f} ms)")
+    print(f"create_app():   {result['create_app_ms']:8.1f} ms")
+    print(f"modules loaded: {result['modules']}")
+    for name, ms in result['slowest_imports']:
+        print(f'  {ms:8.1f} ms  {name}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    failures = check_budget(result, args.max_import_ms, args.max_create_ms)
+    for metric, value, budget in failures:
+        print(f'BUDGET EXCEEDED {metric}: {value} > {budget}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
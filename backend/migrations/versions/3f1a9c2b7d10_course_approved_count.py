@@ -0,0 +1,127 @@
+"""course.approved_count counter
+
+Revision ID: 3f1a9c2b7d10
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+CHECK_COURSE_LIMIT = """
+CREATE OR REPLACE FUNCTION check_course_limit()
+RETURNS TRIGGER AS $$
+DECLARE
+    current_count INTEGER;
+    max_limit INTEGER;
+BEGIN
+    IF NEW.status = 'approved' AND (
+        TG_OP = 'INSERT' OR
+        OLD.status <> 'approved' OR
+        OLD.course_id <> NEW.course_id
+    ) THEN
+        SELECT student_limit, approved_count INTO max_limit, current_count
+        FROM course
+        WHERE id = NEW.course_id;
+
+        IF current_count >= max_limit THEN
+            RAISE EXCEPTION 'Course student limit exceeded';
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MAINTAIN_APPROVED_COUNT = """
+CREATE OR REPLACE FUNCTION maintain_approved_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND OLD.status = NEW.status
+        AND OLD.course_id = NEW.course_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'approved' THEN
+        UPDATE course SET approved_count = approved_count - 1
+        WHERE id = OLD.course_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'approved' THEN
+        UPDATE course SET approved_count = approved_count + 1
+        WHERE id = NEW.course_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+OLD_CHECK_COURSE_LIMIT = """
+CREATE OR REPLACE FUNCTION check_course_limit()
+RETURNS TRIGGER AS $$
+DECLARE
+    current_count INTEGER;
+    max_limit INTEGER;
+BEGIN
+    IF NEW.status = 'approved' THEN
+        SELECT student_limit INTO max_limit
+        FROM course
+        WHERE id = NEW.course_id;
+
+        SELECT COUNT(*) INTO current_count
+        FROM request
+        WHERE
+            course_id = NEW.course_id AND
+            status = 'approved' AND
+            id != COALESCE(NEW.id, 0);
+
+        IF current_count >= max_limit THEN
+            RAISE EXCEPTION 'Course student limit exceeded';
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = [c['name'] for c in sa.inspect(bind).get_columns('course')]
+    if 'approved_count' not in columns:
+        op.add_column('course', sa.Column(
+            'approved_count', sa.Integer(), nullable=False, server_default='0'
+        ))
+
+    op.execute(
+        "UPDATE course SET approved_count = ("
+        "SELECT COUNT(*) FROM request "
+        "WHERE request.course_id = course.id AND request.status = 'approved')"
+    )
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(CHECK_COURSE_LIMIT)
+        op.execute(MAINTAIN_APPROVED_COUNT)
+        op.execute("DROP TRIGGER IF EXISTS trigger_maintain_approved_count ON request")
+        op.execute(
+            "CREATE TRIGGER trigger_maintain_approved_count "
+            "AFTER INSERT OR UPDATE OR DELETE ON request "
+            "FOR EACH ROW EXECUTE FUNCTION maintain_approved_count()"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS trigger_maintain_approved_count ON request")
+        op.execute("DROP FUNCTION IF EXISTS maintain_approved_count()")
+        op.execute(OLD_CHECK_COURSE_LIMIT)
+    op.drop_column('course', 'approved_count')
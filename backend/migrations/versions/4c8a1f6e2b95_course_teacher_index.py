@@ -0,0 +1,29 @@
+"""index on course.teacher_id
+
+Revision ID: 4c8a1f6e2b95
+Revises: e2b7f4a9c316
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8a1f6e2b95'
+down_revision = 'e2b7f4a9c316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_course_teacher_id', 'course', ['teacher_id'],
+            if_not_exists=True,
+            postgresql_concurrently=postgres,
+        )
+
+
+def downgrade():
+    op.drop_index('ix_course_teacher_id', table_name='course', if_exists=True)
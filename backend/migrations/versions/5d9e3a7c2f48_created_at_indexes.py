@@ -0,0 +1,37 @@
+"""created_at indexes for sorted listings
+
+Revision ID: 5d9e3a7c2f48
+Revises: c47e1d0b9a55
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9e3a7c2f48'
+down_revision = 'c47e1d0b9a55'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_request_created_at', 'request'),
+    ('ix_student_created_at', 'student'),
+]
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name, table, ['created_at', 'id'],
+                if_not_exists=True,
+                postgresql_concurrently=postgres,
+            )
+
+
+def downgrade():
+    for name, table in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,33 @@
+"""text_pattern_ops index for the email prefix filter
+
+Revision ID: 7e3b9d2c5a18
+Revises: 4c8a1f6e2b95
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7e3b9d2c5a18'
+down_revision = '4c8a1f6e2b95'
+branch_labels = None
+depends_on = None
+
+
+# Индекс с text_pattern_ops нужен только PostgreSQL
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_student_email_pattern', 'student', ['email'],
+            postgresql_ops={'email': 'text_pattern_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_student_email_pattern', table_name='student', if_exists=True)
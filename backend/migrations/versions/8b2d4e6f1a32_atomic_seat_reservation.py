@@ -0,0 +1,97 @@
+"""atomic seat reservation in maintain_approved_count()
+
+Revision ID: 8b2d4e6f1a32
+Revises: 3f1a9c2b7d10
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4e6f1a32'
+down_revision = '3f1a9c2b7d10'
+branch_labels = None
+depends_on = None
+
+
+def _maintain_approved_count(reserve):
+    return f"""
+CREATE OR REPLACE FUNCTION maintain_approved_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND OLD.status = NEW.status
+        AND OLD.course_id = NEW.course_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'approved' THEN
+        UPDATE course SET approved_count = approved_count - 1
+        WHERE id = OLD.course_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'approved' THEN
+{reserve}
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+RESERVE = """\
+        UPDATE course SET approved_count = approved_count + 1
+        WHERE id = NEW.course_id AND approved_count < student_limit;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'Course student limit exceeded';
+        END IF;"""
+
+INCREMENT = """\
+        UPDATE course SET approved_count = approved_count + 1
+        WHERE id = NEW.course_id;"""
+
+CHECK_COURSE_LIMIT = """
+CREATE OR REPLACE FUNCTION check_course_limit()
+RETURNS TRIGGER AS $$
+DECLARE
+    current_count INTEGER;
+    max_limit INTEGER;
+BEGIN
+    IF NEW.status = 'approved' AND (
+        TG_OP = 'INSERT' OR
+        OLD.status <> 'approved' OR
+        OLD.course_id <> NEW.course_id
+    ) THEN
+        SELECT student_limit, approved_count INTO max_limit, current_count
+        FROM course
+        WHERE id = NEW.course_id;
+
+        IF current_count >= max_limit THEN
+            RAISE EXCEPTION 'Course student limit exceeded';
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(_maintain_approved_count(RESERVE))
+    op.execute("DROP TRIGGER IF EXISTS trigger_check_course_limit ON request")
+    op.execute("DROP FUNCTION IF EXISTS check_course_limit()")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(_maintain_approved_count(INCREMENT))
+    op.execute(CHECK_COURSE_LIMIT)
+    op.execute(
+        "CREATE TRIGGER trigger_check_course_limit "
+        "BEFORE INSERT OR UPDATE ON request "
+        "FOR EACH ROW EXECUTE FUNCTION check_course_limit()"
+    )
@@ -0,0 +1,85 @@
+"""search indexes: pg_trgm on PostgreSQL, FTS5 on SQLite
+
+Revision ID: 9a4c6e2d1b73
+Revises: 5d9e3a7c2f48
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c6e2d1b73'
+down_revision = '5d9e3a7c2f48'
+branch_labels = None
+depends_on = None
+
+
+TRGM_INDEXES = [
+    ('student', 'full_name'),
+    ('student', 'email'),
+    ('teacher', 'full_name'),
+    ('teacher', 'specialty'),
+    ('teacher', 'department'),
+    ('course', 'title'),
+]
+
+# rowid = id * 3 + код типа (student 0, teacher 1, course 2), как в app/search.py
+SQLITE_SOURCES = [
+    ('student', 0, 'full_name', "{row}.email", 'full_name, email'),
+    ('teacher', 1, 'full_name', "{row}.specialty || ', ' || {row}.department",
+     'full_name, specialty, department'),
+    ('course', 2, 'title', 'NULL', 'title'),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        with op.get_context().autocommit_block():
+            for table, column in TRGM_INDEXES:
+                op.create_index(
+                    f'ix_{table}_{column}_trgm', table, [column],
+                    postgresql_using='gin',
+                    postgresql_ops={column: 'gin_trgm_ops'},
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+                   "USING fts5(label, detail, tokenize='trigram')")
+        # индекс мог уже заполнить db.create_all() — строим его заново
+        op.execute('DELETE FROM search_index')
+        for table, code, label, detail, indexed in SQLITE_SOURCES:
+            values = f"new.id * 3 + {code}, new.{label}, {detail.format(row='new')}"
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO search_index (rowid, label, detail) VALUES ({values}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {indexed} "
+                f"ON {table} BEGIN "
+                f"DELETE FROM search_index WHERE rowid = old.id * 3 + {code}; "
+                f"INSERT INTO search_index (rowid, label, detail) VALUES ({values}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN "
+                f"DELETE FROM search_index WHERE rowid = old.id * 3 + {code}; END"
+            )
+            op.execute(
+                f"INSERT INTO search_index (rowid, label, detail) "
+                f"SELECT id * 3 + {code}, {label}, {detail.format(row=table)} FROM {table}"
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table, column in TRGM_INDEXES:
+            op.drop_index(f'ix_{table}_{column}_trgm', table_name=table, if_exists=True)
+    elif dialect == 'sqlite':
+        for table, *_ in SQLITE_SOURCES:
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_search_{suffix}')
+        op.execute('DROP TABLE IF EXISTS search_index')
@@ -0,0 +1,38 @@
+"""table versions for ETag and the response cache
+
+Revision ID: b5d1e8a3f604
+Revises: 7e3b9d2c5a18
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d1e8a3f604'
+down_revision = '7e3b9d2c5a18'
+branch_labels = None
+depends_on = None
+
+
+TRACKED_TABLES = ('teacher', 'course', 'student', 'request')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('table_version'):
+        op.create_table(
+            'table_version',
+            sa.Column('name', sa.String(length=64), primary_key=True),
+            sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        )
+    table = sa.table('table_version', sa.column('name'), sa.column('version'))
+    existing = set(bind.execute(sa.select(table.c.name)).scalars())
+    rows = [{'name': name, 'version': 0} for name in TRACKED_TABLES if name not in existing]
+    if rows:
+        op.bulk_insert(table, rows)
+
+
+def downgrade():
+    op.drop_table('table_version')
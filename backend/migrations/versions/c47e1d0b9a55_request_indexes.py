@@ -0,0 +1,47 @@
+"""composite and partial indexes on request
+
+Revision ID: c47e1d0b9a55
+Revises: 8b2d4e6f1a32
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e1d0b9a55'
+down_revision = '8b2d4e6f1a32'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_request_course_status_created', ['course_id', 'status', 'created_at'], {}),
+    ('ix_request_student_status', ['student_id', 'status'], {}),
+    ('ix_request_course_approved', ['course_id'], {'where': "status = 'approved'"}),
+    ('uq_student_pending_request', ['student_id'],
+     {'where': "status = 'pending'", 'unique': True}),
+]
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    # CONCURRENTLY не блокирует запись в request, но требует autocommit
+    with op.get_context().autocommit_block():
+        for name, columns, opts in INDEXES:
+            where = sa.text(opts['where']) if 'where' in opts else None
+            op.create_index(
+                name, 'request', columns,
+                unique=opts.get('unique', False),
+                if_not_exists=True,
+                postgresql_where=where,
+                sqlite_where=where,
+                postgresql_concurrently=postgres,
+            )
+
+
+def downgrade():
+    # uq_student_pending_request создаётся ещё в db/init.sql — не трогаем
+    for name, _, _ in INDEXES[:3]:
+        op.drop_index(name, table_name='request', if_exists=True)
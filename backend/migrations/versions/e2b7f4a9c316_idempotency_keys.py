@@ -0,0 +1,38 @@
+"""idempotency keys for request writes
+
+Revision ID: e2b7f4a9c316
+Revises: 9a4c6e2d1b73
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7f4a9c316'
+down_revision = '9a4c6e2d1b73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Таблица уже есть в БД, созданной из db/init.sql
+    if not sa.inspect(op.get_bind()).has_table('idempotency_key'):
+        op.create_table(
+            'idempotency_key',
+            sa.Column('key', sa.String(length=255), nullable=False),
+            sa.Column('fingerprint', sa.String(length=64), nullable=False),
+            sa.Column('status_code', sa.Integer(), nullable=True),
+            sa.Column('body', sa.Text(), nullable=True),
+            sa.Column('content_type', sa.String(length=255), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('key'),
+        )
+    op.create_index('ix_idempotency_key_created_at', 'idempotency_key', ['created_at'],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_key_created_at', table_name='idempotency_key', if_exists=True)
+    op.drop_table('idempotency_key')
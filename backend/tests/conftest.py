@@ -1,6 +1,10 @@
+from datetime import datetime, timedelta
+from itertools import count
+
 import pytest
 from app import create_app, db
 from app.auth import auth
+from app.models import Request
 
 @pytest.fixture
 def app():
@@ -23,3 +27,47 @@ def admin_headers():
 def disable_auth(monkeypatch):
     monkeypatch.setattr(auth, 'login_required', lambda *args, **kwargs: (lambda f: f))
     yield
+
+@pytest.fixture
+def school(client):
+    # преподаватель, его курсы и студенты; email сквозной — фабрику можно звать повторно
+    numbers = count()
+
+    def make(courses=1, students=3, limit=2):
+        tid = client.post('/api/teachers', json={
+            'full_name': 'Препод',
+            'experience': 5,
+            'specialty': 'Физика',
+            'department': 'Физфак'
+        }).get_json()['id']
+        course_ids = [client.post('/api/courses', json={
+            'title': f'Курс {i}', 'teacher_id': tid, 'student_limit': limit
+        }).get_json()['id'] for i in range(courses)]
+        student_ids = []
+        for _ in range(students):
+            n = next(numbers)
+            student_ids.append(client.post('/api/students', json={
+                'full_name': f'Студент {n}', 'email': f'student{n}@student.ru'
+            }).get_json()['id'])
+        return tid, course_ids, student_ids
+    return make
+
+@pytest.fixture
+def enqueue(app):
+    def make(course_id, student_ids, status='pending'):
+        # created_at задаём явно, чтобы порядок очереди не зависел от точности часов
+        base = datetime(2025, 1, 1)
+        reqs = [Request(student_id=s, course_id=course_id, status=status,
+                        created_at=base + timedelta(minutes=i))
+                for i, s in enumerate(student_ids)]
+        db.session.add_all(reqs)
+        db.session.commit()
+        return [r.id for r in reqs]
+    return make
+
+@pytest.fixture
+def statuses(app):
+    def get(ids):
+        db.session.expire_all()
+        return [db.session.get(Request, i).status for i in ids]
+    return get
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Teacher, Course, Student, Request
+
+
+@pytest.fixture
+def admin_app():
+    app = create_app('testing', overrides={'ADMIN_ENABLED': True})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _view(app, model):
+    admin = app.extensions['admin'][0]
+    return next(v for v in admin._views if getattr(v, 'model', None) is model)
+
+
+def _seed(n=6):
+    teacher = Teacher(full_name='Препод', experience=1, specialty='S', department='D')
+    course = Course(title='Курс', teacher=teacher, student_limit=n)
+    students = [Student(full_name=f'Студент {i}', email=f'adm{i}@student.ru') for i in range(n)]
+    db.session.add_all([course, *students])
+    db.session.flush()
+    db.session.add_all(Request(student_id=s.id, course_id=course.id) for s in students)
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def _statements(fn):
+    seen = []
+
+    def listener(*args):
+        seen.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, seen
+
+
+def test_request_list_loads_relations_in_one_query(admin_app):
+    _seed()
+    view = _view(admin_app, Request)
+
+    def render():
+        count, rows = view.get_list(0, None, False, None, None)
+        return count, [(str(r.student), str(r.course)) for r in rows]
+
+    (count, rows), statements = _statements(render)
+    assert count == 6
+    assert len(rows) == 6
+    # версия таблицы, COUNT и одна выборка с JOIN, без запроса на каждую строку
+    assert len(statements) == 3
+
+
+def test_list_count_is_cached_until_table_changes(admin_app):
+    _seed()
+    view = _view(admin_app, Student)
+    view.get_list(0, None, False, None, None)
+
+    (count, _), statements = _statements(lambda: view.get_list(0, None, False, None, None))
+    assert count == 6
+    assert not any('count(' in s.lower() for s in statements)
+
+    db.session.add(Student(full_name='Новый', email='adm-new@student.ru'))
+    db.session.commit()
+    count, _ = view.get_list(0, None, False, None, None)
+    assert count == 7
+
+
+def test_search_uses_exact_count(admin_app):
+    _seed()
+    view = _view(admin_app, Student)
+    view.column_searchable_list = ['full_name']
+    view._refresh_cache()
+    count, rows = view.get_list(0, None, False, 'Студент 1', None)
+    assert count == 1
+
+
+def test_course_teacher_is_ajax_lookup(admin_app):
+    view = _view(admin_app, Course)
+    assert 'teacher' in view._form_ajax_refs
+    assert view._auto_joins == [Course.teacher]
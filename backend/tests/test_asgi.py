@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from flask import request
+
+pytest.importorskip('aiosqlite')
+
+from app import create_app, db  # noqa: E402
+from app.asgi import DETAIL_VIEWS, LIST_VIEWS, async_url, create_asgi_app  # noqa: E402
+
+
+@pytest.fixture
+def apps(tmp_path):
+    uri = f'sqlite:///{tmp_path / "asgi.db"}'
+    sync_app = create_app('testing', overrides={'SQLALCHEMY_DATABASE_URI': uri})
+    with sync_app.app_context():
+        db.create_all()
+        client = sync_app.test_client()
+        tid = client.post('/api/teachers', json={
+            'full_name': 'Препод', 'experience': 5,
+            'specialty': 'Физика', 'department': 'Физфак'
+        }).get_json()['id']
+        cid = client.post('/api/courses', json={
+            'title': 'Курс', 'teacher_id': tid, 'student_limit': 3
+        }).get_json()['id']
+        for i in range(5):
+            sid = client.post('/api/students', json={
+                'full_name': f'Студент {i}', 'email': f'asgi{i}@student.ru'
+            }).get_json()['id']
+            client.post('/api/requests', json={'student_id': sid, 'course_id': cid})
+        db.session.remove()
+        yield client, create_asgi_app('testing', {'SQLALCHEMY_DATABASE_URI': uri})
+        db.engine.dispose()
+
+
+def call(asgi_app, path, query=''):
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+        'query_string': query.encode(), 'headers': [(b'host', b'localhost')],
+        'scheme': 'http', 'server': ('localhost', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await asgi_app(scope, receive, send)
+        await asgi_app.engine.dispose()
+
+    asyncio.run(run())
+    start, *bodies = messages
+    headers = {k.decode(): v.decode() for k, v in start['headers']}
+    return start['status'], headers, b''.join(m['body'] for m in bodies)
+
+
+def test_async_url():
+    assert str(async_url('postgresql://u:p@db/x')).startswith('postgresql+asyncpg://')
+    assert str(async_url('sqlite:///x.db')) == 'sqlite+aiosqlite:///x.db'
+    with pytest.raises(ValueError):
+        async_url('mysql://u:p@db/x')
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/api/teachers', ''),
+    ('/api/courses', ''),
+    ('/api/students', 'limit=2'),
+    ('/api/students', 'sort=-created_at&limit=2'),
+    ('/api/requests', 'status=pending&limit=3'),
+    ('/api/requests', 'stream=1'),
+    ('/api/teachers/1', ''),
+    ('/api/courses/1', ''),
+    ('/api/students/2', ''),
+    ('/api/requests/3', ''),
+    ('/api/requests/999', ''),
+    ('/api/students', 'limit=0'),
+])
+def test_same_response_as_sync(apps, path, query):
+    client, asgi_app = apps
+    expected = client.get(path, query_string=query)
+    status, headers, body = call(asgi_app, path, query)
+    assert status == expected.status_code
+    if status == 200:
+        assert json.loads(body) == expected.get_json()
+        assert headers.get('x-next-cursor') == expected.headers.get('X-Next-Cursor')
+        assert headers.get('link') == expected.headers.get('Link')
+
+
+def test_cursor_pages_match(apps):
+    client, asgi_app = apps
+    _, headers, _ = call(asgi_app, '/api/students', 'limit=2')
+    cursor = headers['x-next-cursor']
+    _, _, body = call(asgi_app, '/api/students', f'limit=2&after={cursor}')
+    expected = client.get('/api/students', query_string={'limit': 2, 'after': cursor})
+    assert json.loads(body) == expected.get_json()
+
+
+def test_only_read_routes(apps):
+    _, asgi_app = apps
+    assert set(LIST_VIEWS) | set(DETAIL_VIEWS) == {
+        f'api.get_{name}' for name in ('teachers', 'teacher', 'courses', 'course',
+                                       'students', 'student', 'requests', 'request')
+    }
+    assert call(asgi_app, '/api/courses/stats')[0] == 404
+    assert call(asgi_app, '/api/metrics/cache')[0] == 404
+
+
+def test_auth_runs_off_event_loop(apps, monkeypatch):
+    _, asgi_app = apps
+    seen = []
+
+    def login_required():
+        # хэш пароля считается в пуле потоков, контекст запроса доступен
+        seen.append((threading.current_thread() is threading.main_thread(), request.path))
+    monkeypatch.setattr('app.asgi._login_required', login_required)
+    assert call(asgi_app, '/api/courses')[0] == 200
+    assert seen == [(False, '/api/courses')]
@@ -0,0 +1,71 @@
+import base64
+import importlib
+
+import pytest
+
+from app.auth import CredentialCache, credential_cache, set_password, users
+
+
+# app.auth как атрибут пакета перекрыт объектом HTTPBasicAuth
+auth_module = importlib.import_module('app.auth')
+
+
+def _basic(username, password):
+    raw = base64.b64encode(f'{username}:{password}'.encode()).decode()
+    return {'Authorization': f'Basic {raw}'}
+
+
+@pytest.fixture
+def real_auth(app, monkeypatch):
+    # отключаем обход авторизации TestingConfig
+    app.config['TESTING'] = False
+    monkeypatch.setitem(users, 'user', users['user'])
+    credential_cache.invalidate()
+    yield
+    credential_cache.invalidate()
+
+
+def test_repeated_basic_auth_hits_cache(client, real_auth, monkeypatch):
+    calls = []
+    original = auth_module.check_password_hash
+    monkeypatch.setattr(auth_module, 'check_password_hash',
+                        lambda h, p: calls.append(p) or original(h, p))
+    for _ in range(3):
+        assert client.get('/api/teachers', headers=_basic('user', 'userpass')).status_code == 200
+    assert len(calls) == 1
+    assert client.get('/api/teachers', headers=_basic('user', 'wrong')).status_code == 401
+
+
+def test_password_change_invalidates_cache(client, real_auth):
+    assert client.get('/api/teachers', headers=_basic('user', 'userpass')).status_code == 200
+    set_password('user', 'newpass')
+    assert client.get('/api/teachers', headers=_basic('user', 'userpass')).status_code == 401
+    assert client.get('/api/teachers', headers=_basic('user', 'newpass')).status_code == 200
+
+
+def test_bearer_token(client, real_auth):
+    resp = client.post('/api/auth/token', headers=_basic('user', 'userpass'))
+    assert resp.status_code == 200
+    token = resp.get_json()['token']
+    bearer = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/courses', headers=bearer).status_code == 200
+    # роль берётся из токена: user не может создавать курсы
+    assert client.post('/api/courses', json={}, headers=bearer).status_code == 403
+    assert client.get('/api/courses', headers={'Authorization': 'Bearer junk'}).status_code == 401
+
+    set_password('user', 'rotated')
+    assert client.get('/api/courses', headers=bearer).status_code == 401
+
+
+def test_cache_is_bounded_and_expires():
+    cache = CredentialCache(maxsize=2, ttl=60)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, 'pw', 'hash')
+    assert len(cache) == 2
+    assert not cache.get('a', 'pw', 'hash')
+    assert cache.get('c', 'pw', 'hash')
+    assert not cache.get('c', 'pw', 'other-hash')
+
+    cache = CredentialCache(maxsize=2, ttl=-1)
+    cache.put('a', 'pw', 'hash')
+    assert not cache.get('a', 'pw', 'hash')
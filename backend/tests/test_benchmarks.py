@@ -0,0 +1,50 @@
+from benchmarks.generate import generate
+from benchmarks.concurrency import ceiling
+from benchmarks.run import compare, run
+from app.models import db, Course, Request, Student
+from app.seats import find_counter_drift
+
+
+def test_generator_is_deterministic_and_consistent(app):
+    vol = generate(scale=0.0005, seed=7)
+    assert db.session.query(Student).count() == vol['students']
+    assert db.session.query(Request).count() == vol['requests']
+    assert find_counter_drift() == []
+    over_limit = db.session.query(Course).filter(
+        Course.approved_count > Course.student_limit
+    ).count()
+    assert over_limit == 0
+    first = [r.status for r in db.session.query(Request).order_by(Request.id).limit(50)]
+
+    db.drop_all()
+    db.create_all()
+    generate(scale=0.0005, seed=7)
+    assert [r.status for r in db.session.query(Request).order_by(Request.id).limit(50)] == first
+
+
+def test_runner_reports_every_route(app):
+    generate(scale=0.0002, seed=1)
+    result = run(app, iterations=3, warmup=1, page_size=10, only=['/api/courses'])
+    routes = result['routes']
+    assert set(routes) == {'/api/courses', '/api/courses/<int:id>', '/api/courses/stats',
+                           '/api/courses/<int:id>/waitlist'}
+    assert routes['/api/courses']['statuses'] == {'200': 3}
+    assert routes['/api/courses']['statements_per_call'] >= 1
+    assert result['meta']['rows']['courses'] == 4
+
+
+def test_compare_flags_regressions():
+    old = {'routes': {'/api/x': {'p95_ms': 10.0, 'statements_per_call': 1.0}}}
+    new = {'routes': {'/api/x': {'p95_ms': 20.0, 'statements_per_call': 2.0}}}
+    assert [r[1] for r in compare(old, new)] == ['p95_ms', 'statements_per_call']
+    assert compare(old, old) == []
+
+
+def test_concurrency_ceiling():
+    levels = [
+        {'concurrency': 10, 'error_rate': 0.0, 'p99_ms': 50},
+        {'concurrency': 100, 'error_rate': 0.0, 'p99_ms': 900},
+        {'concurrency': 500, 'error_rate': 0.05, 'p99_ms': 800},
+    ]
+    assert ceiling(levels, max_error_rate=0.01, max_p99_ms=1000) == 100
+    assert ceiling(levels, max_error_rate=0.01, max_p99_ms=10) == 0
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select
+
+from app.models import db, Course, Request, Student
+from app.seats import find_counter_drift
+
+
+def _request(student_id, course_id, status='approved', days_ago=0):
+    r = Request(student_id=student_id, course_id=course_id, status=status,
+                created_at=datetime.utcnow() - timedelta(days=days_ago))
+    db.session.add(r)
+    db.session.commit()
+    return r.id
+
+
+def _count(model):
+    return db.session.scalar(select(func.count()).select_from(model))
+
+
+def test_delete_teacher_cascades_in_database(app, client, school):
+    tid, (c1, c2), (s1, s2, s3) = school(courses=2, limit=5)
+    _request(s1, c1)
+    _request(s2, c1)
+    _request(s3, c2)
+    client.get('/api/courses')
+
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+    resp = client.delete(f'/api/teachers/{tid}')
+    assert resp.status_code == 200
+    # ни одна строка course/request не загружается в сессию
+    assert not any(s.lstrip().upper().startswith('SELECT course.') for s in statements)
+    assert not any(s.lstrip().upper().startswith('SELECT request.') for s in statements)
+    assert _count(Course) == 0 and _count(Request) == 0
+    # кэш списка курсов сброшен каскадом
+    assert client.get('/api/courses').get_json() == []
+    assert client.delete(f'/api/teachers/{tid}').status_code == 404
+
+
+def test_bulk_delete_reports_counts(client, school):
+    _, (c1, c2), (s1, s2, s3) = school(courses=2, limit=5)
+    _request(s1, c1)
+    _request(s2, c2)
+    _request(s3, c2)
+
+    resp = client.post('/api/courses/bulk-delete', json={'ids': [c2, 999]})
+    assert resp.get_json() == {'deleted': {'course': 1, 'request': 2}}
+
+    resp = client.post('/api/students/bulk-delete', json={'ids': [s1, s2]})
+    assert resp.get_json() == {'deleted': {'student': 2, 'request': 1}}
+    assert find_counter_drift() == []
+
+
+def test_deleting_student_frees_seat(client, school):
+    _, (c1, _), (s1, s2, _) = school(courses=2, limit=1)
+    _request(s1, c1)
+    waiting = _request(s2, c1, status='pending')
+
+    assert client.delete(f'/api/students/{s1}').status_code == 200
+    db.session.expire_all()
+    assert db.session.get(Request, waiting).status == 'approved'
+    assert find_counter_drift() == []
+
+
+def test_orm_delete_keeps_counter(client, school):
+    _, (c1, _), (s1, s2, _) = school(courses=2, limit=5)
+    _request(s1, c1)
+    _request(s2, c1)
+    db.session.delete(db.session.get(Student, s1))
+    db.session.commit()
+    assert db.session.get(Course, c1).approved_count == 1
+    assert find_counter_drift() == []
+
+
+def test_bulk_delete_requests_by_filter(client, school):
+    _, (c1, c2), (s1, s2, s3) = school(courses=2, limit=5)
+    old = _request(s1, c1, status='rejected', days_ago=40)
+    _request(s2, c1, status='rejected', days_ago=1)
+    _request(s3, c2, days_ago=40)
+
+    cutoff = (datetime.utcnow() - timedelta(days=30)).isoformat()
+    resp = client.post('/api/requests/bulk-delete',
+                       query_string={'status': 'rejected', 'created_before': cutoff})
+    assert resp.get_json() == {'deleted': {'request': 1}}
+    assert db.session.get(Request, old) is None
+    assert _count(Request) == 2
+
+    resp = client.post('/api/requests/bulk-delete', json={'ids': [r['id'] for r in
+                       client.get('/api/requests').get_json()]})
+    assert resp.get_json() == {'deleted': {'request': 2}}
+    assert find_counter_drift() == []
+
+
+def test_bulk_delete_validation(app, client):
+    assert client.post('/api/requests/bulk-delete').status_code == 400
+    assert client.post('/api/teachers/bulk-delete', json={'ids': []}).status_code == 400
+    assert client.post('/api/teachers/bulk-delete', json={'ids': ['1']}).status_code == 400
+    app.config['API_BULK_MAX_ITEMS'] = 2
+    assert client.post('/api/students/bulk-delete', json={'ids': [1, 2, 3]}).status_code == 413
@@ -0,0 +1,91 @@
+from sqlalchemy import event
+
+from app.models import db, Course
+from app.seats import find_counter_drift
+
+
+def test_approve_checks_capacity_in_queue_order(client, school, enqueue, statuses):
+    _, (c1, c2), students = school(courses=2, students=4)
+    ids = enqueue(c1, students[:3])
+    (other,) = enqueue(c2, students[3:])
+
+    resp = client.post('/api/requests/bulk-transition', json={
+        'status': 'approved', 'ids': ids + [other, 999]
+    })
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['results'] == [
+        {'id': ids[0], 'outcome': 'applied'},
+        {'id': ids[1], 'outcome': 'applied'},
+        {'id': ids[2], 'outcome': 'full'},
+        {'id': other, 'outcome': 'applied'},
+        {'id': 999, 'outcome': 'not_found'},
+    ]
+    assert data['counts'] == {'applied': 3, 'full': 1, 'not_found': 1}
+    assert statuses(ids) == ['approved', 'approved', 'pending']
+    assert db.session.get(Course, c1).approved_count == 2
+    assert find_counter_drift() == []
+
+
+def test_transition_by_filter_in_one_update(app, client, school, enqueue, statuses):
+    _, (c1, _), students = school(courses=2, students=4, limit=10)
+    ids = enqueue(c1, students)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.startswith('UPDATE request'):
+            statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        resp = client.post('/api/requests/bulk-transition',
+                           query_string={'course_id': c1, 'status': 'pending'},
+                           json={'status': 'rejected'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert resp.get_json()['counts'] == {'applied': 4}
+    assert len(statements) == 1
+    assert statuses(ids) == ['rejected'] * 4
+
+
+def test_rejecting_approved_frees_seats(client, school, enqueue, statuses):
+    _, (c1, _), students = school(courses=2, students=4, limit=1)
+    (approved,) = enqueue(c1, students[:1], status='approved')
+    (waiting,) = enqueue(c1, students[1:2])
+
+    resp = client.post('/api/requests/bulk-transition', json={
+        'status': 'rejected', 'ids': [approved]
+    })
+    assert resp.get_json()['counts'] == {'applied': 1}
+    # освободившееся место занимает очередь
+    assert statuses([approved, waiting]) == ['rejected', 'approved']
+    assert find_counter_drift() == []
+
+
+def test_pending_conflicts_are_reported_per_id(client, school, enqueue, statuses):
+    _, (c1, c2), students = school(courses=2, students=4, limit=5)
+    enqueue(c1, students[:1])
+    rejected = enqueue(c2, students[:2], status='rejected')
+    # второй студент: две заявки в одной пачке, pending станет только первая
+    (again,) = enqueue(c1, students[1:2], status='rejected')
+    resp = client.post('/api/requests/bulk-transition', json={
+        'status': 'pending', 'ids': rejected + [again]
+    })
+    assert resp.status_code == 200
+    outcomes = {r['id']: r['outcome'] for r in resp.get_json()['results']}
+    assert outcomes == {rejected[0]: 'pending_conflict', rejected[1]: 'pending_conflict',
+                        again: 'applied'}
+    assert statuses(rejected + [again]) == ['rejected', 'rejected', 'pending']
+
+
+def test_too_many_matches(app, client, school, enqueue):
+    _, (c1, _), students = school(courses=2, students=4)
+    enqueue(c1, students)
+    app.config['API_BULK_MAX_ITEMS'] = 3
+    resp = client.post(f'/api/requests/bulk-transition?course_id={c1}',
+                       json={'status': 'rejected'})
+    assert resp.status_code == 413
+
+
+def test_bulk_transition_validation(client):
+    assert client.post('/api/requests/bulk-transition', json={'ids': [1]}).status_code == 400
+    assert client.post('/api/requests/bulk-transition', json={'status': 'approved'}).status_code == 400
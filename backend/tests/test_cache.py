@@ -0,0 +1,84 @@
+from app import create_app, db
+
+
+def _create_teacher(client, name='Кэш Препод'):
+    return client.post('/api/teachers', json={
+        'full_name': name,
+        'experience': 3,
+        'specialty': 'Физика',
+        'department': 'Физфак'
+    }).get_json()['id']
+
+
+def test_etag_and_not_modified(client):
+    _create_teacher(client)
+    first = client.get('/api/teachers')
+    etag = first.headers['ETag']
+    assert etag
+
+    again = client.get('/api/teachers', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+
+
+def test_write_changes_etag(client):
+    tid = _create_teacher(client)
+    etag = client.get(f'/api/teachers/{tid}').headers['ETag']
+
+    client.patch(f'/api/teachers/{tid}', json={'experience': 30})
+    resp = client.get(f'/api/teachers/{tid}', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.get_json()['experience'] == 30
+    assert resp.headers['ETag'] != etag
+
+
+def test_unrelated_write_keeps_etag(client):
+    _create_teacher(client)
+    etag = client.get('/api/teachers').headers['ETag']
+    client.post('/api/students', json={'full_name': 'С', 'email': 'c@student.ru'})
+    assert client.get('/api/teachers', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_response_cache_hits_and_pagination_headers(client):
+    for i in range(3):
+        _create_teacher(client, f'Препод {i}')
+    first = client.get('/api/teachers?limit=2')
+    second = client.get('/api/teachers?limit=2')
+    assert first.get_json() == second.get_json()
+    assert second.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor']
+
+    stats = client.get('/api/metrics/cache').get_json()
+    assert stats['hits'] >= 1
+    assert stats['versions']['teacher'] == 3
+
+
+def test_not_found_is_not_cached(client):
+    assert client.get('/api/courses/1').status_code == 404
+    assert 'ETag' not in client.get('/api/courses/1').headers
+
+
+def test_etag_is_shared_between_workers(tmp_path):
+    # два приложения на одной БД — как два воркера gunicorn
+    uri = f'sqlite:///{tmp_path / "shared.db"}'
+    first, second = (create_app('testing', overrides={'SQLALCHEMY_DATABASE_URI': uri})
+                     for _ in range(2))
+    with first.app_context():
+        db.create_all()
+        tid = _create_teacher(first.test_client())
+        etag = first.test_client().get('/api/teachers').headers['ETag']
+        db.session.remove()
+    with second.app_context():
+        client = second.test_client()
+        assert client.get('/api/teachers', headers={'If-None-Match': etag}).status_code == 304
+        db.session.remove()
+    with first.app_context():
+        first.test_client().patch(f'/api/teachers/{tid}', json={'experience': 30})
+        db.session.remove()
+    with second.app_context():
+        resp = second.test_client().get('/api/teachers', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert resp.get_json()[0]['experience'] == 30
+        db.session.remove()
+        db.engine.dispose()
+    with first.app_context():
+        db.engine.dispose()
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import Course, Request, Student, Teacher
+
+# Стресс-тест распределения мест: N одновременных подтверждений на курс
+# с лимитом K. По умолчанию — файл SQLite, для PostgreSQL задайте
+# STRESS_DATABASE_URL.
+APPROVALS = int(os.getenv('STRESS_APPROVALS', 40))
+SEATS = int(os.getenv('STRESS_SEATS', 7))
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    url = os.getenv('STRESS_DATABASE_URL', f'sqlite:///{tmp_path / "stress.db"}')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', url)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _seed(app):
+    teacher = Teacher(full_name='T', experience=1, specialty='S', department='D')
+    course = Course(title='Hot course', teacher=teacher, student_limit=SEATS)
+    db.session.add(course)
+    students = [Student(full_name=f'S{i}', email=f'stress{i}@student.ru')
+                for i in range(APPROVALS)]
+    db.session.add_all(students)
+    db.session.flush()
+    requests = [Request(course_id=course.id, student_id=s.id) for s in students]
+    db.session.add_all(requests)
+    db.session.commit()
+    return course.id, [r.id for r in requests]
+
+
+def test_concurrent_approvals_respect_limit(file_app):
+    course_id, request_ids = _seed(file_app)
+    barrier = threading.Barrier(len(request_ids))
+    results = []
+    lock = threading.Lock()
+
+    def approve(request_id):
+        client = file_app.test_client()
+        with file_app.app_context():
+            barrier.wait()
+            started = time.perf_counter()
+            resp = client.patch(f'/api/requests/{request_id}',
+                                json={'status': 'approved'})
+            elapsed = time.perf_counter() - started
+        with lock:
+            results.append((resp.status_code, elapsed))
+
+    threads = [threading.Thread(target=approve, args=(rid,)) for rid in request_ids]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    statuses = [code for code, _ in results]
+    assert statuses.count(200) == SEATS
+    # проигравшие получают «курс заполнен», а не 500
+    assert set(statuses) <= {200, 400, 409}
+
+    db.session.expire_all()
+    assert db.session.get(Course, course_id).approved_count == SEATS
+    assert Request.query.filter_by(course_id=course_id, status='approved').count() == SEATS
+
+    latencies = sorted(elapsed for _, elapsed in results)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f'\n{len(results)} approvals, limit {SEATS}: '
+          f'{len(results) / wall:.1f} req/s, p99 {p99 * 1000:.1f} ms, '
+          f'409={statuses.count(409)}, 400={statuses.count(400)}')
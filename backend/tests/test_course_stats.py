@@ -0,0 +1,52 @@
+from app.models import db, Course, Request, Student, Teacher
+
+
+def _seed():
+    t1 = Teacher(full_name='T1', experience=1, specialty='S', department='Физфак')
+    t2 = Teacher(full_name='T2', experience=1, specialty='S', department='Мехмат')
+    c1 = Course(title='Оптика', teacher=t1, student_limit=3)
+    c2 = Course(title='Алгебра', teacher=t2, student_limit=2)
+    c3 = Course(title='Пустой', teacher=t2, student_limit=1)
+    students = [Student(full_name=f'S{i}', email=f'stat{i}@student.ru') for i in range(5)]
+    db.session.add_all([c1, c2, c3, *students])
+    db.session.flush()
+    for student, course, status in [
+        (students[0], c1, 'approved'), (students[1], c1, 'approved'),
+        (students[2], c1, 'pending'), (students[3], c1, 'rejected'),
+        (students[4], c2, 'approved'),
+    ]:
+        db.session.add(Request(student_id=student.id, course_id=course.id, status=status))
+    db.session.commit()
+    return t1, c1, c2, c3
+
+
+def test_stats_counts_and_free_seats(client):
+    _, c1, c2, c3 = _seed()
+    stats = {row['id']: row for row in client.get('/api/courses/stats').get_json()}
+    assert stats[c1.id] == {
+        'id': c1.id, 'title': 'Оптика', 'teacher_id': c1.teacher_id, 'student_limit': 3,
+        'approved': 2, 'pending': 1, 'rejected': 1, 'free_seats': 1,
+    }
+    assert (stats[c2.id]['approved'], stats[c2.id]['free_seats']) == (1, 1)
+    assert (stats[c3.id]['approved'], stats[c3.id]['free_seats']) == (0, 1)
+
+
+def test_stats_filters_and_pagination(client):
+    t1, c1, c2, c3 = _seed()
+    by_teacher = client.get(f'/api/courses/stats?teacher_id={t1.id}').get_json()
+    assert [r['id'] for r in by_teacher] == [c1.id]
+    by_department = client.get('/api/courses/stats?department=Мехмат').get_json()
+    assert [r['id'] for r in by_department] == [c2.id, c3.id]
+
+    page = client.get('/api/courses/stats?limit=2')
+    assert len(page.get_json()) == 2
+    rest = client.get(f"/api/courses/stats?limit=2&after={page.headers['X-Next-Cursor']}")
+    assert [r['id'] for r in rest.get_json()] == [c3.id]
+
+
+def test_stats_single_query(client):
+    _seed()
+    resp = client.get('/api/courses/stats')
+    # версии таблиц для ETag и один запрос статистики
+    assert 'desc="2 queries"' in resp.headers['Server-Timing']
+    assert resp.headers['ETag']
@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import json
+
+from sqlalchemy import event
+
+from app.models import db, Request
+
+
+def _setup(client, school, n=5):
+    _, (cid,), student_ids = school(students=n, limit=10)
+    return [client.post('/api/requests', json={
+        'student_id': sid, 'course_id': cid,
+        'status': 'approved' if i % 2 else 'pending',
+        'description': 'с запятой, и "кавычками"'
+    }).get_json()['id'] for i, sid in enumerate(student_ids)]
+
+
+def test_export_csv(client, school):
+    ids = _setup(client, school)
+    resp = client.get('/api/export/requests')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/csv'
+    assert 'attachment' in resp.headers['Content-Disposition']
+
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [int(r['id']) for r in rows] == ids
+    assert rows[0]['student_email'] == 'student0@student.ru'
+    assert rows[0]['course_title'] == 'Курс 0'
+    assert rows[0]['teacher_name'] == 'Препод'
+    assert rows[0]['description'] == 'с запятой, и "кавычками"'
+
+
+def test_export_ndjson_with_filters(client, school):
+    _setup(client, school)
+    resp = client.get('/api/export/requests', query_string={'format': 'ndjson', 'status': 'approved'})
+    items = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert len(items) == 2
+    assert {i['status'] for i in items} == {'approved'}
+
+
+def test_export_gzip_single_query(app, client, school):
+    _setup(client, school, n=7)
+    app.config['API_STREAM_CHUNK_SIZE'] = 2
+
+    statements = []
+
+    def listener(*args):
+        statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        resp = client.get('/api/export/requests', query_string={'format': 'ndjson'},
+                          headers={'Accept-Encoding': 'gzip'})
+        body = resp.get_data()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(body).decode().splitlines()
+    assert len(lines) == db.session.query(Request).count() == 7
+    assert len(statements) == 1
+
+
+def test_export_unknown_format(client):
+    assert client.get('/api/export/requests', query_string={'format': 'xml'}).status_code == 400
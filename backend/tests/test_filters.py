@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from app.models import db, Course, Request, Student, Teacher
+
+BASE = datetime(2025, 9, 1, 10, 0)
+
+
+def _seed():
+    t1 = Teacher(full_name='T1', experience=1, specialty='Физика', department='Физфак')
+    t2 = Teacher(full_name='T2', experience=1, specialty='Алгебра', department='Мехмат')
+    c1 = Course(title='C1', teacher=t1, student_limit=10)
+    c2 = Course(title='C2', teacher=t2, student_limit=10)
+    students = [Student(full_name=f'S{i}', email=f'{name}@student.ru',
+                        created_at=BASE + timedelta(days=i))
+                for i, name in enumerate(['anna', 'andrey', 'boris', 'vera'])]
+    db.session.add_all([c1, c2, *students])
+    db.session.flush()
+    rows = [
+        (students[0], c1, 'approved', 3), (students[1], c1, 'pending', 1),
+        (students[2], c2, 'rejected', 2), (students[3], c1, 'approved', 0),
+        (students[0], c2, 'rejected', 4),
+    ]
+    for student, course, status, days in rows:
+        db.session.add(Request(student_id=student.id, course_id=course.id, status=status,
+                               created_at=BASE + timedelta(days=days)))
+    db.session.commit()
+    return c1, c2, students
+
+
+def test_request_filters(client):
+    c1, c2, students = _seed()
+    resp = client.get(f'/api/requests?course_id={c1.id}&status=approved')
+    assert [r['student_id'] for r in resp.get_json()] == [students[0].id, students[3].id]
+
+    resp = client.get('/api/requests?status=pending,rejected')
+    assert sorted(r['status'] for r in resp.get_json()) == ['pending', 'rejected', 'rejected']
+    resp = client.get('/api/requests?status=pending&status=approved')
+    assert len(resp.get_json()) == 3
+
+    resp = client.get(f'/api/requests?student_id={students[0].id}&course_id={c2.id}')
+    assert [r['status'] for r in resp.get_json()] == ['rejected']
+
+    resp = client.get('/api/requests?created_after=2025-09-02T10:00:00'
+                      '&created_before=2025-09-04T10:00:00')
+    assert sorted(r['created_at'] for r in resp.get_json()) == [
+        '2025-09-02T10:00:00', '2025-09-03T10:00:00'
+    ]
+
+
+def test_request_sort_with_keyset_pages(client):
+    _seed()
+    expected = [r['id'] for r in client.get('/api/requests?sort=-created_at').get_json()]
+    created = [r['created_at'] for r in client.get('/api/requests?sort=-created_at').get_json()]
+    assert created == sorted(created, reverse=True)
+
+    seen, url = [], '/api/requests?sort=-created_at&limit=2'
+    while url:
+        resp = client.get(url)
+        seen += [r['id'] for r in resp.get_json()]
+        cursor = resp.headers.get('X-Next-Cursor')
+        url = f'/api/requests?sort=-created_at&limit=2&after={cursor}' if cursor else None
+    assert seen == expected
+
+
+def test_student_filters(client):
+    _, _, students = _seed()
+    resp = client.get('/api/students?email_prefix=an')
+    assert [s['email'] for s in resp.get_json()] == ['anna@student.ru', 'andrey@student.ru']
+    # % и _ — буквальные символы, а не шаблон LIKE
+    assert client.get('/api/students?email_prefix=a_').get_json() == []
+    assert client.get('/api/students?email_prefix=%25').get_json() == []
+    assert client.get(f'/api/students?email_prefix={chr(0x10FFFF)}').status_code == 200
+    resp = client.get('/api/students?created_after=2025-09-03&sort=-created_at')
+    assert [s['id'] for s in resp.get_json()] == [students[3].id, students[2].id]
+
+
+def test_teacher_filters(client):
+    _seed()
+    assert [t['full_name'] for t in client.get('/api/teachers?department=Мехмат').get_json()] == ['T2']
+    assert [t['full_name'] for t in client.get('/api/teachers?specialty=Физика').get_json()] == ['T1']
+
+
+def test_invalid_filter_values(client):
+    assert client.get('/api/requests?course_id=x').status_code == 400
+    assert client.get('/api/requests?created_after=yesterday').status_code == 400
+    assert client.get('/api/requests?sort=description').status_code == 400
+    assert client.get('/api/teachers?sort=created_at').status_code == 400
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.idempotency import purge_expired
+from app.models import db, IdempotencyKey, Request
+
+
+@pytest.fixture
+def payload(school):
+    _, (course_id,), (student_id,) = school(students=1, limit=5)
+    return {'student_id': student_id, 'course_id': course_id}
+
+
+def test_retry_replays_first_response(client, payload):
+    headers = {'Idempotency-Key': 'retry-1'}
+    first = client.post('/api/requests', json=payload, headers=headers)
+    assert first.status_code == 201
+
+    retry = client.post('/api/requests', json=payload, headers=headers)
+    assert retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert Request.query.count() == 1
+
+    # без ключа повтор выполняется и упирается в pending-заявку
+    assert client.post('/api/requests', json=payload).status_code == 400
+
+
+def test_key_reused_with_other_body(client, payload):
+    headers = {'Idempotency-Key': 'reused'}
+    client.post('/api/requests', json=payload, headers=headers)
+    resp = client.post('/api/requests', json=dict(payload, description='x'), headers=headers)
+    assert resp.status_code == 422
+
+
+def test_patch_is_idempotent(client, payload):
+    rid = client.post('/api/requests', json=payload).get_json()['id']
+    headers = {'Idempotency-Key': 'approve'}
+    for _ in range(2):
+        resp = client.patch(f'/api/requests/{rid}', json={'status': 'approved'}, headers=headers)
+        assert resp.status_code == 200
+    assert resp.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_concurrent_duplicate_waits(app, client, payload):
+    headers = {'Idempotency-Key': 'busy'}
+    client.post('/api/requests', json=payload, headers=headers)
+    # делаем вид, что первый запрос ещё выполняется
+    key = db.session.get(IdempotencyKey, 'admin:busy')
+    key.status_code = None
+    db.session.commit()
+
+    app.config['IDEMPOTENCY_WAIT_SECONDS'] = 0.1
+    resp = client.post('/api/requests', json=payload, headers=headers)
+    assert resp.status_code == 409
+    assert resp.headers['Retry-After'] == '1'
+
+    key.created_at = datetime.utcnow() - timedelta(seconds=app.config['IDEMPOTENCY_LOCK_SECONDS'] + 1)
+    db.session.commit()
+    # брошенный ключ занимается заново, обработчик выполняется
+    resp = client.post('/api/requests', json=payload, headers=headers)
+    assert resp.status_code == 400
+    assert resp.get_json() == {'error': 'Student already has a pending request'}
+
+
+def test_errors_are_not_stored(client):
+    headers = {'Idempotency-Key': 'bad'}
+    assert client.post('/api/requests', json={}, headers=headers).status_code == 400
+    assert IdempotencyKey.query.count() == 0
+
+
+def test_returned_error_releases_key(client, payload):
+    headers = {'Idempotency-Key': 'full'}
+    client.put(f"/api/courses/{payload['course_id']}", json={'student_limit': 0})
+    # 400 «Course is full» возвращается обработчиком, а не через abort()
+    resp = client.post('/api/requests', json=payload, headers=headers)
+    assert resp.get_json() == {'error': 'Course is full'}
+    assert IdempotencyKey.query.count() == 0
+
+    client.put(f"/api/courses/{payload['course_id']}", json={'student_limit': 5})
+    resp = client.post('/api/requests', json=payload, headers=headers)
+    assert resp.status_code == 201
+    assert 'Idempotent-Replayed' not in resp.headers
+
+
+def test_purge_expired(app, client):
+    old = datetime.utcnow() - timedelta(seconds=app.config['IDEMPOTENCY_TTL'] + 1)
+    db.session.add_all([
+        IdempotencyKey(key='admin:old', fingerprint='-', status_code=201, created_at=old),
+        IdempotencyKey(key='admin:new', fingerprint='-', status_code=201),
+    ])
+    db.session.commit()
+    assert purge_expired() == 1
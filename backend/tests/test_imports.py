@@ -0,0 +1,98 @@
+import io
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.imports import StudentImporter
+from app.models import db, Course, Request, Student
+from app.seats import find_counter_drift
+
+
+def _teacher(client):
+    return client.post('/api/teachers', json={
+        'full_name': 'Препод',
+        'experience': 5,
+        'specialty': 'История',
+        'department': 'Истфак'
+    }).get_json()['id']
+
+
+def test_import_students_json_with_row_errors(app, client):
+    app.config['IMPORT_BATCH_SIZE'] = 2
+    client.post('/api/students', json={'full_name': 'Был', 'email': 'old@student.ru'})
+    resp = client.post('/api/students/bulk', json=[
+        {'full_name': 'Первый', 'email': 'a@student.ru'},
+        {'full_name': 'Дубль базы', 'email': 'old@student.ru'},
+        {'full_name': 'Второй', 'email': 'b@student.ru'},
+        {'full_name': 'Дубль файла', 'email': 'a@student.ru'},
+        {'email': 'c@student.ru'},
+    ])
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['created'] == 2
+    assert data['errors'] == [
+        {'row': 1, 'error': 'Email already exists'},
+        {'row': 3, 'error': 'Email already exists'},
+        {'row': 4, 'error': 'full_name is required'},
+    ]
+    ids = data['ids']
+    assert ids[1] is None and ids[3] is None and ids[4] is None
+    assert db.session.get(Student, ids[0]).email == 'a@student.ru'
+    assert db.session.get(Student, ids[2]).email == 'b@student.ru'
+
+
+def test_import_courses_csv_upload(client):
+    tid = _teacher(client)
+    csv_data = f'title,teacher_id,student_limit\nАлгебра,{tid},10\nГеометрия,999,5\nЛогика,{tid},x\n'
+    resp = client.post('/api/courses/bulk', data={
+        'file': (io.BytesIO(csv_data.encode()), 'courses.csv')
+    }, content_type='multipart/form-data')
+    data = resp.get_json()
+    assert data['created'] == 1
+    assert [e['row'] for e in data['errors']] == [1, 2]
+    course = db.session.get(Course, data['ids'][0])
+    assert (course.title, course.student_limit, course.approved_count) == ('Алгебра', 10, 0)
+
+
+def test_import_requests_ndjson_checks_capacity(client):
+    tid = _teacher(client)
+    course_id = client.post('/api/courses', json={
+        'title': 'Курс', 'teacher_id': tid, 'student_limit': 1
+    }).get_json()['id']
+    student_ids = client.post('/api/students/bulk', json=[
+        {'full_name': f'Студент {i}', 'email': f'imp{i}@student.ru'} for i in range(3)
+    ]).get_json()['ids']
+    rows = [
+        {'student_id': student_ids[0], 'course_id': course_id, 'status': 'approved'},
+        {'student_id': student_ids[1], 'course_id': course_id, 'status': 'approved'},
+        {'student_id': student_ids[1], 'course_id': course_id},
+        {'student_id': student_ids[1], 'course_id': course_id},
+    ]
+    body = '\n'.join(json.dumps(r) for r in rows) + '\n{broken\n'
+    resp = client.post('/api/requests/bulk', data=body, content_type='application/x-ndjson')
+    data = resp.get_json()
+    assert data['created'] == 2
+    assert data['errors'] == [
+        {'row': 1, 'error': 'Course is full'},
+        {'row': 3, 'error': 'Student already has a pending request'},
+        {'row': 4, 'error': 'Invalid JSON'},
+    ]
+    assert db.session.get(Request, data['ids'][2]).status == 'pending'
+    db.session.expire_all()
+    assert db.session.get(Course, course_id).approved_count == 1
+    assert find_counter_drift() == []
+
+
+def test_import_rejects_bad_payload(client):
+    assert client.post('/api/students/bulk', json={'full_name': 'x'}).status_code == 400
+    assert client.post('/api/students/bulk', data='x', content_type='text/plain').status_code == 415
+
+
+def test_database_errors_are_not_row_errors(client, monkeypatch):
+    # таймаут или обрыв соединения — не ошибка строки, импорт прерывается
+    def insert(self, rows):
+        raise OperationalError('INSERT', {}, Exception('canceling statement due to statement timeout'))
+    monkeypatch.setattr(StudentImporter, 'insert', insert)
+    with pytest.raises(OperationalError):
+        client.post('/api/students/bulk', json=[{'full_name': 'x', 'email': 'x@student.ru'}])
@@ -0,0 +1,52 @@
+import logging
+
+from app.instrumentation import _begin, _finish
+from app.models import db, Course, Student, Teacher
+
+
+def _timings(resp):
+    return dict(
+        part.strip().split(';', 1) for part in resp.headers['Server-Timing'].split(',')
+    )
+
+
+def test_server_timing_header(client):
+    resp = client.get('/api/teachers')
+    timings = _timings(resp)
+    assert {'total', 'db', 'auth', 'serialize'} <= set(timings)
+    # версии таблиц для ETag и сама выборка
+    assert 'desc="2 queries"' in timings['db']
+
+
+def test_structured_log_line(client, caplog):
+    with caplog.at_level(logging.INFO, logger='app.instrumentation'):
+        client.get('/api/students')
+    line = next(r.getMessage() for r in caplog.records if '"endpoint"' in r.getMessage())
+    assert '"endpoint": "api.get_students"' in line
+    assert '"queries": 2' in line
+
+
+def test_n_plus_one_detection(app, caplog):
+    teacher = Teacher(full_name='T', experience=1, specialty='S', department='D')
+    db.session.add_all([Course(title=f'C{i}', teacher=teacher, student_limit=5)
+                        for i in range(6)])
+    db.session.commit()
+    db.session.remove()
+
+    with app.test_request_context('/api/courses'):
+        _begin()
+        # ленивая загрузка course.requests — по запросу на курс
+        sum(len(c.requests) for c in Course.query.all())
+        with caplog.at_level(logging.WARNING, logger='app.instrumentation'):
+            resp = _finish(app.response_class('{}'))
+    assert 'desc="7 queries"' in resp.headers['Server-Timing']
+    assert any('possible N+1' in r.getMessage() for r in caplog.records)
+
+
+def test_slow_query_logged(client, app, caplog):
+    app.config['SLOW_QUERY_MS'] = 0.000001
+    db.session.add(Student(full_name='S', email='slow@student.ru'))
+    db.session.commit()
+    with caplog.at_level(logging.WARNING, logger='app.instrumentation'):
+        client.get('/api/students')
+    assert any('slow query' in r.getMessage() for r in caplog.records)
@@ -0,0 +1,64 @@
+from sqlalchemy import event
+
+from app.models import db
+
+
+def _get(client, url):
+    statements = []
+
+    def record(*args):
+        # чтение версий таблиц для ETag — не запрос за данными
+        if 'table_version' not in args[2]:
+            statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        resp = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return resp, statements
+
+
+def test_student_overview_in_one_statement(client, school):
+    tid, course_ids, (sid,) = school(courses=3, students=1)
+    resp, statements = _get(client, f'/api/students/{sid}/overview')
+    assert resp.get_json()['requests'] == []
+    assert len(statements) == 1
+
+    for i, course_id in enumerate(course_ids):
+        client.post('/api/requests', json={
+            'student_id': sid, 'course_id': course_id,
+            'status': 'pending' if i == len(course_ids) - 1 else 'approved'
+        })
+    resp, statements = _get(client, f'/api/students/{sid}/overview')
+    assert len(statements) == 1
+    data = resp.get_json()
+    assert data['email'] == 'student0@student.ru'
+    assert [r['course']['id'] for r in data['requests']] == course_ids
+    first = data['requests'][0]
+    assert first['status'] == 'approved'
+    assert first['course'] == {
+        'id': course_ids[0], 'title': 'Курс 0', 'student_limit': 2, 'approved_count': 1,
+        'teacher': {'id': tid, 'full_name': 'Препод'}
+    }
+    assert data['requests'][-1]['status'] == 'pending'
+
+
+def test_teacher_overview_in_one_statement(client, school):
+    tid, course_ids, (sid,) = school(courses=3, students=1)
+    client.post('/api/requests', json={
+        'student_id': sid, 'course_id': course_ids[0], 'status': 'approved'
+    })
+    resp, statements = _get(client, f'/api/teachers/{tid}/overview')
+    assert len(statements) == 1
+    data = resp.get_json()
+    assert data['full_name'] == 'Препод'
+    assert [c['id'] for c in data['courses']] == course_ids
+    assert data['courses'][0] == {
+        'id': course_ids[0], 'title': 'Курс 0', 'student_limit': 2,
+        'approved': 1, 'pending': 0, 'rejected': 0, 'free_seats': 1
+    }
+
+
+def test_overview_not_found(client):
+    assert client.get('/api/students/999/overview').status_code == 404
+    assert client.get('/api/teachers/999/overview').status_code == 404
@@ -0,0 +1,54 @@
+import json
+
+
+def _seed_students(client, n):
+    for i in range(n):
+        client.post('/api/students', json={
+            'full_name': f'Студент {i}',
+            'email': f's{i}@student.ru'
+        })
+
+
+def test_list_without_limit_returns_everything(client):
+    _seed_students(client, 3)
+    resp = client.get('/api/students')
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 3
+    assert 'X-Next-Cursor' not in resp.headers
+
+
+def test_keyset_pages_cover_all_rows(client):
+    _seed_students(client, 5)
+    seen = []
+    url = '/api/students?limit=2'
+    while True:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        seen.extend(s['id'] for s in resp.get_json())
+        cursor = resp.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        assert 'rel="next"' in resp.headers['Link']
+        url = f'/api/students?limit=2&after={cursor}'
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+def test_stream_returns_valid_json_array(client, app):
+    app.config['API_STREAM_CHUNK_SIZE'] = 2
+    _seed_students(client, 5)
+    resp = client.get('/api/students?stream=1')
+    assert resp.status_code == 200
+    body = json.loads(resp.get_data(as_text=True))
+    assert [s['email'] for s in body] == [f's{i}@student.ru' for i in range(5)]
+
+
+def test_stream_empty_table(client):
+    resp = client.get('/api/teachers?stream=1')
+    assert json.loads(resp.get_data(as_text=True)) == []
+
+
+def test_invalid_pagination_args(client):
+    assert client.get('/api/courses?limit=0').status_code == 400
+    assert client.get('/api/courses?limit=abc').status_code == 400
+    assert client.get('/api/courses?after=@@@').status_code == 400
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import exc
+
+from app import create_app, db
+from app.pool import TimedQueuePool, engine_options, pool_metrics
+
+
+@pytest.fixture
+def pool_app(tmp_path):
+    app = create_app('testing', overrides={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "pool.db"}',
+        'DB_POOL_SIZE': 2,
+        'DB_MAX_OVERFLOW': 0,
+        'DB_POOL_TIMEOUT': 0.1,
+        'DB_POOL_WARMUP': 2,
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+def test_engine_options_from_config():
+    app = create_app('testing')
+    # SQLite в памяти остаётся на StaticPool
+    assert 'poolclass' not in app.config['SQLALCHEMY_ENGINE_OPTIONS']
+
+    config = dict(app.config, SQLALCHEMY_DATABASE_URI='postgresql://u:p@db/x',
+                  DB_POOL_SIZE=20, DB_STATEMENT_TIMEOUT_MS=5000)
+    options = engine_options(config)
+    assert options['poolclass'] is TimedQueuePool
+    assert options['pool_size'] == 20
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+
+def test_warmup_and_checkout_metrics(pool_app):
+    data = pool_metrics(db.engine)
+    assert data['pool'] == 'TimedQueuePool'
+    assert data['checked_in'] == 2
+    assert data['checkouts'] == 2
+
+    resp = pool_app.test_client().get('/api/metrics/pool')
+    assert resp.status_code == 200
+    assert resp.get_json()['size'] == 2
+
+
+def test_exhaustion_is_counted(pool_app):
+    held = [db.engine.connect(), db.engine.connect()]
+    try:
+        with pytest.raises(exc.TimeoutError):
+            db.engine.connect()
+        data = pool_metrics(db.engine)
+        assert data['timeouts'] == 1
+        assert data['checked_out'] == 2
+        assert data['utilization'] == 1.0
+    finally:
+        for conn in held:
+            conn.close()
+    assert pool_metrics(db.engine)['peak_checked_out'] == 2
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models import db, Course, Request, Student, Teacher
+from app.serializers import teacher_overview_serializer
+
+
+@pytest.fixture
+def seeded(app):
+    teacher = Teacher(full_name='T', experience=1, specialty='S', department='D')
+    courses = [Course(title=f'C{i}', teacher=teacher, student_limit=50) for i in range(20)]
+    students = [Student(full_name=f'S{i}', email=f'plan{i}@student.ru') for i in range(200)]
+    db.session.add_all(courses + students)
+    db.session.flush()
+    statuses = ('approved', 'rejected', 'pending')
+    db.session.execute(db.insert(Request), [
+        {'course_id': courses[i % 20].id, 'student_id': s.id,
+         'status': statuses[i % 3] if i % 3 else 'approved'}
+        for i, s in enumerate(students)
+    ])
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+
+
+def _plan(stmt):
+    sql = str(stmt.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return [row[-1] for row in rows]
+
+
+def _assert_no_full_scan(stmt):
+    plan = _plan(stmt)
+    assert not [step for step in plan if step.startswith('SCAN request')], plan
+    assert any('USING' in step and 'INDEX' in step for step in plan), plan
+
+
+def test_capacity_check_uses_index(seeded):
+    _assert_no_full_scan(
+        select(func.count(Request.id))
+        .where(Request.course_id == 3, Request.status == 'approved')
+    )
+
+
+def test_pending_check_uses_index(seeded):
+    _assert_no_full_scan(
+        select(Request.id)
+        .where(Request.student_id == 7, Request.status == 'pending')
+        .limit(1)
+    )
+
+
+def test_course_queue_uses_index(seeded):
+    _assert_no_full_scan(
+        select(Request.id)
+        .where(Request.course_id == 3, Request.status == 'pending')
+        .order_by(Request.created_at)
+    )
+
+
+def test_teacher_overview_aggregates_only_its_courses(seeded):
+    plan = _plan(teacher_overview_serializer.select(1))
+    assert not [step for step in plan if step.startswith('SCAN course')], plan
+    assert any('ix_course_teacher_id' in step for step in plan), plan
@@ -0,0 +1,104 @@
+import pytest
+
+from app.ratelimit import MemoryStorage, RateLimiter, SQLiteStorage, parse_rate
+
+
+def _teacher(client):
+    return client.post('/api/teachers', json={
+        'full_name': 'Препод',
+        'experience': 5,
+        'specialty': 'Физика',
+        'department': 'Физфак'
+    })
+
+
+def test_parse_rate():
+    assert parse_rate('10/second') == (10, 10)
+    assert parse_rate('120/minute') == (120, 2)
+    with pytest.raises(ValueError):
+        parse_rate('10 per day')
+
+
+@pytest.mark.parametrize('make_storage', [
+    lambda tmp_path: MemoryStorage(),
+    lambda tmp_path: SQLiteStorage(str(tmp_path / 'ratelimit.db')),
+])
+def test_bucket_refills(make_storage, tmp_path):
+    storage = make_storage(tmp_path)
+    assert storage.take('u:x', 2, 1000) == 0
+    assert storage.take('u:x', 2, 1000) == 0
+    # корзина пуста, но при 1000 токенов/с ждать меньше миллисекунды
+    assert 0 < storage.take('u:x', 2, 1000) <= 0.001
+    assert storage.take('u:y', 1, 0.01) == 0
+    assert storage.take('u:y', 1, 0.01) > 99
+
+
+def test_sqlite_storage_is_shared(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    SQLiteStorage(path).take('u:x', 1, 0.01)
+    assert SQLiteStorage(path).take('u:x', 1, 0.01) > 0
+
+
+def test_rate_limit_per_route_and_role(app, client):
+    app.extensions['ratelimit'] = RateLimiter(MemoryStorage(), {
+        'default': {'admin': '100/minute'},
+        'api.create_teacher': {'admin': '1/minute'},
+    })
+    assert _teacher(client).status_code == 201
+    resp = _teacher(client)
+    assert resp.status_code == 429
+    assert int(resp.headers['Retry-After']) == 60
+    # другие маршруты расходуют общую корзину
+    assert client.post('/api/students', json={
+        'full_name': 'Студент', 'email': 'rl@student.ru'
+    }).status_code == 201
+    assert client.get('/api/teachers').status_code == 200
+
+
+def test_sqlite_write_slots_are_shared(tmp_path):
+    # два хранилища на одном файле — как два воркера gunicorn
+    path = str(tmp_path / 'ratelimit.db')
+    first, second = SQLiteStorage(path), SQLiteStorage(path)
+    slot = first.acquire(1, lease=60)
+    assert slot is not None
+    assert second.acquire(1, lease=60) is None
+    first.release(slot)
+    assert second.acquire(1, lease=60) is not None
+    # слот убитого воркера освобождается по истечении lease
+    assert first.acquire(1, lease=0) is not None
+
+
+def test_write_concurrency_cap(app, client, tmp_path):
+    limiter = RateLimiter(SQLiteStorage(str(tmp_path / 'ratelimit.db')), {}, max_writes=1)
+    app.extensions['ratelimit'] = limiter
+    slot = limiter.acquire_write()
+    resp = _teacher(client)
+    assert resp.status_code == 429
+    assert resp.headers['Retry-After'] == '1'
+    limiter.release_write(slot)
+    assert _teacher(client).status_code == 201
+    assert _teacher(client).status_code == 201
+    assert limiter.rejected == 1
+
+
+def test_refused_write_slot_keeps_token(app, client):
+    limiter = RateLimiter(MemoryStorage(), {'default': {'admin': '1/minute'}}, max_writes=1)
+    app.extensions['ratelimit'] = limiter
+    slot = limiter.acquire_write()
+    assert _teacher(client).status_code == 429
+    limiter.release_write(slot)
+    # токен не списан отказом по слоту
+    assert _teacher(client).status_code == 201
+
+
+def test_sqlite_storage_connects_lazily(tmp_path, monkeypatch):
+    path = tmp_path / 'ratelimit.db'
+    storage = SQLiteStorage(str(path))
+    # созданное до fork хранилище ещё не держит соединения
+    assert not path.exists()
+    assert storage.take('u:x', 1, 0.01) == 0
+    conn = storage._connect()
+    # в другом процессе (после fork) открывается своё соединение
+    monkeypatch.setattr('os.getpid', lambda: -1)
+    assert storage._connect() is not conn
+    assert storage.take('u:x', 1, 0.01) > 0
@@ -0,0 +1,133 @@
+import pytest
+from sqlalchemy import event, insert
+
+from app import create_app, db
+from app.models import Teacher
+
+
+def _teacher(name):
+    return {'full_name': name, 'experience': 1, 'specialty': 'Химия', 'department': 'Химфак'}
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    # Основная БД и реплики — отдельные файлы SQLite; репликации нет,
+    # поэтому по содержимому видно, откуда пришёл ответ
+    apps = []
+
+    def factory(*replicas):
+        app = create_app('testing', overrides={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+            'SQLALCHEMY_REPLICA_URIS': [f'sqlite:///{tmp_path / name}' for name in replicas],
+        })
+        app.extensions['response_cache'] = None
+        ctx = app.app_context()
+        ctx.push()
+        db.create_all()
+        for engine in app.extensions['replicas'].engines:
+            if 'missing' not in str(engine.url):
+                db.metadata.create_all(engine)
+        apps.append(ctx)
+        return app
+
+    yield factory
+    for ctx in apps:
+        db.session.remove()
+        ctx.pop()
+
+
+def _seed_replica(app, index, name):
+    with app.extensions['replicas'].engines[index].begin() as conn:
+        conn.execute(insert(Teacher).values(**_teacher(name)))
+
+
+def _names(client):
+    return [t['full_name'] for t in client.get('/api/teachers').get_json()]
+
+
+def test_reads_go_to_replica_and_writes_to_primary(make_app):
+    app = make_app('replica.db')
+    client = app.test_client()
+    _seed_replica(app, 0, 'С реплики')
+
+    tid = client.post('/api/teachers', json=_teacher('С основной')).get_json()['id']
+    assert _names(client) == ['С реплики']
+    assert db.session.get(Teacher, tid).full_name == 'С основной'
+
+
+def test_capacity_checks_use_primary(make_app):
+    app = make_app('replica.db')
+    client = app.test_client()
+    tid = client.post('/api/teachers', json=_teacher('Препод')).get_json()['id']
+    cid = client.post('/api/courses', json={
+        'title': 'Курс', 'teacher_id': tid, 'student_limit': 1
+    }).get_json()['id']
+    sid = client.post('/api/students', json={
+        'full_name': 'Студент', 'email': 'replica@student.ru'
+    }).get_json()['id']
+
+    # На реплике курса нет: 404 означал бы, что проверка прочитала реплику
+    resp = client.post('/api/requests', json={
+        'student_id': sid, 'course_id': cid, 'status': 'approved'
+    })
+    assert resp.status_code == 201
+    assert client.patch(f'/api/requests/{resp.get_json()["id"]}',
+                        json={'course_id': cid}).status_code == 200
+    assert client.get(f'/api/courses/{cid}').status_code == 404
+
+
+def test_round_robin(make_app):
+    app = make_app('a.db', 'b.db')
+    client = app.test_client()
+    _seed_replica(app, 0, 'A')
+    _seed_replica(app, 1, 'B')
+    assert sorted(_names(client) + _names(client)) == ['A', 'B']
+
+
+def test_unreachable_replica_is_skipped(make_app):
+    app = make_app('missing/replica.db', 'b.db')
+    client = app.test_client()
+    _seed_replica(app, 1, 'B')
+
+    # первый же запрос на недоступную реплику уходит на следующую
+    assert _names(client) == ['B']
+    assert [r['healthy'] for r in app.extensions['replicas'].status()] == [False, True]
+    assert _names(client) == ['B']
+    assert _names(client) == ['B']
+
+
+def test_falls_back_to_primary(make_app):
+    app = make_app('missing/replica.db')
+    replicas = app.extensions['replicas']
+    replicas.mark_down(replicas.engines[0])
+    client = app.test_client()
+    client.post('/api/teachers', json=_teacher('С основной'))
+    assert _names(client) == ['С основной']
+
+
+def test_falls_back_to_primary_in_same_request(make_app):
+    app = make_app('missing/replica.db')
+    client = app.test_client()
+    client.post('/api/teachers', json=_teacher('С основной'))
+    assert _names(client) == ['С основной']
+    assert [r['healthy'] for r in app.extensions['replicas'].status()] == [False]
+
+
+def test_pool_metrics_list_replicas(make_app):
+    app = make_app('a.db')
+    data = app.test_client().get('/api/metrics/pool').get_json()
+    assert [r['healthy'] for r in data['replicas']] == [True]
+
+
+def test_healthy_replica_is_not_probed_on_every_read(make_app):
+    app = make_app('a.db')
+    client = app.test_client()
+    checkouts = []
+    event.listen(app.extensions['replicas'].engines[0], 'checkout',
+                 lambda *a: checkouts.append(1))
+    _names(client)
+    probed = len(checkouts)
+    # в пределах REPLICA_CHECK_SECONDS реплику не проверяют лишним подключением
+    # (сессия теста живёт весь тест и держит своё соединение)
+    _names(client)
+    assert len(checkouts) == probed
@@ -0,0 +1,94 @@
+from sqlalchemy.dialects import postgresql
+
+from app.models import db
+from app.search import _postgresql_search, rebuild_search_index
+
+
+def _seed(client):
+    tid = client.post('/api/teachers', json={
+        'full_name': 'Смирнова Анна',
+        'experience': 7,
+        'specialty': 'Органическая химия',
+        'department': 'Химфак'
+    }).get_json()['id']
+    cid = client.post('/api/courses', json={
+        'title': 'Химия для начинающих', 'teacher_id': tid, 'student_limit': 10
+    }).get_json()['id']
+    sids = [client.post('/api/students', json={
+        'full_name': name, 'email': email
+    }).get_json()['id'] for name, email in (
+        ('Иванов Пётр', 'petr.ivanov@student.ru'),
+        ('Иванова Мария', 'maria@student.ru'),
+        ('Сидоров Олег', 'oleg@student.ru'),
+    )]
+    return tid, cid, sids
+
+
+def _search(client, **params):
+    return client.get('/api/search', query_string=params)
+
+
+def test_search_partial_name_and_email(client):
+    _, _, (ivanov, ivanova, _) = _seed(client)
+    items = _search(client, q='иванов', type='student').get_json()
+    assert {i['id'] for i in items} == {ivanov, ivanova}
+    assert all(i['type'] == 'student' for i in items)
+
+    items = _search(client, q='petr.iv').get_json()
+    assert [(i['type'], i['id']) for i in items] == [('student', ivanov)]
+    assert items[0]['detail'] == 'petr.ivanov@student.ru'
+
+
+def test_search_across_types(client):
+    tid, cid, _ = _seed(client)
+    items = _search(client, q='хим').get_json()
+    assert {(i['type'], i['id']) for i in items} == {('teacher', tid), ('course', cid)}
+    assert all(i['score'] > 0 for i in items)
+
+
+def test_index_follows_writes(client):
+    _, cid, (ivanov, _, _) = _seed(client)
+    client.patch(f'/api/students/{ivanov}', json={'full_name': 'Петров Иван'})
+    assert [i['id'] for i in _search(client, q='петров').get_json()] == [ivanov]
+    assert ivanov not in [i['id'] for i in _search(client, q='иванов').get_json()]
+
+    client.delete(f'/api/courses/{cid}')
+    assert _search(client, q='начинающих').get_json() == []
+
+
+def test_search_pagination(client):
+    _seed(client)
+    first = _search(client, q='student', limit=2)
+    assert len(first.get_json()) == 2
+    rest = _search(client, q='student', limit=2, after=first.headers['X-Next-Cursor'])
+    assert len(rest.get_json()) == 1
+    assert 'X-Next-Cursor' not in rest.headers
+
+
+def test_search_validation(client):
+    assert _search(client, q='ab').status_code == 400
+    assert _search(client, q='химия', type='room').status_code == 400
+
+
+def test_rebuild_index(app, client):
+    _seed(client)
+    db.session.execute(db.text('DELETE FROM search_index'))
+    db.session.commit()
+    assert rebuild_search_index() == 5
+    assert len(_search(client, q='student').get_json()) == 3
+
+
+def test_multi_word_query_requires_every_word(client):
+    _, _, (ivanov, _, _) = _seed(client)
+    # слова в любом порядке и в разных столбцах, как на PostgreSQL
+    for q in ('Иванов Пётр', 'пётр иванов', 'иванов petr'):
+        assert [i['id'] for i in _search(client, q=q).get_json()] == [ivanov], q
+    assert _search(client, q='иванов олег').get_json() == []
+
+
+def test_postgresql_query_ands_words(app):
+    stmt, _ = _postgresql_search(['иванов', 'пётр'], ('student',))
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    patterns = {v for v in compiled.params.values() if isinstance(v, str) and v.startswith('%')}
+    assert patterns == {'%иванов%', '%пётр%'}
+    assert str(compiled).count('ILIKE') == 4
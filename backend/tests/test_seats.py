@@ -0,0 +1,80 @@
+from app.models import db, Course
+from app.seats import app_maintains_counter, find_counter_drift, recount_approved
+
+
+def _approved_count(course_id):
+    db.session.expire_all()
+    return db.session.get(Course, course_id).approved_count
+
+
+def test_counter_follows_request_lifecycle(client, school):
+    _, (c1, c2), (s1, s2, _) = school(courses=2)
+
+    r1 = client.post('/api/requests', json={
+        'student_id': s1, 'course_id': c1, 'status': 'approved'
+    }).get_json()['id']
+    r2 = client.post('/api/requests', json={
+        'student_id': s2, 'course_id': c1
+    }).get_json()['id']
+    assert _approved_count(c1) == 1
+
+    client.patch(f'/api/requests/{r2}', json={'status': 'approved'})
+    assert _approved_count(c1) == 2
+
+    client.patch(f'/api/requests/{r1}', json={'course_id': c2})
+    assert (_approved_count(c1), _approved_count(c2)) == (1, 1)
+
+    client.patch(f'/api/requests/{r2}', json={'status': 'rejected'})
+    assert _approved_count(c1) == 0
+
+    client.delete(f'/api/requests/{r1}')
+    assert _approved_count(c2) == 0
+    assert find_counter_drift() == []
+
+
+def test_limit_uses_counter(client, school):
+    _, (c1,), (s1, s2, s3) = school(limit=1)
+    client.post('/api/requests', json={
+        'student_id': s1, 'course_id': c1, 'status': 'approved'
+    })
+    r = client.post('/api/requests', json={'student_id': s2, 'course_id': c1})
+    assert r.status_code == 400
+
+
+def test_verify_and_recount_commands(client, app, school):
+    _, (c1,), (s1, _, _) = school()
+    client.post('/api/requests', json={
+        'student_id': s1, 'course_id': c1, 'status': 'approved'
+    })
+    db.session.execute(db.update(Course).values(approved_count=5))
+    db.session.commit()
+    assert find_counter_drift() == [(c1, 5, 1)]
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['seats', 'verify'])
+    assert result.exit_code == 1
+    assert f'course {c1}' in result.output
+
+    result = runner.invoke(args=['seats', 'recount'])
+    assert result.exit_code == 0
+    assert _approved_count(c1) == 1
+    assert runner.invoke(args=['seats', 'verify']).exit_code == 0
+
+
+def test_recount_selected_courses(client, school):
+    _, (c1, c2), _ = school(courses=2)
+    db.session.execute(db.update(Course).values(approved_count=3))
+    recount_approved([c1])
+    db.session.commit()
+    assert (_approved_count(c1), _approved_count(c2)) == (0, 3)
+
+
+def test_counter_without_trigger_is_kept_by_app(app, client, school):
+    # 'auto': в базе из db.create_all() триггера нет — счётчик ведёт приложение
+    app.config['APPROVED_COUNT_TRIGGER'] = None
+    assert app_maintains_counter()
+    assert app.extensions['approved_count_trigger'] is False
+    _, (c1,), (s1, s2, s3) = school(limit=2)
+    for s in (s1, s2, s3):
+        client.post('/api/requests', json={'student_id': s, 'course_id': c1, 'status': 'approved'})
+    assert _approved_count(c1) == 2
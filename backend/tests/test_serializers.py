@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from app.models import db, Student
+from app.serializers import student_serializer, request_serializer
+
+
+def test_rows_format_datetimes():
+    created = datetime(2025, 5, 1, 12, 30)
+    rows = [(1, 'А', 'a@b.c', created), (2, 'Б', 'b@b.c', None)]
+    assert student_serializer.rows(rows) == [
+        {'id': 1, 'full_name': 'А', 'email': 'a@b.c', 'created_at': '2025-05-01T12:30:00'},
+        {'id': 2, 'full_name': 'Б', 'email': 'b@b.c', 'created_at': None},
+    ]
+
+
+def test_select_projects_only_exposed_columns():
+    assert [c.name for c in request_serializer.select().selected_columns] == [
+        'id', 'student_id', 'course_id', 'description', 'status', 'created_at'
+    ]
+
+
+def test_list_endpoint_skips_orm_hydration(client, app):
+    for i in range(3):
+        db.session.add(Student(full_name=f'S{i}', email=f'ser{i}@student.ru'))
+    db.session.commit()
+    db.session.expunge_all()
+
+    resp = client.get('/api/students')
+    assert len(resp.get_json()) == 3
+    assert len(db.session.identity_map) == 0
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+from app import create_app, db
+from app.swagger import load_api_spec
+from benchmarks.startup import BACKEND_DIR, check_budget, run
+
+# Бюджеты старта воркера в ленивом режиме; на медленной машине можно
+# ослабить через переменные окружения
+MAX_CREATE_MS = float(os.getenv('STARTUP_MAX_CREATE_MS', 500))
+MAX_IMPORT_MS = float(os.getenv('STARTUP_MAX_IMPORT_MS', 5000))
+
+
+def _lazy_env():
+    return dict(os.environ, LAZY_EXTENSIONS='1')
+
+
+def test_lazy_mode_skips_heavy_imports():
+    code = ('import sys; from app import create_app; create_app(overrides='
+            '{"SQLALCHEMY_DATABASE_URI": "sqlite://"}); '
+            'print(",".join(m for m in ("flasgger", "flask_admin", "flask_migrate") '
+            'if m in sys.modules))')
+    out = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=_lazy_env(),
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == ''
+
+
+def test_swagger_mounted_on_first_access():
+    app = create_app('testing', overrides={'LAZY_EXTENSIONS': True})
+    mount = app.wsgi_app
+    assert not mount.loaded
+
+    client = app.test_client()
+    resp = client.get('/apispec.json')
+    assert resp.status_code == 200
+    assert '/teachers' in resp.get_json()['paths']
+    assert mount.loaded
+
+
+def test_mounted_app_shares_engine():
+    app = create_app('testing', overrides={'LAZY_EXTENSIONS': True})
+    app.test_client().get('/apispec.json')
+    with app.app_context():
+        engine = db.engine
+    with app.wsgi_app._get_app().app_context():
+        assert db.engine is engine
+
+
+def test_disabled_swagger_is_not_mounted():
+    app = create_app('testing', overrides={'SWAGGER_ENABLED': False})
+    assert app.test_client().get('/apispec.json').status_code == 404
+
+
+def test_spec_parsed_once():
+    assert load_api_spec() is load_api_spec()
+
+
+def test_startup_within_budget():
+    result = run(runs=1, env=_lazy_env())
+    assert check_budget(result, MAX_IMPORT_MS, MAX_CREATE_MS) == []
+    assert check_budget(result, max_create_ms=0) == [
+        ('create_app_ms', result['create_app_ms'], 0)
+    ]
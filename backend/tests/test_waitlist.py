@@ -0,0 +1,88 @@
+from app.models import db, Course
+from app.seats import find_counter_drift
+from app.waitlist import promote_waitlist
+
+
+def test_position_and_waitlist_order(client, school, enqueue):
+    _, (c,), (s1, s2, s3, _) = school(limit=1, students=4)
+    r1, r2, r3 = enqueue(c, [s1, s2, s3])
+
+    data = client.get(f'/api/requests/{r3}/position').get_json()
+    assert data['position'] == 3
+    assert data['ahead'] == 2
+    assert data['free_seats'] == 1
+
+    resp = client.get(f'/api/courses/{c}/waitlist', query_string={'limit': 2})
+    assert [r['id'] for r in resp.get_json()] == [r1, r2]
+    cursor = resp.headers['X-Next-Cursor']
+    resp = client.get(f'/api/courses/{c}/waitlist', query_string={'limit': 2, 'after': cursor})
+    assert [r['id'] for r in resp.get_json()] == [r3]
+
+
+def test_position_of_processed_request(client, school, enqueue):
+    _, (c,), (s1, *_) = school(limit=1, students=4)
+    (r,) = enqueue(c, [s1], status='approved')
+    assert client.get(f'/api/requests/{r}/position').status_code == 409
+
+
+def test_deleting_approved_promotes_head_of_queue(client, school, enqueue, statuses):
+    _, (c,), (s1, s2, s3, _) = school(limit=1, students=4)
+    (approved,) = enqueue(c, [s1], status='approved')
+    r2, r3 = enqueue(c, [s2, s3])
+
+    assert client.delete(f'/api/requests/{approved}').status_code == 200
+    assert statuses([r2, r3]) == ['approved', 'pending']
+    assert client.get(f'/api/requests/{r3}/position').get_json()['position'] == 1
+    assert find_counter_drift() == []
+
+
+def test_moving_approved_to_other_course_frees_seat(client, school, enqueue, statuses):
+    _, (c,), (s1, s2, _, _) = school(limit=1, students=4)
+    _, (other,), _ = school(limit=5, students=0)
+    (approved,) = enqueue(c, [s1], status='approved')
+    (waiting,) = enqueue(c, [s2])
+
+    client.patch(f'/api/requests/{approved}', json={'course_id': other})
+    assert statuses([waiting]) == ['approved']
+    assert find_counter_drift() == []
+
+
+def test_demoting_approved_does_not_reapprove_it(client, school, enqueue, statuses):
+    _, (c,), (s1, s2, s3, _) = school(limit=1, students=4)
+    (approved,) = enqueue(c, [s1], status='approved')
+
+    resp = client.patch(f'/api/requests/{approved}', json={'status': 'pending'})
+    assert resp.status_code == 200
+    assert statuses([approved]) == ['pending']
+
+    # место достаётся следующей заявке очереди, а не разжалованной
+    (other,) = enqueue(c, [s2], status='approved')
+    (waiting,) = enqueue(c, [s3])
+    client.post('/api/requests/bulk-transition', json={'ids': [other], 'status': 'pending'})
+    assert statuses([approved, other, waiting]) == ['approved', 'pending', 'pending']
+    assert find_counter_drift() == []
+
+
+def test_raising_limit_promotes_in_batches(app, client, school, enqueue, statuses):
+    _, (c,), students = school(limit=1, students=6)
+    ids = enqueue(c, students)
+    promote_waitlist(c)
+    assert statuses(ids) == ['approved'] + ['pending'] * 5
+
+    app.config['WAITLIST_BATCH_SIZE'] = 2
+    client.patch(f'/api/courses/{c}', json={'student_limit': 4})
+    assert statuses(ids) == ['approved'] * 4 + ['pending'] * 2
+    db.session.expire_all()
+    assert db.session.get(Course, c).approved_count == 4
+    assert find_counter_drift() == []
+
+
+def test_background_worker(app, client, school, enqueue, statuses):
+    app.config['WAITLIST_SYNC'] = False
+    _, (c,), (s1, s2, _, _) = school(limit=1, students=4)
+    (approved,) = enqueue(c, [s1], status='approved')
+    (waiting,) = enqueue(c, [s2])
+
+    client.delete(f'/api/requests/{approved}')
+    assert app.extensions['waitlist_worker'].drain(timeout=5)
+    assert statuses([waiting]) == ['approved']
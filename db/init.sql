@@ -12,6 +12,7 @@ CREATE TABLE teacher (
         title VARCHAR(255) NOT NULL,
         teacher_id INTEGER NOT NULL,
         student_limit INTEGER NOT NULL,
+        approved_count INTEGER NOT NULL DEFAULT 0,
         CONSTRAINT fk_course_teacher FOREIGN KEY (teacher_id)
             REFERENCES teacher (id)
             ON DELETE CASCADE
@@ -39,36 +40,97 @@ CREATE TABLE request (
         ON DELETE CASCADE
 );
 
+-- Курсы преподавателя (GET /api/teachers/<id>/overview)
+CREATE INDEX ix_course_teacher_id
+    ON course (teacher_id);
+
 CREATE UNIQUE INDEX uq_student_pending_request 
     ON request (student_id) 
     WHERE (status = 'pending');
 
-CREATE OR REPLACE FUNCTION check_course_limit()
+-- Проверка лимита курса и очередь заявок по курсу
+CREATE INDEX ix_request_course_status_created
+    ON request (course_id, status, created_at);
+
+-- Заявки студента по статусу
+CREATE INDEX ix_request_student_status
+    ON request (student_id, status);
+
+-- Сортировка и фильтр по дате подачи (keyset по (created_at, id))
+CREATE INDEX ix_request_created_at
+    ON request (created_at, id);
+
+CREATE INDEX ix_student_created_at
+    ON student (created_at, id);
+
+-- Фильтр email_prefix: LIKE 'prefix%' по индексу при любой collation
+CREATE INDEX ix_student_email_pattern
+    ON student (email text_pattern_ops);
+
+-- Версии таблиц для ETag и кэша ответов (app/cache.py)
+CREATE TABLE table_version (
+    name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_version (name) VALUES ('teacher'), ('course'), ('student'), ('request');
+
+-- Сохранённые ответы на запросы с Idempotency-Key
+CREATE TABLE idempotency_key (
+    key VARCHAR(255) PRIMARY KEY,
+    fingerprint VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    body TEXT,
+    content_type VARCHAR(255),
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE INDEX ix_idempotency_key_created_at
+    ON idempotency_key (created_at);
+
+-- Подтверждённые заявки курса (пересчёт approved_count)
+CREATE INDEX ix_request_course_approved
+    ON request (course_id)
+    WHERE (status = 'approved');
+
+-- Поиск по подстроке (GET /api/search): триграммные GIN-индексы
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX ix_student_full_name_trgm ON student USING gin (full_name gin_trgm_ops);
+CREATE INDEX ix_student_email_trgm ON student USING gin (email gin_trgm_ops);
+CREATE INDEX ix_teacher_full_name_trgm ON teacher USING gin (full_name gin_trgm_ops);
+CREATE INDEX ix_teacher_specialty_trgm ON teacher USING gin (specialty gin_trgm_ops);
+CREATE INDEX ix_teacher_department_trgm ON teacher USING gin (department gin_trgm_ops);
+CREATE INDEX ix_course_title_trgm ON course USING gin (title gin_trgm_ops);
+
+-- Поддержание course.approved_count при любых изменениях request.
+-- Место занимается одним условным UPDATE: строка course блокируется,
+-- конкурирующие подтверждения сериализуются, лимит не превышается.
+CREATE OR REPLACE FUNCTION maintain_approved_count()
 RETURNS TRIGGER AS $$
-DECLARE 
-    current_count INTEGER;
-    max_limit INTEGER;
 BEGIN
-    IF NEW.status = 'approved' THEN
-        SELECT student_limit INTO max_limit 
-        FROM course 
-        WHERE id = NEW.course_id;
-
-        SELECT COUNT(*) INTO current_count 
-        FROM request 
-        WHERE 
-            course_id = NEW.course_id AND 
-            status = 'approved' AND 
-            id != COALESCE(NEW.id, 0);
-
-        IF current_count >= max_limit THEN
+    IF TG_OP = 'UPDATE'
+        AND OLD.status = NEW.status
+        AND OLD.course_id = NEW.course_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'approved' THEN
+        UPDATE course SET approved_count = approved_count - 1
+        WHERE id = OLD.course_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'approved' THEN
+        UPDATE course SET approved_count = approved_count + 1
+        WHERE id = NEW.course_id AND approved_count < student_limit;
+        IF NOT FOUND THEN
             RAISE EXCEPTION 'Course student limit exceeded';
         END IF;
     END IF;
-    RETURN NEW;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER trigger_check_course_limit
-BEFORE INSERT OR UPDATE ON request
-FOR EACH ROW EXECUTE FUNCTION check_course_limit();
\ No newline at end of file
+CREATE TRIGGER trigger_maintain_approved_count
+AFTER INSERT OR UPDATE OR DELETE ON request
+FOR EACH ROW EXECUTE FUNCTION maintain_approved_count();